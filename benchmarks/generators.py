@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from processing.registry import MONTHS, get_module
+from utils.emission_factors import EMISSION_FACTORS_PATH
+from utils.factor_repository import get_repository
+
+MOCK_PATH = "data/lca/mock/{key}.xlsx"
+
+# Colunas de nomes sorteadas das tabelas de fatores reais: coluna -> (planilha, coluna)
+NAME_SOURCES = {
+    "forestry_fuels": {
+        "Combustível (Nomenclatura Inv. GEE)": ("data/lca/densities.xlsx", "fuel"),
+        "Combustível (Nomenclatura Pegada de Carbono)": (EMISSION_FACTORS_PATH, "name"),
+    },
+    "forestry_fertilizers": {"Nome no Estudo": (EMISSION_FACTORS_PATH, "name")},
+    "forestry_energy": {"Fonte de Energia": (EMISSION_FACTORS_PATH, "name")},
+    "carbonization": {},
+    "industrial": {"Nome no Estudo (Ecoinvent)": (EMISSION_FACTORS_PATH, "name")},
+    "quartz_mining": {"Nome no estudo": (EMISSION_FACTORS_PATH, "name")},
+}
+
+# Colunas de quantidades que recebem variação aleatória
+QUANTITY_COLUMNS = {
+    "forestry_fuels": ["Consumo"],
+    "forestry_fertilizers": ["Quantidade utilizada"],
+    "forestry_energy": [f"Consumo - {month}" for month in MONTHS],
+    "carbonization": ["Produção de Carvão Vegetal"],
+    "industrial": ["Quantidade"],
+    "quartz_mining": ["Quantidade"],
+}
+
+# Fração das linhas cujo nome é sorteado das tabelas de fatores; as demais
+# mantêm os nomes das planilhas de exemplo (ex.: "Grid", misturas de combustível)
+DRAWN_NAME_FRACTION = 0.5
+
+# Número de nomes distintos sorteados por coluna (inventários reais repetem
+# poucos nomes em muitas linhas)
+VOCABULARY_SIZE = 50
+
+
+def get_template(key: str) -> pd.DataFrame:
+    """
+    Planilha de exemplo do módulo (data/lca/mock), usada como modelo de
+    colunas, tipos e combinações de valores realistas.
+    """
+    get_module(key)
+    return get_repository().frame(MOCK_PATH.format(key=key))
+
+
+def get_vocabulary(path: str, column: str, rng: np.random.Generator) -> np.ndarray:
+    """Sorteia até VOCABULARY_SIZE nomes distintos de uma tabela de fatores."""
+    names = get_repository().frame(path)[column].dropna().unique()
+    size = min(VOCABULARY_SIZE, len(names))
+    return rng.choice(names, size=size, replace=False)
+
+
+def generate(key: str, rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Gera uma planilha de entrada sintética para um módulo.
+
+    As linhas são sorteadas da planilha de exemplo do módulo; parte dos nomes
+    é trocada por nomes das tabelas de fatores reais e as quantidades recebem
+    uma variação log-normal. A mesma semente sempre gera os mesmos dados.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param rows: Número de linhas.
+    :param seed: Semente do gerador aleatório.
+    :return: DataFrame com as colunas da planilha de entrada do módulo.
+    """
+    rng = np.random.default_rng(seed)
+    template = get_template(key)
+
+    df = template.iloc[rng.integers(0, len(template), size=rows)].reset_index(drop=True)
+
+    for column, (path, source_column) in NAME_SOURCES[key].items():
+        vocabulary = get_vocabulary(path, source_column, rng)
+        drawn = rng.random(rows) < DRAWN_NAME_FRACTION
+        names = df[column].astype(object).to_numpy()
+        names[drawn] = rng.choice(vocabulary, size=int(drawn.sum()))
+        df[column] = names
+
+    for column in QUANTITY_COLUMNS[key]:
+        df[column] = df[column] * rng.lognormal(0, 0.25, size=rows)
+
+    return df
@@ -0,0 +1,222 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from statistics import median
+
+from benchmarks.generators import generate
+from processing.registry import MODULES, run_module, summarize
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+HISTORY_PATH = "benchmarks/history.json"
+
+# Número de execuções anteriores usadas como referência (mediana)
+BASELINE_RUNS = 5
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo atual (MB)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(key: str, rows: int, seed: int = 0) -> dict:
+    """
+    Executa um caso do benchmark (módulo x tamanho) e mede cada etapa.
+
+    Executado em um processo novo por caso, para que o pico de memória seja
+    apenas o do caso.
+
+    :return: Resultado com tempo por etapa (s), linhas/s e pico de memória.
+    """
+    stages = {}
+
+    started = time.perf_counter()
+    run_module(key, generate(key, 10, seed))
+    stages["Aquecimento"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    df = generate(key, rows, seed)
+    stages["Geração"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    processed, _ = run_module(key, df)
+    stages["Cálculo"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    summarize(key, processed)
+    stages["Resumo"] = time.perf_counter() - started
+
+    return {
+        "module": key,
+        "rows": rows,
+        "seed": seed,
+        "stages": stages,
+        "rows_per_second": rows / stages["Cálculo"] if stages["Cálculo"] else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_cases(cases: list[tuple[str, int]], seed: int = 0, isolate: bool = True) -> list[dict]:
+    """
+    Executa os casos em sequência, cada um em um processo novo (ou no
+    processo atual com `isolate=False`).
+    """
+    if not isolate:
+        return [run_case(key, rows, seed) for key, rows in cases]
+
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        return [pool.apply(run_case, (key, rows, seed)) for key, rows in cases]
+
+
+def load_history(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_history(path: str, history: list[dict]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+
+
+def find_regressions(result: dict, history: list[dict], threshold: float) -> list[str]:
+    """
+    Compara um resultado com a mediana das últimas execuções do mesmo caso.
+
+    :param result: Resultado de `run_case`.
+    :param history: Execuções anteriores.
+    :param threshold: Piora relativa tolerada (0.2 = 20%).
+    :return: Descrição de cada métrica que piorou além do limite.
+    """
+    previous = [
+        entry
+        for entry in history
+        if entry["module"] == result["module"] and entry["rows"] == result["rows"]
+    ][-BASELINE_RUNS:]
+    if not previous:
+        return []
+
+    regressions = []
+
+    baseline = median(entry["rows_per_second"] for entry in previous)
+    if result["rows_per_second"] < baseline * (1 - threshold):
+        regressions.append(
+            f"linhas/s {result['rows_per_second']:,.0f} < referência {baseline:,.0f}"
+        )
+
+    baseline = median(entry["peak_rss_mb"] for entry in previous)
+    if result["peak_rss_mb"] > baseline * (1 + threshold):
+        regressions.append(
+            f"pico de memória {result['peak_rss_mb']:.0f} MB > referência {baseline:.0f} MB"
+        )
+
+    return regressions
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Mede o desempenho dos módulos com inventários sintéticos.",
+    )
+    parser.add_argument(
+        "-m",
+        "--module",
+        action="append",
+        choices=list(MODULES),
+        help="Módulo a medir (pode ser repetido; padrão: todos).",
+    )
+    parser.add_argument(
+        "-s",
+        "--size",
+        action="append",
+        choices=list(SIZES),
+        help="Tamanho do inventário (pode ser repetido; padrão: todos).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos geradores.")
+    parser.add_argument(
+        "--history",
+        default=HISTORY_PATH,
+        help=f"Arquivo JSON com o histórico de execuções (padrão: {HISTORY_PATH}).",
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Piora relativa tolerada em linhas/s e memória (padrão: 0.2).",
+    )
+    parser.add_argument(
+        "--no-record",
+        action="store_true",
+        help="Não grava os resultados no histórico.",
+    )
+    parser.add_argument(
+        "--inline",
+        action="store_true",
+        help="Executa os casos no processo atual (o pico de memória é acumulado).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    modules = args.module or list(MODULES)
+    sizes = [SIZES[size] for size in (args.size or SIZES)]
+    cases = [(key, rows) for key in modules for rows in sizes]
+
+    history = load_history(args.history)
+    results = run_cases(cases, args.seed, isolate=not args.inline)
+
+    failed = False
+    recorded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    commit = current_commit()
+
+    for result in results:
+        regressions = find_regressions(result, history, args.threshold)
+        failed = failed or bool(regressions)
+
+        stages = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in result["stages"].items())
+        print(
+            f"[{'regressão' if regressions else 'ok'}] {result['module']} "
+            f"{result['rows']:,} linhas: {result['rows_per_second']:,.0f} linhas/s, "
+            f"{result['peak_rss_mb']:.0f} MB ({stages})"
+        )
+        for regression in regressions:
+            print(f"    {regression}")
+
+        result.update(recorded_at=recorded_at, commit=commit)
+
+    if not args.no_record:
+        save_history(args.history, history + results)
+
+    return EXIT_REGRESSION if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
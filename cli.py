@@ -0,0 +1,296 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from processing.registry import MODULES, run_module, summarize
+from processing.export import EXPORT_FORMATS, write_table
+from processing.streaming import SINKS, stream_module
+from utils.profiling import Profiler, stage
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_MISSING_FACTORS = 2
+
+
+def write_frame(df: pd.DataFrame, path: str, output_format: str):
+    """
+    Grava um DataFrame em CSV, Parquet ou XLSX, em blocos (ver
+    processing.export.write_table).
+
+    :param df: DataFrame a ser gravado.
+    :param path: Caminho sem extensão.
+    :param output_format: "csv", "parquet" ou "xlsx".
+    """
+    write_table(df, f"{path}.{output_format}", output_format)
+
+
+def output_path(path: str, output_dir: str, module: str) -> str:
+    """
+    Caminho (sem extensão) do resultado detalhado de um arquivo de entrada:
+    o caminho relativo achatado, para arquivos homônimos em pastas diferentes.
+    """
+    stem = os.path.splitext(os.path.relpath(path))[0]
+    stem = stem.replace(os.sep, "__").replace("..", "").strip("_")
+    module_dir = os.path.join(output_dir, module)
+    os.makedirs(module_dir, exist_ok=True)
+    return os.path.join(module_dir, stem)
+
+
+def process_file(
+    module: str,
+    path: str,
+    output_dir: str,
+    output_format: str,
+    chunk_size: int | None = None,
+    profile: bool = False,
+    use_cprofile: bool = False,
+) -> dict:
+    """
+    Processa um arquivo de inventário com um módulo e grava o resultado
+    detalhado. Executado nos processos do pool.
+
+    Com `chunk_size`, a planilha é lida e calculada em blocos (memória
+    limitada) e as linhas detalhadas são gravadas bloco a bloco.
+
+    Com `profile`, o relatório de desempenho por etapa (ver utils.profiling)
+    vai na chave "Desempenho" da linha retornada.
+
+    :return: Linha do resumo com tempos, totais e fatores ausentes.
+    """
+    row = {"Módulo": module, "Arquivo": path}
+    started = time.perf_counter()
+    profiler = Profiler(f"{module}:{path}", use_cprofile)
+
+    try:
+        target = output_path(path, output_dir, module)
+
+        with profiler:
+            if chunk_size:
+                sink_class = SINKS[output_format]
+                streamed = stream_module(
+                    module,
+                    path,
+                    sink=sink_class(f"{target}.{output_format}"),
+                    chunk_size=chunk_size,
+                )
+                row["Cálculo (s)"] = time.perf_counter() - started
+                rows, missing_factors, summary = (
+                    streamed.rows,
+                    streamed.missing_factors,
+                    streamed.summary,
+                )
+            else:
+                with stage("Leitura da planilha"):
+                    df = pd.read_excel(path)
+                row["Leitura (s)"] = time.perf_counter() - started
+
+                calculation_started = time.perf_counter()
+                processed, instance = run_module(module, df)
+                row["Cálculo (s)"] = time.perf_counter() - calculation_started
+
+                with stage("Gravação"):
+                    write_frame(processed, target, output_format)
+                rows, missing_factors, summary = (
+                    len(processed),
+                    instance.missing_factors,
+                    summarize(module, processed),
+                )
+
+        row["Linhas"] = rows
+        row["Fatores não encontrados"] = "; ".join(str(name) for name in missing_factors)
+        row["Status"] = "ok"
+        if not summary.empty:
+            row.update(summary.iloc[0].to_dict())
+    except Exception as e:
+        row["Status"] = "erro"
+        row["Erro"] = f"{type(e).__name__}: {e}"
+
+    row["Tempo total (s)"] = time.perf_counter() - started
+
+    if profile:
+        profiler.rows = row.get("Linhas")
+        row["Desempenho"] = profiler.report()
+
+    return row
+
+
+def expand_inputs(patterns: list[str]) -> list[str]:
+    """Expande os padrões glob em uma lista ordenada de arquivos únicos."""
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(pattern, recursive=True))
+    return sorted(path for path in files if os.path.isfile(path))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lca",
+        description="Processa planilhas de inventário em lote, sem a interface Streamlit.",
+    )
+    parser.add_argument(
+        "-m",
+        "--module",
+        action="append",
+        required=True,
+        metavar="MÓDULO[=GLOB]",
+        help=(
+            "Módulo de cálculo (pode ser repetido). Com =GLOB, o módulo processa "
+            "apenas esses arquivos; sem, processa todas as entradas posicionais. "
+            f"Opções: {', '.join(MODULES)}."
+        ),
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help='Arquivos ou padrões glob de planilhas (ex.: "entradas/**/*.xlsx").',
+    )
+    parser.add_argument(
+        "-o", "--output", default="output", help="Diretório de saída (padrão: output)."
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(EXPORT_FORMATS),
+        default="csv",
+        help="Formato dos arquivos de saída (padrão: csv).",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Número de processos (padrão: número de CPUs; 1 executa sem pool).",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Processa cada planilha em blocos desse número de linhas (memória limitada).",
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        action="store_true",
+        help="Grava o tempo e as buscas de fatores de cada etapa em desempenho.json.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        action="store_true",
+        help="Com --profile, inclui as funções mais custosas segundo o cProfile.",
+    )
+    return parser.parse_args(argv)
+
+
+def build_tasks(modules: list[str], inputs: list[str]) -> list[tuple[str, str]]:
+    """
+    Monta a lista de tarefas (módulo, arquivo) a partir das opções
+    `--module MÓDULO[=GLOB]` e das entradas posicionais.
+    """
+    tasks = []
+    for option in modules:
+        module, _, pattern = option.partition("=")
+        if module not in MODULES:
+            raise ValueError(f"Módulo desconhecido: {module}. Opções: {', '.join(MODULES)}")
+        files = expand_inputs([pattern] if pattern else inputs)
+        tasks.extend((module, path) for path in files)
+    return tasks
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    try:
+        tasks = build_tasks(args.module, args.inputs)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_FAILED
+
+    if not tasks:
+        print("Nenhum arquivo encontrado para os padrões informados.", file=sys.stderr)
+        return EXIT_FAILED
+
+    os.makedirs(args.output, exist_ok=True)
+
+    started = time.perf_counter()
+    rows = []
+
+    profiles = []
+
+    def report(row):
+        if "Desempenho" in row:
+            profiles.append(row.pop("Desempenho"))
+        rows.append(row)
+        status = row["Status"]
+        detail = row.get("Erro") or f"{row['Linhas']} linhas"
+        print(
+            f"[{status}] {row['Módulo']} {row['Arquivo']} "
+            f"{row['Tempo total (s)']:.2f}s ({detail})"
+        )
+
+    if args.workers <= 1:
+        for module, path in tasks:
+            report(
+                process_file(
+                    module,
+                    path,
+                    args.output,
+                    args.format,
+                    args.chunk_size,
+                    args.profile,
+                    args.cprofile,
+                )
+            )
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [
+                executor.submit(
+                    process_file,
+                    module,
+                    path,
+                    args.output,
+                    args.format,
+                    args.chunk_size,
+                    args.profile,
+                    args.cprofile,
+                )
+                for module, path in tasks
+            ]
+            for future in as_completed(futures):
+                report(future.result())
+
+    summary = pd.DataFrame(rows).sort_values(["Módulo", "Arquivo"])
+    write_frame(summary, os.path.join(args.output, "resumo"), args.format)
+
+    if profiles:
+        with open(os.path.join(args.output, "desempenho.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                sorted(profiles, key=lambda profile: profile["label"]),
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    failed = summary["Status"] != "ok"
+    missing = summary.get("Fatores não encontrados", pd.Series(dtype=str)).fillna("") != ""
+
+    print(
+        f"{len(summary)} tarefas em {time.perf_counter() - started:.2f}s: "
+        f"{int(failed.sum())} com erro, {int(missing.sum())} com fatores não encontrados."
+    )
+
+    if failed.any():
+        return EXIT_FAILED
+    if missing.any():
+        return EXIT_MISSING_FACTORS
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,36 @@
 import streamlit as st
 
-from processing.forestry.fuels import test_forestry_fuels
-from processing.forestry.fertilizers import test_forestry_fertilizers
-from processing.forestry.energy import test_forestry_energy
-from processing.carbonization import test_carbonization
-from processing.industrial import test_industrial
-from processing.quartz_mining import test_quartz_mining
+from processing.registry import MODULES
 
 st.set_page_config(
     layout="wide",
 )
 
-st.title("eACV - Siderurgia")
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
-    [
-        "Florestal (Combustíveis)",
-        "Florestal (Fertilizantes)",
-        "Florestal (Energia)",
-        "Carbonização",
-        "Industrial",
-        "Mineração de Quartzo",
-    ]
-)
 
-with tab1:
-    test_forestry_fuels()
+def module_page(spec):
+    """
+    Página de um módulo. O módulo só é importado e executado quando a página
+    está ativa; os demais mantêm o arquivo e o último resultado na sessão.
+    """
+
+    def page():
+        st.title("eACV - Siderurgia")
+        st.header(spec.label)
+        spec.load_page()()
 
-with tab2:
-    test_forestry_fertilizers()
+    return st.Page(page, title=spec.label, url_path=spec.key)
 
-with tab3:
-    test_forestry_energy()
 
-with tab4:
-    test_carbonization()
+def inventory_page():
+    from processing.inventory import test_inventory
 
-with tab5:
-    test_industrial()
+    st.title("eACV - Siderurgia")
+    st.header("Inventário completo")
+    test_inventory()
 
-with tab6:
-    test_quartz_mining()
+
+navigation = st.navigation(
+    [module_page(spec) for spec in MODULES.values()]
+    + [st.Page(inventory_page, title="Inventário completo", url_path="inventario")]
+)
+navigation.run()
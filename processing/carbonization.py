@@ -2,80 +2,126 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 
+from utils.factor_repository import get_repository
+from utils.gwp import get_gwp, get_gwp_table
+from utils.profiling import timed
+from processing.ui import run_cached, show_results, upload_file
+
+
+# Parâmetros de carbonization.xlsx: nome -> (parameter, coluna auxiliar)
+CARBONIZATION_PARAMETERS = {
+    "ch4_slope": ("Média", "a"),
+    "ch4_intercept": ("Média", "b"),
+}
+
+# Relação estequiométrica entre CO2 biogênico e CH4 emitidos na carbonização
+BIOGENIC_CO2_CH4_RATIO = (2.21 * 44) / (1.07 * 16)
+
+_parameters_cache = {}
+
+
+def get_carbonization_parameters() -> dict:
+    """
+    Obtém os parâmetros da carbonização por nome, a partir de
+    carbonization.xlsx (coeficientes médios "a" e "b" da equação
+    y = ax + b) e da tabela de GWP.
+
+    O registro é montado uma vez por versão das planilhas.
+    """
+    table = get_repository().table("data/lca/carbonization.xlsx")
+    gwp_table = get_gwp_table()
+
+    cached = _parameters_cache.get("parameters")
+    if cached is not None and cached[0] is table and cached[1] is gwp_table:
+        return cached[2]
+
+    factors = table.frame
+    keys = list(zip(factors["parameter"], factors["Unnamed: 1"]))
+
+    parameters = {}
+    for name, key in CARBONIZATION_PARAMETERS.items():
+        if key not in keys:
+            raise KeyError(f"Parâmetro de carbonização não encontrado: {key}")
+        parameters[name] = float(factors["value"].values[keys.index(key)])
+
+    parameters["gwp_ch4"] = get_gwp("CH4")
+
+    _parameters_cache["parameters"] = (table, gwp_table, parameters)
+
+    return parameters
+
 
 class Carbonization:
     def __init__(self, df: pd.DataFrame):
         self.df = df
-        self.carbonization_factors = pd.read_excel("data/lca/carbonization.xlsx")
-        self.gwp_factors = pd.read_excel("data/lca/gwp_kyoto.xlsx")
+        self.parameters = get_carbonization_parameters()
+        self.missing_factors = []
 
-    def calculate_emission_ch4(self, row: pd.Series) -> float:
+    @timed
+    def calculate_emission_ch4(
+        self, yield_: pd.Series, production: pd.Series
+    ) -> pd.Series:
         return (
-            self.carbonization_factors.iloc[8]["value"]
-            * row["Rendimento Gravimétrico (%)"]
-            + self.carbonization_factors.iloc[9]["value"]
-        ) * row["Produção de Carvão Vegetal"]
+            self.parameters["ch4_slope"] * yield_ + self.parameters["ch4_intercept"]
+        ) * production
 
-    def calculate_emission_biogenic_co2(self, row: pd.Series) -> float:
-        return ((2.21 * 44) / (1.07 * 16)) * row["Emissões de CH4 (tCO2e)"]
+    @timed
+    def calculate_emission_biogenic_co2(self, emission_ch4: pd.Series) -> pd.Series:
+        return BIOGENIC_CO2_CH4_RATIO * emission_ch4
 
-    def calculate_total_emission_biogenic_co2(self, row: pd.Series) -> float:
+    @timed
+    def calculate_total_emission_biogenic_co2(
+        self, emission_ch4: pd.Series, emission_biogenic_co2: pd.Series
+    ) -> pd.Series:
         return (
-            row["Emissões de CH4 (tCO2e)"] * self.gwp_factors.iloc[1]["ar6"] / 1000
-            + row["Emissões CO2 - biogênico (kgCO2)"] / 1000
+            emission_ch4 * self.parameters["gwp_ch4"] / 1000
+            + emission_biogenic_co2 / 1000
         )
 
     def process(self):
-        self.df["Produção de Carvão Vegetal"].fillna(0)
-        self.df["Rendimento Gravimétrico (%)"].fillna(0)
+        self.df["Produção de Carvão Vegetal"] = pd.to_numeric(
+            self.df["Produção de Carvão Vegetal"]
+        ).fillna(0)
+
+        production = self.df["Produção de Carvão Vegetal"]
+        yield_ = pd.to_numeric(self.df["Rendimento Gravimétrico (%)"])
 
-        self.df["Madeira"] = np.divide(
-            self.df["Produção de Carvão Vegetal"],
-            self.df["Rendimento Gravimétrico (%)"],
+        # Linhas sem rendimento ou com rendimento zero (ex.: resíduos como
+        # moinha) não geram madeira nem emissões de carbonização: a equação
+        # y = ax + b daria CH4 = b x produção e a madeira seria infinita
+        has_yield = yield_.notna() & (yield_ > 0)
+
+        self.df["Madeira"] = np.where(
+            has_yield, production / yield_.where(has_yield, 1), 0.0
         )
 
-        self.df["Emissões de CH4 (tCO2e)"] = self.df.apply(
-            self.calculate_emission_ch4, axis=1
+        self.df["Emissões de CH4 (tCO2e)"] = np.where(
+            has_yield, self.calculate_emission_ch4(yield_, production), 0.0
         )
 
-        self.df["Emissões CO2 - biogênico (kgCO2)"] = self.df.apply(
-            self.calculate_emission_biogenic_co2, axis=1
+        self.df["Emissões CO2 - biogênico (kgCO2)"] = (
+            self.calculate_emission_biogenic_co2(self.df["Emissões de CH4 (tCO2e)"])
         )
 
         # TODO: Na verdade seria Emissões totais - tCO2e ao invés de emissões biogênicas
         # Esse caso de "Emissões biogênicas" só se aplica a RIMA
-        self.df["Emissões Biogênicas Totais (tCO2e)"] = self.df.apply(
-            self.calculate_total_emission_biogenic_co2, axis=1
+        self.df["Emissões Biogênicas Totais (tCO2e)"] = (
+            self.calculate_total_emission_biogenic_co2(
+                self.df["Emissões de CH4 (tCO2e)"],
+                self.df["Emissões CO2 - biogênico (kgCO2)"],
+            )
         )
 
         return self.df
 
 
 def test_carbonization():
-    file = st.file_uploader("Escolha um arquivo", type=["xlsx"], key="carbonization")
+    file = upload_file("carbonization")
     if file is None:
         return
 
-    carbonization = Carbonization(
-        pd.read_excel(file)
-    ).process()
-
-    result = pd.DataFrame(
-        {
-            "Madeira": [carbonization["Madeira"].sum()],
-            "Emissões totais tCO2e": [carbonization["Emissões Biogênicas Totais (tCO2e)"].sum()],
-        }
-    )
-
-    result["Emissões de CH4 (tCO2e)"] = carbonization[
-        "Emissões de CH4 (tCO2e)"
-    ].sum()
-
-    result["Emissões CO2 - biogênico (kgCO2)"] = carbonization[
-        "Emissões CO2 - biogênico (kgCO2)"
-    ].sum()
+    carbonization, _ = run_cached("carbonization", file)
 
     st.dataframe(carbonization, hide_index=True)
 
-    st.title("Resultados")
-    st.dataframe(result, hide_index=True, use_container_width=True)
+    show_results("carbonization", carbonization)
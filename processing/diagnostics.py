@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+from utils.units import convert, get_unit_registry, lookup_densities, parse_factor_basis
+
+DIAGNOSTIC_COLUMNS = ["Linha", "Etapa", "Mensagem"]
+MISSING_COLUMNS = ["Linha", "Fator"]
+
+
+def empty_diagnostics() -> pd.DataFrame:
+    """Tabela de diagnósticos vazia (ver DiagnosticsMixin)."""
+    return pd.DataFrame(columns=DIAGNOSTIC_COLUMNS)
+
+
+def empty_missing_rows() -> pd.DataFrame:
+    """Tabela de fatores ausentes por linha vazia (ver missing_rows)."""
+    return pd.DataFrame(columns=MISSING_COLUMNS)
+
+
+def missing_rows(names: pd.Series, mask, rows: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Fator não encontrado de cada linha, guardado pelos módulos em
+    `missing_rows` (colunas MISSING_COLUMNS, "Linha" é o índice de `df`) ao
+    lado de `missing_factors`, para que um recálculo parcial saiba quais
+    fatores ainda faltam nas linhas mantidas (ver processing.incremental).
+
+    :param names: Nome do fator de cada linha, com o índice de `df` (pode
+        ser um nome composto, ex.: "Grid 2023").
+    :param mask: Máscara booleana das linhas sem fator.
+    :param rows: Fatores ausentes já registrados, aos quais as novas linhas
+        são acrescentadas.
+    :return: Tabela de fatores ausentes por linha.
+    """
+    names = names[np.asarray(mask, dtype=bool)]
+    names = names[names.notna()]
+    entries = pd.DataFrame({"Linha": names.index, "Fator": names.to_numpy()})
+
+    if rows is None or rows.empty:
+        return entries
+    if entries.empty:
+        return rows
+    return pd.concat([rows, entries], ignore_index=True)
+
+
+class DiagnosticsMixin:
+    """
+    Diagnósticos por linha das classes dos módulos, guardados em
+    `self.diagnostics` (colunas DIAGNOSTIC_COLUMNS, "Linha" é o índice de
+    `self.df`), e a conversão das quantidades para a unidade dos fatores.
+    """
+
+    def add_diagnostics(self, mask, stage: str, message: str):
+        """
+        Registra uma mensagem de diagnóstico para cada linha em `mask`.
+
+        :param mask: Máscara booleana das linhas com problema.
+        :param stage: Etapa do cálculo em que o problema ocorreu.
+        :param message: Descrição do problema.
+        """
+        rows = self.df.index[np.asarray(mask)]
+        if len(rows) == 0:
+            return
+
+        entries = pd.DataFrame({"Linha": rows, "Etapa": stage, "Mensagem": message})
+        self.diagnostics = (
+            entries
+            if self.diagnostics.empty
+            else pd.concat([self.diagnostics, entries], ignore_index=True)
+        )
+
+    def convert_quantities(
+        self, name_column: str, input_unit: str, found=None
+    ) -> np.ndarray:
+        """
+        Converte a coluna "Quantidade" para a unidade a que cada fator de
+        emissão se refere ("Unidade - Fator"; ex.: MWh -> kWh, t -> kg,
+        L -> kg pela densidade de `name_column`), registrando as linhas com
+        unidade do fator não reconhecida ou incompatível com a quantidade.
+
+        Linhas cujo fator não foi encontrado não são convertidas: mantêm a
+        quantidade informada, aplicada aos valores padrão dos fatores (ex.:
+        0), e são registradas como "Fator de emissão não encontrado".
+
+        :param name_column: Coluna com o nome no estudo (para a densidade).
+        :param input_unit: Unidade das quantidades sem unidade informada.
+        :param found: Máscara das linhas com fator encontrado (padrão: todas).
+        :return: Quantidades na unidade do fator (NaN se não convertidas).
+        """
+        found = (
+            np.ones(len(self.df), dtype=bool)
+            if found is None
+            else np.asarray(found, dtype=bool)
+        )
+        self.add_diagnostics(~found, "Fatores de emissão", "Fator de emissão não encontrado")
+
+        factor_units = self.df["Unidade - Fator"].where(found)
+        quantity, incompatible = convert(
+            self.df["Quantidade"],
+            self.df["Unidade"].fillna(input_unit),
+            factor_units,
+            lookup_densities(self.df[name_column]),
+            to_parser=parse_factor_basis,
+        )
+
+        informed = factor_units.notna().to_numpy()
+        unknown = informed & (get_unit_registry().encode(factor_units, parse_factor_basis) < 0)
+        self.add_diagnostics(
+            unknown, "Unidades", "Unidade do fator de emissão não reconhecida"
+        )
+        self.add_diagnostics(
+            incompatible & informed & ~unknown,
+            "Unidades",
+            "Unidade da quantidade incompatível com a do fator de emissão",
+        )
+        return np.where(found, quantity, self.df["Quantidade"].to_numpy(dtype=float))
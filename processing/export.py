@@ -0,0 +1,156 @@
+import io
+import os
+import re
+import zipfile
+
+import pandas as pd
+
+from processing.streaming import SINKS, XlsxSink
+
+# Linhas gravadas por vez: cada bloco é uma fatia do resultado, não uma cópia
+EXPORT_CHUNK_ROWS = 50_000
+
+# Diretório do servidor sob o qual a interface pode gravar exportações
+EXPORT_ROOT = os.environ.get("LCA_EXPORT_ROOT", "output")
+
+EXPORT_FORMATS = {
+    "xlsx": "Excel (.xlsx)",
+    "parquet": "Parquet",
+    "csv": "CSV",
+}
+
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+    "zip": "application/zip",
+}
+
+
+def file_stem(name: str) -> str:
+    """Nome de tabela como nome de arquivo (ex.: "Totais por escopo" -> "totais_por_escopo")."""
+    return re.sub(r"[^\w]+", "_", name.strip().lower()).strip("_") or "tabela"
+
+
+def write_chunks(sink, df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """
+    Envia um DataFrame a um destino (ver processing.streaming.SINKS) em
+    fatias de `chunk_rows` linhas. Inclui o cabeçalho mesmo sem linhas.
+    """
+    for start in range(0, max(len(df), 1), chunk_rows):
+        sink.write(df.iloc[start : start + chunk_rows])
+
+
+def write_table(df: pd.DataFrame, target, output_format: str, sheet_name="Resultados"):
+    """
+    Grava uma tabela em CSV, Parquet ou XLSX, bloco a bloco.
+
+    :param df: Tabela a ser gravada.
+    :param target: Caminho ou objeto binário aberto.
+    :param output_format: Chave de EXPORT_FORMATS.
+    :param sheet_name: Aba, para XLSX.
+    """
+    if output_format == "xlsx":
+        sink = XlsxSink(target, sheet_name)
+    elif output_format == "parquet":
+        import pyarrow as pa
+
+        # schema da tabela inteira: os tipos das colunas de texto são
+        # inferidos percorrendo os valores, sem converter a tabela
+        sink = SINKS["parquet"](target, pa.Schema.from_pandas(df, preserve_index=False))
+    else:
+        sink = SINKS[output_format](target)
+
+    try:
+        write_chunks(sink, df)
+    finally:
+        sink.close()
+
+
+def export_tables(tables: dict, target, output_format: str):
+    """
+    Exporta várias tabelas em um único arquivo: em XLSX, uma aba por tabela
+    (tabelas maiores que o limite do Excel continuam em outras abas); em CSV
+    ou Parquet, um ZIP com um arquivo por tabela.
+
+    As tabelas são gravadas em blocos diretamente no destino, sem montar
+    cópias dos DataFrames.
+
+    :param tables: Nome -> DataFrame, na ordem de gravação.
+    :param target: Caminho ou objeto binário aberto.
+    :param output_format: Chave de EXPORT_FORMATS.
+    """
+    if output_format == "xlsx":
+        sink = XlsxSink(target)
+        try:
+            for name, df in tables.items():
+                sink.start_sheet(name)
+                write_chunks(sink, df)
+        finally:
+            sink.close()
+        return
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, df in tables.items():
+            with archive.open(f"{file_stem(name)}.{output_format}", "w") as member:
+                write_table(df, member, output_format)
+
+
+def resolve_export_directory(directory: str, root: str | None = None) -> str:
+    """
+    Caminho de um diretório de exportação informado na interface, relativo
+    a `root`.
+
+    :param directory: Diretório informado pelo usuário.
+    :param root: Diretório raiz permitido (padrão: EXPORT_ROOT).
+    :return: Caminho absoluto, com links simbólicos resolvidos.
+    :raises ValueError: O diretório fica fora de `root` (ex.: "../x" ou um
+        caminho absoluto de outro lugar).
+    """
+    root = os.path.realpath(root or EXPORT_ROOT)
+    path = os.path.realpath(os.path.join(root, directory))
+
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"O diretório de exportação deve ficar dentro de {root}")
+
+    return path
+
+
+def export_to_directory(tables: dict, directory: str, output_format: str) -> list[str]:
+    """
+    Grava cada tabela em um arquivo `<diretório>/<nome>.<formato>`.
+
+    :param tables: Nome -> DataFrame.
+    :param directory: Diretório de saída (criado se necessário).
+    :param output_format: Chave de EXPORT_FORMATS.
+    :return: Caminhos gravados.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    for name, df in tables.items():
+        path = os.path.join(directory, f"{file_stem(name)}.{output_format}")
+        write_table(df, path, output_format, sheet_name=name)
+        paths.append(path)
+
+    return paths
+
+
+def export_download(tables: dict, output_format: str) -> tuple[io.BytesIO, str, str]:
+    """
+    Conteúdo para um botão de download: `export_tables` em memória, ou o
+    próprio arquivo quando há uma única tabela em CSV/Parquet.
+
+    :return: Tupla (arquivo em memória, extensão, tipo MIME).
+    """
+    buffer = io.BytesIO()
+
+    if output_format != "xlsx" and len(tables) == 1:
+        write_table(next(iter(tables.values())), buffer, output_format)
+        extension = output_format
+    else:
+        export_tables(tables, buffer, output_format)
+        extension = "xlsx" if output_format == "xlsx" else "zip"
+
+    buffer.seek(0)
+    return buffer, extension, MIME_TYPES[extension]
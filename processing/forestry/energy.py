@@ -1,48 +1,56 @@
-from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 import streamlit as st
 
-from utils.emission_factors import get_emission_factor
+from utils.emission_factors import get_emission_factors
+from utils.factor_repository import get_repository
+from utils.names import normalize_name, normalize_names
+from utils.profiling import count_lookups, timed
+from processing.diagnostics import empty_missing_rows, missing_rows
+from processing.ui import run_cached, show_results, upload_file
 
 
-@dataclass
-class GridFactors:
-    """Grid emission factors data structure"""
+class EmissionCalculator:
+    def calculate_grid_emission(self, consumption, factor):
+        return consumption * (factor / 1000)
 
-    year: int
-    january: float
-    february: float
-    march: float
-    april: float
-    may: float
-    june: float
-    july: float
-    august: float
-    september: float
-    october: float
-    november: float
-    december: float
-    avg_annual_factor_tco2_mwh: float
-    avg_annual_factor_tco2_gj: float
-    notes: str
+    def calculate_other_emission(self, consumption, gas_emission_factor):
+        return consumption * (gas_emission_factor / 1000)
 
 
-class EmissionCalculator:
-    def calculate_grid_emission(self, consumption: float, factor: float) -> float:
-        return consumption * (factor / 1000)
+# Fonte de energia que usa os fatores mensais do SIN
+GRID_SOURCE = normalize_name("Grid")
 
-    def calculate_other_emission(
-        self, consumption: float, source: str, gas: str
-    ) -> float:
-        mapping = {
-            "co2": "fossil_emission_factor",
-            "co2_biogenic": "biogenic_emission_factor",
-        }
+_grid_matrix_cache = {}
 
-        gas_emission_factor = get_emission_factor(source, mapping[gas])
 
-        return consumption * (gas_emission_factor / 1000)
+def _year(year: float) -> int | float:
+    """Ano como inteiro, ou como informado se não for inteiro (ex.: 2023.7)."""
+    return int(year) if np.isfinite(year) and year == np.floor(year) else float(year)
+
+
+def get_grid_factor_matrix(grid_factors: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reorganiza a tabela de fatores do grid em uma matriz anos x 12 meses
+    (na ordem de ForestryEnergy.MONTH_MAPPER).
+
+    A matriz é montada uma vez por versão da planilha de fatores.
+
+    :param grid_factors: Tabela de grid_factors.xlsx.
+    :return: Tupla (anos em ordem crescente, fatores tCO2/MWh anos x meses).
+    """
+    cached = _grid_matrix_cache.get("matrix")
+    if cached is not None and cached[0] is grid_factors:
+        return cached[1]
+
+    table = grid_factors.drop_duplicates("year", keep="first").sort_values("year")
+    matrix = (
+        table["year"].to_numpy(dtype=np.int64),
+        table[list(ForestryEnergy.MONTH_MAPPER.values())].to_numpy(dtype=float),
+    )
+    _grid_matrix_cache["matrix"] = (grid_factors, matrix)
+
+    return matrix
 
 
 class ForestryEnergy:
@@ -63,100 +71,139 @@ class ForestryEnergy:
 
     def __init__(self, df: pd.DataFrame):
         self.df = df
-        self.grid_factors = pd.read_excel("data/lca/factors/grid_factors.xlsx")
+        self.grid_factors = get_repository().frame("data/lca/factors/grid_factors.xlsx")
         self.calculator = EmissionCalculator()
+        self.missing_factors = []
+        self.missing_rows = empty_missing_rows()
+        self.missing_years = []
+
+    @timed
+    def get_source_factors(self, sources: pd.Series) -> pd.DataFrame:
+        """
+        Obtém os fatores fóssil e biogênico de cada fonte de energia que não é
+        "Grid", buscando cada fonte distinta uma única vez.
+
+        :param sources: Coluna "Fonte de Energia".
+        :return: DataFrame alinhado a `sources` (NaN nas linhas "Grid").
+        """
+        other = sources[normalize_names(sources) != GRID_SOURCE]
+        factors = get_emission_factors(
+            other, ["fossil_emission_factor", "biogenic_emission_factor"]
+        )
+        self.missing_factors = list(factors.attrs["missing"])
+        self.missing_rows = missing_rows(other, other.isin(self.missing_factors))
+        return factors.reindex(sources.index)
+
+    @timed
+    def get_grid_vectors(self, years) -> np.ndarray:
+        """
+        Obtém o vetor mensal de fatores do SIN do ano de cada linha, com uma
+        única indexação da matriz anos x meses (ver `get_grid_factor_matrix`).
+
+        Anos sem fatores, não inteiros ou não informados resultam em NaN e
+        são registrados de uma vez em `missing_factors`.
+
+        :param years: Ano de cada linha (Series com o índice de `df`, usado
+            em `missing_rows`).
+        :return: Matriz linhas x 12 meses de fatores tCO2/MWh.
+        """
+        available, matrix = get_grid_factor_matrix(self.grid_factors)
+        years = pd.to_numeric(pd.Series(years), errors="coerce")
+        index, years = years.index, years.to_numpy(dtype=float)
+        count_lookups(len(np.unique(years)))
+
+        known = ~np.isnan(years)
+        # só anos inteiros e finitos são buscados (2023.7 não é 2023)
+        integer = np.isfinite(years) & (years == np.floor(years))
+        positions = np.searchsorted(available, years[integer])
+        positions = np.minimum(positions, len(available) - 1)
+        found = np.zeros(len(years), dtype=bool)
+        found[integer] = available[positions] == years[integer]
+
+        rows = np.full(len(years), len(available))
+        rows[found] = positions[found[integer]]
+        vectors = np.vstack([matrix, np.full(matrix.shape[1], np.nan)])[rows]
+
+        self.missing_years = [_year(year) for year in np.unique(years[known & ~found])]
+        self.missing_factors += [f"Grid {year}" for year in self.missing_years]
+        if (~known).any():
+            self.missing_factors.append("Grid (ano não informado)")
+
+        names = pd.Series("Grid (ano não informado)", index=index, dtype=object)
+        names[known & ~found] = [f"Grid {_year(year)}" for year in years[known & ~found]]
+        self.missing_rows = missing_rows(names, ~found, self.missing_rows)
+
+        return vectors
+
+    @timed
+    def calculate_monthly_emissions(self, years=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula as emissões mensais fósseis e biogênicas como matrizes
+        (linhas x 12 meses).
+
+        Linhas "Grid" usam o vetor mensal de fatores do SIN do seu próprio
+        ano, o que permite processar históricos de vários anos de uma vez;
+        as demais usam os fatores da sua fonte de energia em todos os meses.
+
+        :param years: Ano dos fatores de grid: um valor para todas as linhas
+            ou um por linha (padrão: a coluna "Ano").
+        :return: Tupla (emissões fósseis tCO2, emissões biogênicas tCO2e).
+        """
+        if years is None:
+            years = self.df["Ano"]
+        years = np.broadcast_to(np.asarray(years, dtype=object), (len(self.df),))
+
+        consumption = self.df[list(self.MONTH_MAPPER)].to_numpy(dtype=float)
+        is_grid = normalize_names(self.df["Fonte de Energia"]) == GRID_SOURCE
+        source_factors = self.get_source_factors(self.df["Fonte de Energia"])
+
+        # só as linhas "Grid" dependem do ano
+        grid_vectors = np.full(consumption.shape, np.nan)
+        grid_vectors[is_grid] = self.get_grid_vectors(
+            pd.Series(years[is_grid], index=self.df.index[is_grid])
+        )
 
-    def get_grid_factors(self, year: int) -> GridFactors:
-        factors = self.grid_factors[self.grid_factors["year"] == year]
-        return GridFactors(**factors.iloc[0].to_dict())
-
-    def calculate_monthly_emissions(
-        self, row: pd.Series, month: str, factor: float
-    ) -> float:
-        consumption = row[month]
-        source = row["Fonte de Energia"]
-
-        if source == "Grid":
-            return (self.calculator.calculate_grid_emission(consumption, factor), 0)
-        return (
-            self.calculator.calculate_other_emission(consumption, source, "co2"),
+        is_grid = is_grid[:, None]
+        fossil = np.where(
+            is_grid,
+            self.calculator.calculate_grid_emission(consumption, grid_vectors),
             self.calculator.calculate_other_emission(
-                consumption, source, "co2_biogenic"
+                consumption,
+                source_factors["fossil_emission_factor"].to_numpy(dtype=float)[:, None],
+            ),
+        )
+        biogenic = np.where(
+            is_grid,
+            0,
+            self.calculator.calculate_other_emission(
+                consumption,
+                source_factors["biogenic_emission_factor"].to_numpy(dtype=float)[:, None],
             ),
         )
 
-    def calculate_annual_emissions(self):
-        return self.df[
-            [
-                "Emissões tCO2 - Janeiro",
-                "Emissões tCO2 - Fevereiro",
-                "Emissões tCO2 - Março",
-                "Emissões tCO2 - Abril",
-                "Emissões tCO2 - Maio",
-                "Emissões tCO2 - Junho",
-                "Emissões tCO2 - Julho",
-                "Emissões tCO2 - Agosto",
-                "Emissões tCO2 - Setembro",
-                "Emissões tCO2 - Outubro",
-                "Emissões tCO2 - Novembro",
-                "Emissões tCO2 - Dezembro",
-            ]
-        ].sum(axis=1)
+        return fossil, biogenic
 
     def process(self) -> pd.DataFrame:
-        year = self.df["Ano"].values[0]
-        grid_factors = self.get_grid_factors(year)
-
-        for month, grid_month in self.MONTH_MAPPER.items():
-            factor = getattr(grid_factors, grid_month)
-            self.df[month.replace("Consumo", "Emissões tCO2")] = self.df.apply(
-                lambda row: self.calculate_monthly_emissions(row, month, factor)[0],
-                axis=1,
-            )
-            self.df[month.replace("Consumo", "Emissões Biogênicas tCO2e")] = (
-                self.df.apply(
-                    lambda row: self.calculate_monthly_emissions(row, month, factor)[1],
-                    axis=1,
-                )
-            )
-
-        self.df["Emissões totais (tCO2e)"] = self.calculate_annual_emissions()
+        fossil, biogenic = self.calculate_monthly_emissions()
+
+        for position, month in enumerate(self.MONTH_MAPPER):
+            self.df[month.replace("Consumo", "Emissões tCO2")] = fossil[:, position]
+            self.df[month.replace("Consumo", "Emissões Biogênicas tCO2e")] = biogenic[
+                :, position
+            ]
+
+        self.df["Emissões totais (tCO2e)"] = np.nansum(fossil, axis=1)
 
         return self.df
 
 
 def test_forestry_energy():
-    file = st.file_uploader("Escolha um arquivo", type=["xlsx"], key="energy")
+    file = upload_file("forestry_energy")
     if file is None:
         return
 
-    df = pd.read_excel(file)
-    forestry_energy = ForestryEnergy(df)
-    processed = forestry_energy.process()
-
-    result = pd.DataFrame({
-        "Consumo": [np.sum(
-            processed[
-                [
-                    "Consumo - Janeiro",
-                    "Consumo - Fevereiro",
-                    "Consumo - Março",
-                    "Consumo - Abril",
-                    "Consumo - Maio",
-                    "Consumo - Junho",
-                    "Consumo - Julho",
-                    "Consumo - Agosto",
-                    "Consumo - Setembro",
-                    "Consumo - Outubro",
-                    "Consumo - Novembro",
-                    "Consumo - Dezembro",
-                ]
-            ].sum(axis=1)
-        )],
-        "Emissões totais (tCO2e)": [processed["Emissões totais (tCO2e)"].sum()],
-    })
+    processed, _ = run_cached("forestry_energy", file)
 
     st.dataframe(processed, hide_index=True)
 
-    st.title('Resultados')
-    st.dataframe(result, hide_index=True, use_container_width=True)
\ No newline at end of file
+    show_results("forestry_energy", processed)
\ No newline at end of file
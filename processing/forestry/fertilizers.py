@@ -2,176 +2,219 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 
-
-class ForestryFertilizers:
+from utils.emission_factors import get_emission_factors
+from utils.factor_repository import get_repository
+from utils.gwp import get_gwp
+from utils.profiling import timed
+from utils.units import convert
+from processing.diagnostics import (
+    DiagnosticsMixin,
+    empty_diagnostics,
+    empty_missing_rows,
+    missing_rows,
+)
+from processing.ui import run_cached, show_results, upload_file
+
+
+LIMESTONE_TYPES = ["Calcítico", "Dolomítico"]
+
+CARBONATE_EQUIVALENCE = "Equivalência em carbonato\n%E CaCO3 = % CaO x 1,79 + % MgO x 2,48"
+
+# Parâmetros de fertilizers.xlsx: nome -> (parameter, unit)
+FERTILIZER_PARAMETERS = {
+    "n2o_factor": ("Fator de emissões N2O por N aplicado", "kg N2O / kg N aplicado"),
+    "calcite_co2_factor": (
+        "Fator de emissões CO2 por aplicação calcita",
+        "kg CO2 / kg calcita aplicado",
+    ),
+    "dolomite_co2_factor": (
+        "Fator de emissões CO2 por aplicação dolomita",
+        "kg CO2 / kg dolomita aplicado",
+    ),
+    "cao_factor": (CARBONATE_EQUIVALENCE, "Constante x %CaO"),
+    "mgo_factor": (CARBONATE_EQUIVALENCE, "Constante x %MgO"),
+}
+
+# Unidade das quantidades utilizadas sem unidade informada
+INPUT_UNIT = "t"
+
+
+def get_fertilizer_parameters(factors: pd.DataFrame) -> dict:
+    """
+    Obtém os parâmetros dos fertilizantes por nome (ver
+    FERTILIZER_PARAMETERS), buscando cada um pelo par (parameter, unit) de
+    fertilizers.xlsx, e não pela posição da linha.
+
+    :param factors: Tabela de fertilizers.xlsx.
+    :return: Dicionário nome -> valor.
+    """
+    keys = list(zip(factors["parameter"], factors["unit"]))
+
+    parameters = {}
+    for name, key in FERTILIZER_PARAMETERS.items():
+        if key not in keys:
+            raise KeyError(f"Parâmetro de fertilizantes não encontrado: {key}")
+        parameters[name] = float(factors["value"].values[keys.index(key)])
+
+    return parameters
+
+
+class ForestryFertilizers(DiagnosticsMixin):
     def __init__(self, df: pd.DataFrame):
         self.df = df
-        self.factors_fertilizers = pd.read_excel("data/lca/factors/fertilizers.xlsx")
-        self.gwp_kyoto = pd.read_excel("data/lca/gwp_kyoto.xlsx")
-        self.emission_factors = pd.read_excel("data/lca/emission_factors.xlsx")
-
-    def get_emission_factor(factor_name: str, factor_column: str):
+        self.factors_fertilizers = get_repository().frame("data/lca/factors/fertilizers.xlsx")
+        self.diagnostics = empty_diagnostics()
+        self.missing_factors = []
+        self.missing_rows = empty_missing_rows()
+
+        parameters = get_fertilizer_parameters(self.factors_fertilizers)
+        self.n2o_factor = parameters["n2o_factor"]
+        self.calcite_co2_factor = parameters["calcite_co2_factor"]
+        self.dolomite_co2_factor = parameters["dolomite_co2_factor"]
+        self.cao_factor = parameters["cao_factor"]
+        self.mgo_factor = parameters["mgo_factor"]
+        self.gwp_n2o = get_gwp("N2O")
+
+    def numeric_column(self, column: str, stage: str) -> pd.Series:
         """
-        Obtém um fator de emissão com base no nome e tipo.
+        Obtém uma coluna numérica, registrando valores não numéricos.
         """
+        values = pd.to_numeric(self.df[column], errors="coerce")
+        self.add_diagnostics(
+            values.isna() & self.df[column].notna(),
+            stage,
+            f"Valor não numérico em '{column}'",
+        )
+        return values
 
-        factor_name = factor_name.lower()
-        self.emission_factors["name"] = self.emission_factors["name"].str.lower()
-
-        factor = self.emission_factors[self.emission_factors["name"] == factor_name]
-
-        if factor.empty and factor_column in factor.columns:
-            # raise ValueError(f"Fator de emissão não encontrado para {factor_name}")
-            print(f"Fator de emissão não encontrado para {factor_name}")
-            return None
-
-        return factor[factor_column].values[0]
-
+    @timed
     def calculate_base_quantity(self):
-        """Convert base quantity to kg"""
-        try:
-            return np.multiply(self.df["Quantidade utilizada"], 1000)
-        except Exception as e:
-            print("Erro ao calcular a quantidade base")
-            print(e)
-
-            return None
+        """Convert base quantity to kg (quantities without unit are in t)"""
+        quantity = self.numeric_column("Quantidade utilizada", "Quantidade base")
+        units = (
+            self.df["Unidade"].fillna(INPUT_UNIT)
+            if "Unidade" in self.df.columns
+            else INPUT_UNIT
+        )
+        converted, incompatible = convert(quantity, units, "kg")
+        self.add_diagnostics(
+            pd.Series(incompatible & quantity.notna().to_numpy(), index=self.df.index),
+            "Quantidade base",
+            "Unidade da quantidade utilizada não é de massa",
+        )
+        return pd.Series(converted, index=self.df.index)
 
-    def calculate_calcium_carbonate_equivalent(self, row):
+    @timed
+    def calculate_calcium_carbonate_equivalent(self):
         """Calculate calcium carbonate equivalent applied"""
-        try:
-            cao_factor = row["Teor de CaO (%)"] * self.factors_fertilizers.iloc[14]["value"]
-            mgo_factor = row["Teor de MgO (%)"] * self.factors_fertilizers.iloc[15]["value"]
-            return (cao_factor + mgo_factor) * row["Quantidade para cálculo (kg)"]
-        except:
-            return None
-
-    def calculate_nitrogen_applied(self, row):
+        cao = self.numeric_column("Teor de CaO (%)", "Equivalência em CaCO3")
+        mgo = self.numeric_column("Teor de MgO (%)", "Equivalência em CaCO3")
+        return (cao * self.cao_factor + mgo * self.mgo_factor) * self.df[
+            "Quantidade para cálculo (kg)"
+        ]
+
+    @timed
+    def calculate_nitrogen_applied(self):
         """Calculate applied nitrogen quantity"""
-        try:
-            return row["Quantidade para cálculo (kg)"] * row["Teor de Nitrogênio (%)"]
-        except:
-            return None
+        return self.df["Quantidade para cálculo (kg)"] * self.numeric_column(
+            "Teor de Nitrogênio (%)", "Nitrogênio aplicado"
+        )
 
-    def calculate_co2_emissions(self, row):
+    @timed
+    def calculate_co2_emissions(self):
         """Calculate CO2 emissions based on limestone type"""
-        try:
-            if row["Calcário Calcítico ou Dolomítico"] == "Calcítico":
-                return (
-                    row["Quantidade de equivalência em carbonato de cálcio aplicada (kg)"]
-                    * self.factors_fertilizers.iloc[12]["value"]
-                )
-            elif row["Calcário Calcítico ou Dolomítico"] == "Dolomítico":
-                return (
-                    row["Quantidade de equivalência em carbonato de cálcio aplicada (kg)"]
-                    * self.factors_fertilizers.iloc[13]["value"]
-                )
-            return 0
-        except:
-            return None
-
-    def calculate_n2o_emissions(self, row):
+        limestone = self.df["Calcário Calcítico ou Dolomítico"]
+        equivalent = self.df[
+            "Quantidade de equivalência em carbonato de cálcio aplicada (kg)"
+        ]
+
+        self.add_diagnostics(
+            limestone.notna() & ~limestone.isin(LIMESTONE_TYPES),
+            "Emissões kgCO2",
+            "Tipo de calcário desconhecido, emissões de CO2 consideradas 0",
+        )
+
+        return np.select(
+            [limestone == "Calcítico", limestone == "Dolomítico"],
+            [equivalent * self.calcite_co2_factor, equivalent * self.dolomite_co2_factor],
+            default=0,
+        )
+
+    @timed
+    def calculate_n2o_emissions(self):
         """Calculate N2O emissions"""
-        try:
-            return (
-                row["Quantidade de N aplicada (kg)"]
-                * self.factors_fertilizers.iloc[6]["value"]
-            )
-        except:
-            return None
-
-    def calculate_use_emissions(self, row):
+        return self.df["Quantidade de N aplicada (kg)"] * self.n2o_factor
+
+    @timed
+    def calculate_use_emissions(self):
         """Calculate use emissions in tCO2e"""
-        try:
-            return np.divide(
-                row["Emissões kgCO2"]
-                + (row["Emissões kgN2O"] * self.gwp_kyoto.iloc[4]["ar6"]),
-                1000,
-            )
-        except:
-            return None
-
-    def calculate_fossil_production_emissions(self, row):
-        """Calculate fossil production emissions"""
-        try:
-            emission_factor = self.get_emission_factor(row["Nome no Estudo"], "fossil_emission_factor")
-
-            print(emission_factor)
-
-            return np.divide(
-                row["Quantidade para cálculo (kg)"]
-                * emission_factor,
-                1000,
-            )
-        except:
-            return None
-
-    def calculate_biogenic_production_emissions(self, row):
-        """Calculate biogenic production emissions"""
-        try:
-            return np.divide(
-                row["Quantidade para cálculo (kg)"]
-                * self.get_emission_factor(row["Nome no Estudo"], "biogenic_emission_factor"),
-                1000,
-            )
-        except:
-            return None
-
-    def calculate_luc_production_emissions(self, row):
-        """Calculate LUC production emissions"""
-        try:
-            return np.divide(
-                row["Quantidade para cálculo (kg)"]
-                * self.get_emission_factor(row["Nome no Estudo"], "luc_emission_factor"),
-                1000,
-            )
-        except:
-            return None
-
-    def calculate_total_emissions(self, row):
+        return (
+            self.df["Emissões kgCO2"] + self.df["Emissões kgN2O"] * self.gwp_n2o
+        ) / 1000
+
+    @timed
+    def calculate_production_emissions(self) -> pd.DataFrame:
+        """
+        Calculate fossil, biogenic and LUC production emissions, resolving
+        each distinct "Nome no Estudo" once
+        """
+        names = self.df["Nome no Estudo"]
+        factors = get_emission_factors(
+            names,
+            ["fossil_emission_factor", "biogenic_emission_factor", "luc_emission_factor"],
+        )
+        self.missing_factors = factors.attrs["missing"]
+        self.missing_rows = missing_rows(names, names.isin(self.missing_factors))
+
+        self.add_diagnostics(
+            factors.isna().all(axis=1),
+            "Emissões de produção",
+            "Fator de emissão não encontrado para 'Nome no Estudo'",
+        )
+
+        quantity = self.df["Quantidade para cálculo (kg)"]
+
+        return pd.DataFrame(
+            {
+                "Emissões Fósseis Produção tCO2e": quantity
+                * factors["fossil_emission_factor"]
+                / 1000,
+                "Emissões Biogênicas Produção tCO2e": quantity
+                * factors["biogenic_emission_factor"]
+                / 1000,
+                "Emissões LUC Produção tCO2e": quantity
+                * factors["luc_emission_factor"]
+                / 1000,
+            },
+            index=self.df.index,
+        )
+
+    @timed
+    def calculate_total_emissions(self):
         """Calculate total emissions"""
-        try:
-            return np.sum(
-                row["Emissões Fósseis Produção tCO2e"] + row["Emissões Uso tCO2e"]
-            )
-        except:
-            return None
+        return self.df["Emissões Fósseis Produção tCO2e"] + self.df["Emissões Uso tCO2e"]
 
     def process(self):
         """Main processing method that orchestrates all calculations"""
         self.df["Quantidade para cálculo (kg)"] = self.calculate_base_quantity()
 
         self.df["Quantidade de equivalência em carbonato de cálcio aplicada (kg)"] = (
-            self.df.apply(self.calculate_calcium_carbonate_equivalent, axis=1)
-        )
-
-        self.df["Quantidade de N aplicada (kg)"] = self.df.apply(
-            self.calculate_nitrogen_applied, axis=1
+            self.calculate_calcium_carbonate_equivalent()
         )
 
-        self.df["Emissões kgCO2"] = self.df.apply(self.calculate_co2_emissions, axis=1)
+        self.df["Quantidade de N aplicada (kg)"] = self.calculate_nitrogen_applied()
 
-        self.df["Emissões kgN2O"] = self.df.apply(self.calculate_n2o_emissions, axis=1)
+        self.df["Emissões kgCO2"] = self.calculate_co2_emissions()
 
-        self.df["Emissões Uso tCO2e"] = self.df.apply(
-            self.calculate_use_emissions, axis=1
-        )
+        self.df["Emissões kgN2O"] = self.calculate_n2o_emissions()
 
-        self.df["Emissões Fósseis Produção tCO2e"] = self.df.apply(
-            self.calculate_fossil_production_emissions, axis=1
-        )
+        self.df["Emissões Uso tCO2e"] = self.calculate_use_emissions()
 
-        self.df["Emissões Biogênicas Produção tCO2e"] = self.df.apply(
-            self.calculate_biogenic_production_emissions, axis=1
-        )
+        production = self.calculate_production_emissions()
+        for column in production.columns:
+            self.df[column] = production[column]
 
-        self.df["Emissões LUC Produção tCO2e"] = self.df.apply(
-            self.calculate_luc_production_emissions, axis=1
-        )
-
-        self.df["Emissões totais tCO2e"] = self.df.apply(
-            self.calculate_total_emissions, axis=1
-        )
+        self.df["Emissões totais tCO2e"] = self.calculate_total_emissions()
 
         # st.toast("Cálculo de emissões de fertilizantes concluído com sucesso!")
 
@@ -179,31 +222,17 @@ class ForestryFertilizers:
 
 
 def test_forestry_fertilizers():
-    file = st.file_uploader("Escolha um arquivo", type=["xlsx"], key="fertilizers")
+    file = upload_file("forestry_fertilizers")
     if file is not None:
-        df = pd.read_excel(file,sheet_name=0)
-        forestry_fertilizers = ForestryFertilizers(df)
-
-        processed = forestry_fertilizers.process()
-        result = pd.DataFrame({
-            "Emissões totais tCO2e": [processed["Emissões totais tCO2e"].sum()]
-        })
+        processed, forestry_fertilizers = run_cached("forestry_fertilizers", file)
 
         if processed is not None:
-            result["Emissões Fósseis Produção tCO2e"] = processed[
-                "Emissões Fósseis Produção tCO2e"
-            ].sum()
-            result["Emissões Biogênicas Produção tCO2e"] = processed[
-                "Emissões Biogênicas Produção tCO2e"
-            ].sum()
-            result["Emissões LUC Produção tCO2e"] = processed["Emissões LUC Produção tCO2e"].sum()
-            result["Emissões Uso tCO2e"] = processed["Emissões Uso tCO2e"].sum()
-            result["Emissões kgCO2"] = processed["Emissões kgCO2"].sum()
-            result["Emissões kgN2O"] = processed["Emissões kgN2O"].sum()
-
             st.dataframe(processed, hide_index=True)
 
-            st.title('Resultados')
-            st.dataframe(result, hide_index=True, use_container_width=True)
+            if not forestry_fertilizers.diagnostics.empty:
+                st.warning("Algumas linhas não puderam ser calculadas completamente.")
+                st.dataframe(forestry_fertilizers.diagnostics, hide_index=True)
+
+            show_results("forestry_fertilizers", processed)
 
             st.toast("Processamento concluído com sucesso!")
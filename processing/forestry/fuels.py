@@ -1,9 +1,32 @@
 import pandas as pd
 import numpy as np
-from streamlit_react_flow import react_flow
 import streamlit as st
-import json
-import graphviz
+
+from utils.emission_factors import get_emission_factors, get_emission_factors_table
+from utils.factor_repository import get_repository
+from utils.gwp import get_gwp
+from utils.names import normalize_name, normalize_names
+from utils.profiling import timed
+from processing.diagnostics import empty_missing_rows, missing_rows
+from processing.ui import run_cached, show_results, upload_file
+
+
+# Combustíveis comercializados em mistura: (componente renovável, fração)
+BLEND_COMPONENTS = {
+    "gasolina automotiva": ("álcool etílico anidro", 0.27),
+    "óleo diesel": ("biodiesel", 0.1),
+}
+
+# Colunas da tabela de parâmetros de mistura -> colunas de resultado
+BLEND_OUTPUTS = {
+    "co2": "Emissões CO2 (kgCO2)",
+    "co2_biogenic": "Emissões CO2 - biogênico (kgCO2)",
+    "ch4": "Emissões CH4 (kgCH4)",
+    "n2o": "Emissões N2O (kgN2O)",
+    "kg": "Consumo (KG)",
+}
+
+_blend_parameters_cache = {}
 
 
 class ForestryFuels:
@@ -14,9 +37,21 @@ class ForestryFuels:
         :param df: DataFrame contendo os dados de combustíveis florestais.
         """
         self.df = df
-        self.densities = pd.read_excel("data/lca/densities.xlsx")
-        self.emission_factors = pd.read_excel("data/lca/emission_factors.xlsx")
-        self.stationary_combustion_factors = pd.read_excel("data/lca/stationary_combustion.xlsx")
+        self.densities = get_repository().table(
+            "data/lca/densities.xlsx", key_column="fuel"
+        )
+        self.emission_factors = get_emission_factors_table()
+        self.stationary_combustion_factors = get_repository().table(
+            "data/lca/stationary_combustion.xlsx", key_column="fuel"
+        )
+        self.off_road_factors = get_repository().table(
+            "data/lca/mobile_combustion.xlsx",
+            sheet_name="off_road",
+            key_column="fuel_transportation",
+        )
+        self.blend_parameters = self.get_blend_parameters()
+        self.missing_factors = []
+        self.missing_rows = empty_missing_rows()
 
     def get_off_road_factors(self, fuel_type: str, column_name: str):
         """
@@ -27,442 +62,215 @@ class ForestryFuels:
         :return: Valor do fator de emissão.
         """
         try:
-            orf = pd.read_excel(
-                "data/lca/mobile_combustion.xlsx", sheet_name="off_road"
-            )
-            orf["fuel_transportation"] = (
-                orf["fuel_transportation"].str.lower().str.strip()
-            )
-            return orf[orf["fuel_transportation"] == fuel_type][column_name].values[0]
-        except (FileNotFoundError, KeyError, IndexError) as e:
+            position = self.off_road_factors.position(fuel_type)
+            if position is None:
+                raise IndexError(f"{fuel_type} não encontrado")
+            return self.off_road_factors.take(column_name, [position])[0]
+        except (KeyError, IndexError) as e:
             print(f"[get_off_road_factors] Erro ao obter fatores para {fuel_type}: {e}")
             # np.nan
             return 0
 
     def get_emission_factors(self, name: str, column_name: str) -> float:
         try:
-            self.emission_factors["name"] = self.emission_factors["name"].str.lower()
-
-            factor = self.emission_factors[self.emission_factors["name"] == name]
-
-            return factor[column_name].values[0]
-        except (FileNotFoundError, KeyError, IndexError) as e:
+            return self.emission_factors.get(name, column_name, 0)
+        except KeyError as e:
             print(f"[get_emission_factors] Erro ao obter fatores para {name}: {e}")
             return 0
 
     def get_stationary_combustion_factors(self, name: str, column_name: str) -> float:
         try:
-            self.stationary_combustion_factors["fuel"] = self.stationary_combustion_factors["fuel"].str.lower()
-
-            factor = self.stationary_combustion_factors[self.stationary_combustion_factors["fuel"] == name]
-
-            return factor[column_name].values[0]
-        except (FileNotFoundError, KeyError, IndexError) as e:
+            return self.stationary_combustion_factors.get(name, column_name, 0)
+        except KeyError as e:
             print(f"[get_stationary_combustion_factors] Erro ao obter fatores para {name}: {e}")
             return 0
 
     def get_density(self, name: str, column_name: str) -> float:
         try:
-            factor = self.densities[self.densities["fuel"] == name]
-
-            return factor[column_name].values[0]
-        except (FileNotFoundError, KeyError, IndexError) as e:
+            return self.densities.get(name, column_name, 0)
+        except KeyError as e:
             print(f"Erro ao obter densidade para {name}: {e}")
             return 0
 
-    def calculate_emissions_co2(self, fuel, consumption):
+    @timed
+    def get_blend_parameters(self) -> pd.DataFrame:
         """
-        Calcula as emissões de CO2 para um dado combustível e consumo.
+        Obtém a tabela de parâmetros por combustível (Nomenclatura Inv. GEE),
+        já ponderados pela fração de mistura. Cada valor multiplicado pelo
+        consumo resulta diretamente na respectiva coluna de emissões.
 
-        :param fuel: Tipo de combustível.
-        :param consumption: Consumo do combustível.
-        :return: Emissões de CO2 calculadas.
+        A tabela é calculada uma vez por conjunto de planilhas de fatores.
 
-        =IF(
-        D2="Gasolina Automotiva";
-        (H2/1000) * (1-0,27) * (XLOOKUP(D2;Combustão_Móvel!$A$16:$A$20;Combustão_Móvel!$E$16:$E$20)) * (XLOOKUP(D2;Combustão_Móvel!$A$16:$A$20;Combustão_Móvel!$D$16:$D$20));
+        Gasolina Automotiva / Óleo Diesel:
 
-        IF(D2="Óleo Diesel";(H2/1000)*(1-0,1)*(XLOOKUP(D2;Combustão_Móvel!$A$16:$A$20;Combustão_Móvel!$E$16:$E$20))*(XLOOKUP(D2;Combustão_Móvel!$A$16:$A$20;Combustão_Móvel!$D$16:$D$20))))*1000
-        """
-        if fuel == "gasolina automotiva":
-            co2_factor = self.get_off_road_factors(fuel, "co2_tco2_gj")
-            energy_content = self.get_off_road_factors(fuel, "energy_content_gj_m3")
-            return (
-                (consumption / 1000) * (1 - 0.27) * co2_factor * energy_content * 1000
-            )
-        elif fuel == "óleo diesel":
-            co2_factor = self.get_off_road_factors(fuel, "co2_tco2_gj")
-            energy_content = self.get_off_road_factors(fuel, "energy_content_gj_m3")
-            return (
-                (consumption / 1000) * (1 - 0.1) * (co2_factor * energy_content) * 1000
-            )
-        elif fuel == "acetileno":
-            factor = self.get_stationary_combustion_factors(fuel, "kgco2_kg")
-
-            return np.multiply(consumption, factor)
-
-        return 0
-
-    def calculate_emissions_biogenic_co2(self, fuel, consumption):
-        """
-        Calcula as emissões de CO2 para um dado combustível e consumo.
-
-        :param fuel: Tipo de combustível.
-        :param consumption: Consumo do combustível.
-        :return: Emissões de CO2 calculadas.
-
-        =IF(
-            D2="Gasolina Automotiva";
-                (H2/1000) * (0,27) * (Combustão_Móvel!$D$18) * (Combustão_Móvel!$E$18);
+        =(H2/1000) * (1-fração) * (Combustão_Móvel!E) * (Combustão_Móvel!D) * 1000
+        =(H2/1000) * (fração) * (Combustão_Móvel!$D$18) * (Combustão_Móvel!$E$18) * 1000
 
-        IF(
-            D2="Óleo Diesel";
-            (H2/1000) * (0,1) * (Combustão_Móvel!$D$20) * (Combustão_Móvel!$E$20)))
+        Acetileno: consumo (kg) * kgCO2/kg (Combustão Estacionária).
 
-        *1000
+        :return: DataFrame indexado pelo combustível (nome normalizado, ver
+            utils.names.normalize_name) com as colunas de BLEND_OUTPUTS.
         """
-        if fuel == "gasolina automotiva":
-            co2_factor = self.get_off_road_factors(
-                "álcool etílico anidro", "co2_tco2_gj"
-            )
-            energy_content = self.get_off_road_factors(
-                "álcool etílico anidro", "energy_content_gj_m3"
-            )
-            return (consumption / 1000) * 0.27 * co2_factor * energy_content * 1000
-        elif fuel == "óleo diesel":
-            co2_factor = self.get_off_road_factors("biodiesel", "co2_tco2_gj")
-            energy_content = self.get_off_road_factors(
-                "biodiesel", "energy_content_gj_m3"
-            )
-            return (consumption / 1000) * 0.1 * (co2_factor * energy_content) * 1000
-
-        return 0
-
-    def calculate_emissions_ch4(self, fuel, consumption):
-        consumption = np.array(consumption) / 1000
-
-        ch4_factors = np.zeros_like(consumption)
-        energy_contents = np.zeros_like(consumption)
-        mix_energy_contents = np.zeros_like(consumption)
-        mix_factors = np.zeros_like(consumption)
-
-        gasolina_mask = fuel == "gasolina automotiva"
-        diesel_mask = fuel == "óleo diesel"
-
-        ch4_factors[gasolina_mask] = self.get_off_road_factors(
-            "gasolina automotiva", "ch4_tch4_gj"
-        )
-        energy_contents[gasolina_mask] = self.get_off_road_factors(
-            "gasolina automotiva", "energy_content_gj_m3"
-        )
-        mix_energy_contents[gasolina_mask] = self.get_off_road_factors(
-            "álcool etílico anidro", "energy_content_gj_m3"
-        )
-        mix_factors[gasolina_mask] = self.get_off_road_factors(
-            "álcool etílico anidro", "ch4_tch4_gj"
+        cache_key = (
+            self.densities,
+            self.stationary_combustion_factors,
+            self.off_road_factors,
         )
+        cached = _blend_parameters_cache.get("parameters")
+        if cached is not None and all(a is b for a, b in zip(cached[0], cache_key)):
+            return cached[1]
 
-        ch4_factors[diesel_mask] = self.get_off_road_factors(
-            "óleo diesel", "ch4_tch4_gj"
-        )
-        energy_contents[diesel_mask] = self.get_off_road_factors(
-            "óleo diesel", "energy_content_gj_m3"
-        )
-        mix_energy_contents[diesel_mask] = self.get_off_road_factors(
-            "biodiesel", "energy_content_gj_m3"
-        )
-        mix_factors[diesel_mask] = self.get_off_road_factors("biodiesel", "ch4_tch4_gj")
-
-        etanol_fraction = np.where(gasolina_mask, 0.27, 0.1)
-
-        emissions = (
-            consumption
-            * (
-                (1 - etanol_fraction) * ch4_factors * energy_contents
-                + etanol_fraction * mix_factors * mix_energy_contents
+        def per_unit(fuel: str, column_name: str) -> float:
+            return self.get_off_road_factors(fuel, column_name) * self.get_off_road_factors(
+                fuel, "energy_content_gj_m3"
             )
-            * 1000
-        )
-
-        return emissions
-
-    def calculate_emissions_n2o(self, fuel, consumption):
-        consumption = np.array(consumption) / 1000
-
-        n2o_factors = np.zeros_like(consumption)
-        energy_contents = np.zeros_like(consumption)
-        mix_energy_contents = np.zeros_like(consumption)
-        mix_factors = np.zeros_like(consumption)
-
-        gasolina_mask = fuel == "gasolina automotiva"
-        diesel_mask = fuel == "óleo diesel"
-
-        n2o_factors[gasolina_mask] = self.get_off_road_factors(
-            "gasolina automotiva", "n2o_tn2o_gj"
-        )
-        energy_contents[gasolina_mask] = self.get_off_road_factors(
-            "gasolina automotiva", "energy_content_gj_m3"
-        )
-        mix_energy_contents[gasolina_mask] = self.get_off_road_factors(
-            "álcool etílico anidro", "energy_content_gj_m3"
-        )
-        mix_factors[gasolina_mask] = self.get_off_road_factors(
-            "álcool etílico anidro", "n2o_tn2o_gj"
-        )
-
-        n2o_factors[diesel_mask] = self.get_off_road_factors(
-            "óleo diesel", "n2o_tn2o_gj"
-        )
-        energy_contents[diesel_mask] = self.get_off_road_factors(
-            "óleo diesel", "energy_content_gj_m3"
-        )
-        mix_energy_contents[diesel_mask] = self.get_off_road_factors(
-            "biodiesel", "energy_content_gj_m3"
-        )
-        mix_factors[diesel_mask] = self.get_off_road_factors("biodiesel", "n2o_tn2o_gj")
-
-        etanol_fraction = np.where(gasolina_mask, 0.27, 0.1)
-
-        emissions = (
-            consumption
-            * (
-                (1 - etanol_fraction) * n2o_factors * energy_contents
-                + etanol_fraction * mix_factors * mix_energy_contents
-            )
-            * 1000
-        )
-
-        return emissions
-
-    def calculate_fossil_combustion_emissions_tco2e(self):
-        """
-        =( J2 + ( L2 * GWP_Quioto!$E$3 ) + ( M2 * GWP_Quioto!$E$6 ) ) / 1000
-        """
-        gwp_kyoto_factors = pd.read_excel("data/lca/gwp_kyoto.xlsx")
-        gwp_ch4_ar6 = gwp_kyoto_factors["ar6"].values[1]
-        gwp_n2o_ar6 = gwp_kyoto_factors["ar6"].values[4]
-
-        return (
-            self.df["Emissões CO2 (kgCO2)"]
-            + (self.df["Emissões CH4 (kgCH4)"] * gwp_ch4_ar6)
-            + (self.df["Emissões N2O (kgN2O)"] * gwp_n2o_ar6)
-        ) / 1000
-
-    def calculate_combustion_emissions_biogenic_tco2e(self):
-        return self.df["Emissões CO2 - biogênico (kgCO2)"] / 1000
-
-    def calculate_consumption_kg(self, row) -> float:
-        fuel = row["Combustível (Nomenclatura Inv. GEE)"]
 
-        try:
-
-            if fuel == "gasolina automotiva":
-                return (
-                    row["Consumo"]
-                    * (
-                        (self.get_density(fuel, "density") * 0.73)
-                        + (self.get_density("álcool etílico anidro", "density") * 0.27)
-                    )
-                    / 1000
-                )
-            elif fuel == "óleo diesel":
-                return (
-                    row["Consumo"]
-                    * (
-                        (self.get_density(fuel, "density") * 0.9)
-                        + (self.get_density("biodiesel", "density") * 0.1)
-                    )
-                    / 1000
+        parameters = {}
+        for fuel, (component, fraction) in BLEND_COMPONENTS.items():
+            parameters[fuel] = {
+                "fraction": fraction,
+                "co2": (1 - fraction) * per_unit(fuel, "co2_tco2_gj"),
+                "co2_biogenic": fraction * per_unit(component, "co2_tco2_gj"),
+                "ch4": (1 - fraction) * per_unit(fuel, "ch4_tch4_gj")
+                + fraction * per_unit(component, "ch4_tch4_gj"),
+                "n2o": (1 - fraction) * per_unit(fuel, "n2o_tn2o_gj")
+                + fraction * per_unit(component, "n2o_tn2o_gj"),
+                "kg": (
+                    self.get_density(fuel, "density") * (1 - fraction)
+                    + self.get_density(component, "density") * fraction
                 )
-            elif fuel == "acetileno":
-                return row["Consumo"]
-            else:
-                return 0
-        except:
-            print(f"Emission factor not found for fuel: {fuel}")
-            return 0
+                / 1000,
+            }
 
-    def calculate_production_tco2_fossil_co2_emissions(self, row) -> float:
-        fuel = row["Combustível (Nomenclatura Pegada de Carbono)"]
+        parameters["acetileno"] = {
+            "fraction": 0,
+            "co2": self.get_stationary_combustion_factors("acetileno", "kgco2_kg"),
+            "co2_biogenic": 0,
+            "ch4": 0,
+            "n2o": 0,
+            "kg": 1,
+        }
 
-        try:
-            factor = self.get_emission_factors(
-                fuel,
-                "fossil_emission_factor",
-            )
+        table = pd.DataFrame.from_dict(parameters, orient="index").astype(float)
+        table.index = normalize_names(table.index)
+        _blend_parameters_cache["parameters"] = (cache_key, table)
 
-            return np.divide(np.multiply(row["Consumo (KG)"], factor), 1000)
-        except Exception as e:
-            print(e)
+        return table
 
-            print(f"Emission factor not found for fuel: {fuel}")
-            return 0
-
-    def calculate_production_tco2_fossil_co2_biogenic_emissions(self, row) -> float:
-        fuel = row["Combustível (Nomenclatura Pegada de Carbono)"]
-
-        try:
-            factor = self.get_emission_factors(
-                fuel,
-                "biogenic_emission_factor",
-            )
-
-            return np.divide(np.multiply(row["Consumo (KG)"], factor), 1000)
-        except Exception as e:
-            print(e)
-
-            print(f"Emission factor not found for fuel: {fuel}")
-            return 0
-
-    def calculate_emissions_co2_luc_tco2e(self, row) -> float:
-        """
-        Calculate CO2 LUC emissions for a given fuel type.
-
-        :param fuel: Fuel type for which to calculate emissions.
-        :return: CO2 LUC emissions as a single scalar value.
+    @timed
+    def calculate_emissions(self, fuels: pd.Series, consumption) -> pd.DataFrame:
         """
+        Calcula CO2, CO2 biogênico, CH4, N2O e consumo em kg para todas as
+        linhas de uma vez: os parâmetros de cada combustível distinto são
+        obtidos uma única vez e multiplicados pelo consumo.
 
-        fuel = row["Combustível (Nomenclatura Pegada de Carbono)"]
-
-        try:
-            factor = self.get_emission_factors(
-                fuel,
-                "luc_emission_factor",
-            )
-
-            return np.divide(np.multiply(row["Consumo (KG)"], factor), 1000)
-        except Exception as e:
-            print(e)
+        Combustíveis sem parâmetros resultam em 0.
 
-            print(f"Emission factor not found for fuel: {fuel}")
-            return 0
-
-    def calculate_total_fossil_emissions_tco2e(self, row):
-        return (
-            row["Emissões CO2 Fósseis - Produção (tCO2)"]
-            + row["Emissões Fósseis Combustão (tCO2e)"]
-        )
-
-    def calculate_total_biogenic_emissions(self, row):
-        return (
-            row["Emissões Biogênicas Combustão (tCO2e)"]
-            + row["Emissões CO2 Biogênico - Produção (tCO2)"]
-        )
-
-    def get_emissions_co2(self):
+        :param fuels: Combustíveis (Nomenclatura Inv. GEE).
+        :param consumption: Consumo de cada linha.
+        :return: DataFrame alinhado a `fuels` com as colunas de BLEND_OUTPUTS.
         """
-        Calcula e adiciona as emissões de CO2 ao DataFrame.
-        """
-        self.df["Emissões CO2 (kgCO2)"] = self.df.apply(
-            lambda row: self.calculate_emissions_co2(
-                row["Combustível (Nomenclatura Inv. GEE)"], row["Consumo"]
-            ),
-            axis=1,
-        )
+        parameters = self.blend_parameters[list(BLEND_OUTPUTS)]
+        consumption = np.asarray(consumption, dtype=float)
 
-    def get_emissions_biogenic_co2(self):
-        """
-        Calcula e adiciona as emissões - biogênico de CO2 ao DataFrame.
-        """
-        self.df["Emissões CO2 - biogênico (kgCO2)"] = self.df.apply(
-            lambda row: self.calculate_emissions_biogenic_co2(
-                row["Combustível (Nomenclatura Inv. GEE)"], row["Consumo"]
-            ),
-            axis=1,
-        )
+        codes, uniques = pd.factorize(fuels)
+        rows = parameters.index.get_indexer(normalize_names(uniques))
+        # linha extra de zeros para combustíveis desconhecidos / vazios (código -1)
+        rows = np.append(np.where(rows >= 0, rows, len(parameters)), len(parameters))
+        matrix = np.vstack([parameters.to_numpy(), np.zeros(len(BLEND_OUTPUTS))])
 
-    def get_emissions_ch4(self):
-        """
-        Calcula e adiciona as emissões de CH4 ao DataFrame.
-        """
-        self.df["Emissões CH4 (kgCH4)"] = self.df.apply(
-            lambda row: self.calculate_emissions_ch4(
-                row["Combustível (Nomenclatura Inv. GEE)"], row["Consumo"]
-            ),
-            axis=1,
-        )
+        per_unit = matrix[rows[codes]]
+        known = rows[codes] < len(parameters)
+        values = np.where(known[:, None], per_unit * consumption[:, None], 0.0)
 
-    def get_emissions_n2o(self):
-        """
-        Calcula e adiciona as emissões de N2O ao DataFrame.
-        """
-        self.df["Emissões N2O (kgN2O)"] = self.df.apply(
-            lambda row: self.calculate_emissions_n2o(
-                row["Combustível (Nomenclatura Inv. GEE)"], row["Consumo"]
-            ),
-            axis=1,
+        return pd.DataFrame(
+            values, columns=list(BLEND_OUTPUTS.values()), index=fuels.index
         )
 
-    def get_fossil_combustion_emissions_tco2e(self):
-        """
-        Calcula e adiciona as emissões fósseis na combustão em tCO2e ao DataFrame.
-        """
-        self.df["Emissões Fósseis Combustão (tCO2e)"] = (
-            self.calculate_fossil_combustion_emissions_tco2e()
-        )
+    def _calculate_single(self, fuel, consumption, column: str) -> float:
+        return self.calculate_emissions(pd.Series([fuel]), [consumption])[
+            BLEND_OUTPUTS[column]
+        ].iloc[0]
 
-    def get_combustion_emissions_biogenic_tco2e(self):
+    def calculate_emissions_co2(self, fuel, consumption):
         """
-        Calcula e adiciona as emissões biogênicas combustão em tCO2e ao DataFrame.
+        Calcula as emissões de CO2 para um dado combustível e consumo.
+
+        :param fuel: Tipo de combustível.
+        :param consumption: Consumo do combustível.
+        :return: Emissões de CO2 calculadas.
         """
-        self.df["Emissões Biogênicas Combustão (tCO2e)"] = (
-            self.calculate_combustion_emissions_biogenic_tco2e()
-        )
+        return self._calculate_single(fuel, consumption, "co2")
 
-    def get_consumption_tco2e(self):
+    def calculate_emissions_biogenic_co2(self, fuel, consumption):
         """
-        Calcula e adiciona o Consumo em KG ao DataFrame.
+        Calcula as emissões de CO2 biogênico para um dado combustível e consumo.
         """
-        self.df["Consumo (KG)"] = self.df.apply(
-            lambda row: self.calculate_consumption_kg(row), axis=1
-        )
+        return self._calculate_single(fuel, consumption, "co2_biogenic")
 
-    def get_production_tco2_fossil_co2_emissions(self):
+    def calculate_emissions_ch4(self, fuel, consumption):
         """
-        Calcula e adiciona Emissões CO2 Fósseis - Produção (tCO2) ao DataFrame.
+        Calcula as emissões de CH4 para um dado combustível e consumo.
         """
-        self.df["Emissões CO2 Fósseis - Produção (tCO2)"] = self.df.apply(
-            lambda row: self.calculate_production_tco2_fossil_co2_emissions(row),
-            axis=1,
-        )
+        return self._calculate_single(fuel, consumption, "ch4")
 
-    def get_production_tco2_fossil_co2_biogenic_emissions(self):
+    def calculate_emissions_n2o(self, fuel, consumption):
         """
-        Calcula e adiciona Emissões CO2 Biogênico - Produção (tCO2) ao DataFrame.
+        Calcula as emissões de N2O para um dado combustível e consumo.
         """
-        self.df["Emissões CO2 Biogênico - Produção (tCO2)"] = self.df.apply(
-            lambda row: self.calculate_production_tco2_fossil_co2_biogenic_emissions(
-                row
-            ),
-            axis=1,
-        )
+        return self._calculate_single(fuel, consumption, "n2o")
 
-    def get_emissions_co2_luc_tco2e(self):
+    @timed
+    def calculate_fossil_combustion_emissions_tco2e(self):
         """
-        Calcula e adiciona Emissões CO2 LUC - Produção (tCO2) ao DataFrame.
+        =( J2 + ( L2 * GWP_Quioto!$E$3 ) + ( M2 * GWP_Quioto!$E$6 ) ) / 1000
         """
-        self.df["Emissões CO2 LUC - Produção (tCO2)"] = self.df.apply(
-            lambda row: self.calculate_emissions_co2_luc_tco2e(row),
-            axis=1,
-        )
+        return (
+            self.df["Emissões CO2 (kgCO2)"]
+            + (self.df["Emissões CH4 (kgCH4)"] * get_gwp("CH4"))
+            + (self.df["Emissões N2O (kgN2O)"] * get_gwp("N2O"))
+        ) / 1000
 
-    def get_total_fossil_emissions_tco2e(self):
-        self.df["Emissões Fósseis Totais (tCO2e)"] = self.df.apply(
-            lambda row: self.calculate_total_fossil_emissions_tco2e(row), axis=1
+    @timed
+    def calculate_production_emissions(self) -> pd.DataFrame:
+        """
+        Calcula as emissões de produção (fóssil, biogênica e LUC) em tCO2 a
+        partir do consumo em kg e dos fatores de emissão da Nomenclatura
+        Pegada de Carbono, buscando cada combustível distinto uma única vez.
+        """
+        names = self.df["Combustível (Nomenclatura Pegada de Carbono)"]
+        factors = get_emission_factors(
+            names,
+            ["fossil_emission_factor", "biogenic_emission_factor", "luc_emission_factor"],
+            defaults={
+                "fossil_emission_factor": 0,
+                "biogenic_emission_factor": 0,
+                "luc_emission_factor": 0,
+            },
         )
-
-    def get_total_biogenic_emissions_tco2e(self):
-        self.df["Emissões Biogênicas Totais (tCO2e)"] = self.df.apply(
-            lambda row: self.calculate_total_biogenic_emissions(row), axis=1
+        self.missing_factors = factors.attrs["missing"]
+        self.missing_rows = missing_rows(names, names.isin(self.missing_factors))
+        consumption_kg = self.df["Consumo (KG)"]
+
+        return pd.DataFrame(
+            {
+                "Emissões CO2 Fósseis - Produção (tCO2)": consumption_kg
+                * factors["fossil_emission_factor"]
+                / 1000,
+                "Emissões CO2 Biogênico - Produção (tCO2)": consumption_kg
+                * factors["biogenic_emission_factor"]
+                / 1000,
+                "Emissões CO2 LUC - Produção (tCO2)": consumption_kg
+                * factors["luc_emission_factor"]
+                / 1000,
+            },
+            index=self.df.index,
         )
 
     def preparation(self):
         """
-        Prepara o DataFrame inicializando colunas necessárias.
+        Prepara o DataFrame e calcula todas as colunas de emissões.
         """
-        self.densities["fuel"] = self.densities["fuel"].str.lower()
-        self.emission_factors["name"] = self.emission_factors["name"].str.lower()
-
         self.df["Combustível (Nomenclatura Inv. GEE)"] = self.df[
             "Combustível (Nomenclatura Inv. GEE)"
         ].str.lower()
@@ -471,26 +279,39 @@ class ForestryFuels:
             "Combustível (Nomenclatura Pegada de Carbono)"
         ].str.lower()
 
-        self.df["Fração de Etanol"] = self.df[
-            "Combustível (Nomenclatura Inv. GEE)"
-        ].apply(lambda x: 0.27 if x == "gasolina automotiva" else 0)
+        fuels = self.df["Combustível (Nomenclatura Inv. GEE)"]
 
-        self.df["Fração de Biodiesel"] = self.df[
-            "Combustível (Nomenclatura Inv. GEE)"
-        ].apply(lambda x: 0 if x == "óleo diesel" else 1)
-
-        self.get_emissions_co2()
-        self.get_emissions_biogenic_co2()
-        self.get_emissions_ch4()
-        self.get_emissions_n2o()
-        self.get_fossil_combustion_emissions_tco2e()
-        self.get_combustion_emissions_biogenic_tco2e()
-        self.get_consumption_tco2e()
-        self.get_production_tco2_fossil_co2_emissions()
-        self.get_production_tco2_fossil_co2_biogenic_emissions()
-        self.get_emissions_co2_luc_tco2e()
-        self.get_total_fossil_emissions_tco2e()
-        self.get_total_biogenic_emissions_tco2e()
+        normalized = normalize_names(fuels)
+        self.df["Fração de Etanol"] = np.where(
+            normalized == normalize_name("gasolina automotiva"), 0.27, 0
+        )
+        self.df["Fração de Biodiesel"] = np.where(
+            normalized == normalize_name("óleo diesel"), 0, 1
+        )
+
+        emissions = self.calculate_emissions(fuels, self.df["Consumo"])
+        for column in emissions.columns:
+            self.df[column] = emissions[column]
+
+        self.df["Emissões Fósseis Combustão (tCO2e)"] = (
+            self.calculate_fossil_combustion_emissions_tco2e()
+        )
+        self.df["Emissões Biogênicas Combustão (tCO2e)"] = (
+            self.df["Emissões CO2 - biogênico (kgCO2)"] / 1000
+        )
+
+        production = self.calculate_production_emissions()
+        for column in production.columns:
+            self.df[column] = production[column]
+
+        self.df["Emissões Fósseis Totais (tCO2e)"] = (
+            self.df["Emissões CO2 Fósseis - Produção (tCO2)"]
+            + self.df["Emissões Fósseis Combustão (tCO2e)"]
+        )
+        self.df["Emissões Biogênicas Totais (tCO2e)"] = (
+            self.df["Emissões Biogênicas Combustão (tCO2e)"]
+            + self.df["Emissões CO2 Biogênico - Produção (tCO2)"]
+        )
 
         # st.toast("Cálculo de emissões de combustíveis concluído com sucesso!")
 
@@ -498,29 +319,13 @@ class ForestryFuels:
 
 
 def test_forestry_fuels():
-    file = st.file_uploader("Escolha um arquivo", type=["xlsx"], key="fuels")
+    file = upload_file("forestry_fuels")
 
     if file is not None:
-        df = pd.read_excel(file)
-
-        forestry_fuels = ForestryFuels(df)
-        processed = forestry_fuels.preparation()
-
-        result = pd.DataFrame({
-            "Emissões CO2 (kgCO2)": [processed["Emissões CO2 (kgCO2)"].sum()],
-            "Emissões CO2 - biogênico (kgCO2)": [processed["Emissões CO2 - biogênico (kgCO2)"].sum()],
-            "Emissões CH4 (kgCH4)": [processed["Emissões CH4 (kgCH4)"].sum()],
-            "Emissões N2O (kgN2O)": [processed["Emissões N2O (kgN2O)"].sum()],
-            "Emissões Fósseis Combustão (tCO2e)": [processed["Emissões Fósseis Combustão (tCO2e)"].sum()],
-            "Emissões Biogênicas Combustão (tCO2e)": [processed["Emissões Biogênicas Combustão (tCO2e)"].sum()],
-            "Emissões CO2 LUC - Produção (tCO2)": [processed["Emissões CO2 LUC - Produção (tCO2)"].sum()],
-            "Emissões Fósseis Totais (tCO2e)": [processed["Emissões Fósseis Totais (tCO2e)"].sum()],
-            "Emissões Biogênicas Totais (tCO2e)": [processed["Emissões Biogênicas Totais (tCO2e)"].sum()],
-        })
+        processed, _ = run_cached("forestry_fuels", file)
 
         st.dataframe(processed, hide_index=True)
 
-        st.title('Resultados')
-        st.dataframe(result, hide_index=True, use_container_width=True)
+        show_results("forestry_fuels", processed)
 
         st.toast("Processamento concluído com sucesso!")
\ No newline at end of file
@@ -0,0 +1,345 @@
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from processing.ledger import aggregate, build_ledger
+from processing.registry import summarize
+from processing.streaming import run_in_chunks
+from utils.profiling import Profiler, stage
+from utils.result_cache import factor_set_version
+
+# Acima desta fração de linhas alteradas, recalcula a planilha inteira
+FULL_RECOMPUTE_FRACTION = 0.5
+
+INSERTED = "Inserida"
+MODIFIED = "Alterada"
+REMOVED = "Removida"
+
+
+def no_changes() -> pd.DataFrame:
+    """Tabela de linhas alteradas vazia (ver IncrementalResult.changes)."""
+    return pd.DataFrame(columns=["Linha", "Situação"])
+
+
+@dataclass
+class IncrementalResult:
+    """
+    Resultado de um módulo com o necessário para, no próximo envio da
+    planilha, recalcular apenas as linhas inseridas, alteradas ou removidas.
+    """
+
+    key: str
+    columns: list
+    # hash do conteúdo de cada linha de entrada
+    hashes: np.ndarray
+    processed: pd.DataFrame
+    # instância da classe do módulo, com `df`, `missing_factors`,
+    # `missing_rows` e `diagnostics` ajustados à planilha inteira
+    instance: object
+    # resumo de uma linha ("Resultados", ver processing.registry.summarize)
+    summary: pd.DataFrame
+    # totais por escopo e categoria do livro de emissões (ver processing.ledger)
+    scope_totals: pd.DataFrame
+    # versão das planilhas de fatores do cálculo (ver utils.result_cache)
+    factor_version: str = ""
+    # linhas alteradas em relação ao envio anterior: "Linha", "Situação"
+    changes: pd.DataFrame = field(default_factory=no_changes)
+    recomputed: int = 0
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash do conteúdo de cada linha (independente do índice)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def match_rows(previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """
+    Associa cada linha atual a uma linha anterior de mesmo conteúdo. Linhas
+    repetidas são associadas na ordem em que aparecem.
+
+    :param previous: Hashes das linhas anteriores.
+    :param current: Hashes das linhas atuais.
+    :return: Posição da linha anterior de cada linha atual (-1 se não houver).
+    """
+    def keyed(hashes):
+        frame = pd.DataFrame({"hash": hashes, "position": np.arange(len(hashes))})
+        frame["occurrence"] = frame.groupby("hash", sort=False).cumcount()
+        return frame
+
+    matched = keyed(current).merge(
+        keyed(previous), on=["hash", "occurrence"], how="left", suffixes=("", "_previous")
+    )
+    return matched["position_previous"].fillna(-1).to_numpy(dtype=np.int64)
+
+
+def scope_totals(key: str, processed: pd.DataFrame) -> pd.DataFrame:
+    """Totais longos por escopo e categoria (ver processing.ledger.aggregate)."""
+    return aggregate(build_ledger(key, processed), ["Escopo", "Categoria"])
+
+
+def _patch_totals(totals: pd.DataFrame, removed: pd.DataFrame, added: pd.DataFrame):
+    keys = ["Escopo", "Categoria", "Unidade"]
+
+    def indexed(frame):
+        return frame.astype({column: str for column in keys}).set_index(keys)["Valor"]
+
+    patched = indexed(totals).sub(indexed(removed), fill_value=0).add(
+        indexed(added), fill_value=0
+    )
+    return patched.reset_index()
+
+
+def _merge_rows(
+    previous: pd.DataFrame,
+    delta: pd.DataFrame,
+    current_position: np.ndarray,
+    new_rows: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Junta as entradas por linha ("Linha" = posição da linha, como em
+    `diagnostics` e `missing_rows`) das linhas mantidas do resultado anterior
+    às das linhas recalculadas, com "Linha" na posição da planilha atual.
+
+    :param previous: Entradas do resultado anterior.
+    :param delta: Entradas do cálculo das linhas inseridas ou alteradas.
+    :param current_position: Posição atual de cada linha anterior (-1 se
+        removida ou alterada).
+    :param new_rows: Posição atual de cada linha recalculada.
+    :return: Entradas da planilha atual, ordenadas por "Linha".
+    """
+    kept = previous.assign(
+        Linha=current_position[previous["Linha"].to_numpy(dtype=np.int64)]
+    )
+    kept = kept[kept["Linha"] >= 0]
+    delta = delta.assign(Linha=new_rows[delta["Linha"].to_numpy(dtype=np.int64)])
+    return pd.concat([kept, delta], ignore_index=True).sort_values(
+        "Linha", kind="stable", ignore_index=True
+    )
+
+
+def full_result(key: str, df: pd.DataFrame, progress=None) -> IncrementalResult:
+    """
+    Calcula o módulo sobre a planilha inteira, guardando os hashes das linhas.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param df: Dados de entrada.
+    :param progress: Andamento do cálculo (ver processing.streaming.run_in_chunks).
+    :return: Resultado completo.
+    """
+    with stage("Hash das linhas"):
+        hashes = row_hashes(df)
+    columns = list(df.columns)
+
+    processed, instance = run_in_chunks(key, df, progress=progress)
+
+    with stage("Totais"):
+        summary = summarize(key, processed)
+        totals = scope_totals(key, processed)
+
+    return IncrementalResult(
+        key=key,
+        columns=columns,
+        hashes=hashes,
+        processed=processed,
+        instance=instance,
+        summary=summary,
+        scope_totals=totals,
+        factor_version=factor_set_version(),
+        recomputed=len(processed),
+    )
+
+
+def classify_changes(old_positions: np.ndarray, previous_rows: int) -> pd.DataFrame:
+    """
+    Situação das linhas sem correspondente: uma linha nova na mesma posição
+    de uma linha anterior que deixou de existir é "Alterada"; as demais são
+    "Inserida" (posição atual) ou "Removida" (posição anterior).
+    """
+    new_rows = np.flatnonzero(old_positions < 0)
+
+    kept = np.zeros(previous_rows, dtype=bool)
+    kept[old_positions[old_positions >= 0]] = True
+    gone = np.flatnonzero(~kept)
+
+    modified = np.intersect1d(new_rows, gone, assume_unique=True)
+    inserted = np.setdiff1d(new_rows, modified, assume_unique=True)
+    removed = np.setdiff1d(gone, modified, assume_unique=True)
+
+    changes = pd.DataFrame(
+        {
+            "Linha": np.concatenate([modified, inserted, removed]),
+            "Situação": [MODIFIED] * len(modified)
+            + [INSERTED] * len(inserted)
+            + [REMOVED] * len(removed),
+        }
+    )
+    return changes.sort_values("Linha", kind="stable", ignore_index=True)
+
+
+def update_result(
+    key: str, df: pd.DataFrame, previous: IncrementalResult | None = None, progress=None
+) -> IncrementalResult:
+    """
+    Calcula o módulo reaproveitando o resultado do envio anterior.
+
+    As linhas são comparadas pelo hash do conteúdo: só as linhas inseridas
+    ou alteradas são calculadas; as demais são copiadas do resultado
+    anterior. O resumo e os totais por escopo são corrigidos pela diferença
+    (menos as linhas que saíram, mais as recalculadas), sem somar a planilha
+    inteira de novo. Sem resultado anterior compatível (outro módulo, outras
+    colunas ou outra versão das planilhas de fatores), ou com muitas linhas
+    alteradas, calcula tudo.
+
+    Os módulos calculam cada linha de forma independente, o que permite
+    combinar linhas de execuções diferentes.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param df: Dados de entrada.
+    :param previous: Resultado do envio anterior.
+    :param progress: Andamento do cálculo (ver processing.streaming.run_in_chunks).
+    :return: Resultado da planilha inteira, com as linhas alteradas.
+    """
+    if previous is None or previous.key != key or previous.columns != list(df.columns):
+        return full_result(key, df, progress)
+
+    factor_version = factor_set_version()
+
+    with stage("Hash das linhas"):
+        hashes = row_hashes(df)
+
+    with stage("Comparação das linhas"):
+        old_positions = match_rows(previous.hashes, hashes)
+        new_rows = np.flatnonzero(old_positions < 0)
+        kept = np.zeros(len(previous.hashes), dtype=bool)
+        kept[old_positions[old_positions >= 0]] = True
+        removed_rows = np.flatnonzero(~kept)
+
+    if (
+        previous.factor_version != factor_version
+        or len(new_rows) > FULL_RECOMPUTE_FRACTION * len(df)
+    ):
+        result = full_result(key, df, progress)
+        result.changes = classify_changes(old_positions, len(previous.hashes))
+        return result
+
+    delta, instance = run_in_chunks(
+        key, df.iloc[new_rows].reset_index(drop=True), progress=progress
+    )
+
+    with stage("Montagem do resultado"):
+        # posição de cada linha atual em [resultado anterior, linhas recalculadas]
+        order = old_positions.copy()
+        order[new_rows] = len(previous.processed) + np.arange(len(new_rows))
+        processed = pd.concat([previous.processed, delta], ignore_index=True)
+        processed = processed.take(order).reset_index(drop=True)
+
+    with stage("Totais"):
+        removed = previous.processed.iloc[removed_rows]
+        summary = previous.summary.sub(summarize(key, removed), fill_value=0).add(
+            summarize(key, delta), fill_value=0
+        )
+        totals = _patch_totals(
+            previous.scope_totals,
+            scope_totals(key, removed),
+            scope_totals(key, delta),
+        )
+
+    # "Linha" dos diagnósticos e dos fatores ausentes: posição no resultado
+    # de cada execução
+    current_position = np.full(len(previous.hashes), -1)
+    current_position[old_positions[old_positions >= 0]] = np.flatnonzero(
+        old_positions >= 0
+    )
+
+    diagnostics = getattr(previous.instance, "diagnostics", None)
+    if diagnostics is not None:
+        instance.diagnostics = _merge_rows(
+            diagnostics, instance.diagnostics, current_position, new_rows
+        )
+
+    # fatores ausentes: os das linhas mantidas e os das recalculadas, na
+    # ordem em que apareceram
+    rows = getattr(previous.instance, "missing_rows", None)
+    if rows is not None:
+        instance.missing_rows = _merge_rows(
+            rows, instance.missing_rows, current_position, new_rows
+        )
+        present = set(instance.missing_rows["Fator"])
+        instance.missing_factors = [
+            name
+            for name in dict.fromkeys(
+                [*previous.instance.missing_factors, *instance.missing_factors]
+            )
+            if name in present
+        ]
+
+    instance.df = processed
+
+    return IncrementalResult(
+        key=key,
+        columns=list(df.columns),
+        hashes=hashes,
+        processed=processed,
+        instance=instance,
+        summary=summary,
+        scope_totals=totals,
+        factor_version=factor_version,
+        changes=classify_changes(old_positions, len(previous.hashes)),
+        recomputed=len(new_rows),
+    )
+
+
+def shared_result(result: IncrementalResult) -> IncrementalResult:
+    """
+    O resultado sem as linhas alteradas e recalculadas, que se referem ao
+    envio anterior de uma sessão, para guardar no cache compartilhado.
+    """
+    return replace(result, changes=no_changes(), recomputed=0)
+
+
+def changes_since(
+    result: IncrementalResult, previous: IncrementalResult | None
+) -> IncrementalResult:
+    """
+    O resultado com as linhas alteradas em relação ao envio anterior da
+    sessão, sem recalcular nada (ex.: um resultado do cache compartilhado,
+    calculado por outra sessão).
+
+    :param result: Resultado sem linhas alteradas (ver `shared_result`).
+    :param previous: Resultado do envio anterior da sessão.
+    """
+    if previous is None or previous.key != result.key or previous.columns != result.columns:
+        return result
+
+    old_positions = match_rows(previous.hashes, result.hashes)
+    return replace(result, changes=classify_changes(old_positions, len(previous.hashes)))
+
+
+def profile_update(
+    key: str,
+    source,
+    previous: IncrementalResult | None = None,
+    use_cprofile: bool = False,
+    sheet_name=0,
+    progress=None,
+):
+    """
+    Lê a planilha e executa `update_result` medindo cada etapa (ver
+    processing.registry.profile_module).
+
+    :param progress: Andamento do cálculo (ver processing.streaming.run_in_chunks).
+
+    :return: Tupla (resultado, relatório de desempenho).
+    """
+    with Profiler(key, use_cprofile) as profiler:
+        if isinstance(source, pd.DataFrame):
+            df = source
+        else:
+            if progress is not None:
+                progress(0.0, "Lendo a planilha")
+            with stage("Leitura da planilha"):
+                df = pd.read_excel(source, sheet_name=sheet_name)
+        result = update_result(key, df, previous, progress)
+    profiler.rows = len(df)
+    return result, profiler.report()
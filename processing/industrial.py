@@ -2,62 +2,80 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 
-from utils.emission_factors import get_emission_factor
-
-
-class Industrial:
+from utils.emission_factors import get_emission_factors
+from utils.profiling import stage
+from utils.factor_repository import get_repository
+from processing.diagnostics import (
+    DiagnosticsMixin,
+    empty_diagnostics,
+    empty_missing_rows,
+    missing_rows,
+)
+from processing.ui import run_cached, show_results, upload_file
+
+# Unidade das quantidades sem unidade informada
+INPUT_UNIT = "t"
+
+
+class Industrial(DiagnosticsMixin):
     def __init__(self, df: pd.DataFrame):
         self.df = df
-        self.gwp_factors = pd.read_excel("data/lca/gwp_kyoto.xlsx")
+        self.gwp_factors = get_repository().frame("data/lca/gwp_kyoto.xlsx")
+        self.diagnostics = empty_diagnostics()
+        self.missing_factors = []
+        self.missing_rows = empty_missing_rows()
 
     def process(self):
         self.df["Quantidade"] = self.df["Quantidade"].fillna(0)
 
-        self.df["Fonte do Fator de Emissão"] = self.df[
-            "Nome no Estudo (Ecoinvent)"
-        ].apply(
-            lambda x: (
-                get_emission_factor(x, "source")
-                if get_emission_factor(x, "source")
-                else "Não encontrado"
+        with stage("Fatores de emissão"):
+            names = self.df["Nome no Estudo (Ecoinvent)"]
+            factors = get_emission_factors(
+                names,
+                [
+                    "source",
+                    "fossil_emission_factor",
+                    "biogenic_emission_factor",
+                    "biogenic_removal_factor",
+                    "luc_emission_factor",
+                    "unit",
+                ],
+                defaults={"source": "Não encontrado"},
+            )
+            self.missing_factors = factors.attrs["missing"]
+            self.missing_rows = missing_rows(names, names.isin(self.missing_factors))
+
+            self.df["Fonte do Fator de Emissão"] = factors["source"]
+            self.df["Fator de Emissão Fóssil"] = factors["fossil_emission_factor"]
+            self.df["Fator de Emissão Biogênico"] = factors["biogenic_emission_factor"]
+            self.df["Fator de Remoção Biogênica"] = factors["biogenic_removal_factor"]
+            self.df["Fator de Emissão LUC"] = factors["luc_emission_factor"]
+            self.df["Unidade - Fator"] = factors["unit"]
+
+        with stage("Unidades"):
+            self.df["Quantidade - Unidade do Fator"] = self.convert_quantities(
+                "Nome no Estudo (Ecoinvent)", INPUT_UNIT, ~names.isin(factors.attrs["missing"])
             )
-        )
-
-        self.df["Fator de Emissão Fóssil"] = self.df[
-            "Nome no Estudo (Ecoinvent)"
-        ].apply(lambda x: get_emission_factor(x, "fossil_emission_factor"))
-
-        self.df["Fator de Emissão Biogênico"] = self.df[
-            "Nome no Estudo (Ecoinvent)"
-        ].apply(lambda x: get_emission_factor(x, "biogenic_emission_factor"))
-
-        self.df["Fator de Remoção Biogênica"] = self.df[
-            "Nome no Estudo (Ecoinvent)"
-        ].apply(lambda x: get_emission_factor(x, "biogenic_removal_factor"))
-
-        self.df["Fator de Emissão LUC"] = self.df["Nome no Estudo (Ecoinvent)"].apply(
-            lambda x: get_emission_factor(x, "luc_emission_factor")
-        )
 
-        self.df["Unidade - Fator"] = self.df["Nome no Estudo (Ecoinvent)"].apply(
-            lambda x: get_emission_factor(x, "unit")
-        )
+        with stage("Emissões"):
+            # fatores em kgCO2e por unidade, emissões em tCO2e
+            quantity = self.df["Quantidade - Unidade do Fator"] / 1000
 
-        self.df["Emissões Fósseis (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Emissão Fóssil"]
-        )
+            self.df["Emissões Fósseis (tCO2e)"] = (
+                quantity * self.df["Fator de Emissão Fóssil"]
+            )
 
-        self.df["Emissões Biogênicas (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Emissão Biogênico"]
-        )
+            self.df["Emissões Biogênicas (tCO2e)"] = (
+                quantity * self.df["Fator de Emissão Biogênico"]
+            )
 
-        self.df["Remoções biogênicas (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Remoção Biogênica"]
-        )
+            self.df["Remoções biogênicas (tCO2e)"] = (
+                quantity * self.df["Fator de Remoção Biogênica"]
+            )
 
-        self.df["Emissões LUC (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Emissão LUC"]
-        )
+            self.df["Emissões LUC (tCO2e)"] = (
+                quantity * self.df["Fator de Emissão LUC"]
+            )
 
         return self.df
 
@@ -70,13 +88,19 @@ def test_industrial():
         else:
             return [""] * len(row)
 
-    file = st.file_uploader("Escolha um arquivo", type=["xlsx"], key="industrial")
+    file = upload_file("industrial")
 
     if file is None:
         return
 
-    industrial = Industrial(pd.read_excel(file)).process()
+    industrial, instance = run_cached("industrial", file)
 
     st.dataframe(
         industrial.style.apply(highlight_empty_factor, axis=1), hide_index=True
     )
+
+    if not instance.diagnostics.empty:
+        st.warning("Algumas linhas não puderam ser calculadas completamente.")
+        st.dataframe(instance.diagnostics, hide_index=True)
+
+    show_results("industrial", industrial)
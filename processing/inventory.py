@@ -0,0 +1,387 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+import streamlit as st
+
+from processing.ledger import build_ledger, concat_ledgers, consolidated_view, empty_ledger, totals
+from processing.registry import MONTHS, get_module, run_module, summarize
+from utils.factor_repository import get_repository
+from processing.ui import cached_result, result_key, show_export, upload_file
+from processing.uncertainty import (
+    BLEND_FRACTION,
+    DISTRIBUTIONS,
+    Distribution,
+    UncertaintySettings,
+    run_uncertainty,
+)
+
+INVENTORY_PATH = "data/lca/Copy of REV_241119_ICV_FeSiMg_v1.xlsx"
+
+GRID_FACTORS_PATH = "data/lca/factors/grid_factors.xlsx"
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """Aba de um inventário completo e como enviá-la ao seu módulo."""
+
+    sheet: str
+    module: str
+    # colunas de entrada do módulo; as colunas calculadas da planilha são descartadas
+    inputs: list
+    # nome da coluna na planilha -> nome esperado pelo módulo
+    column_aliases: dict = field(default_factory=dict)
+    # referência das quantidades da aba, se não forem absolutas (ver
+    # processing.ledger.build_ledger)
+    basis: str | None = None
+
+
+INVENTORY_SHEETS = [
+    SheetSpec(
+        sheet="Florestal (Combustíveis)",
+        module="forestry_fuels",
+        inputs=[
+            "Unidade Florestal",
+            "Categoria Inv. GEE",
+            "Área",
+            "Combustível (Nomenclatura Inv. GEE)",
+            "Combustível (Nomenclatura Pegada de Carbono)",
+            "Consumo",
+            "Unidade de medida",
+            "Rastreabilidade",
+        ],
+    ),
+    SheetSpec(
+        sheet="Florestal (Fertilizantes)",
+        module="forestry_fertilizers",
+        inputs=[
+            "Unidade Florestal",
+            "Fertilizante",
+            "Fertilizante Nitrogenado ou Ureia",
+            "Teor de Nitrogênio (%)",
+            "Calcário Calcítico ou Dolomítico",
+            "Teor de CaO (%)",
+            "Teor de MgO (%)",
+            "Quantidade utilizada",
+            "Unidade",
+            "Classificação",
+            "Nome no Estudo",
+            "Tipo Dado / Confiabilidade do Dado",
+            "Rastreabilidade",
+        ],
+    ),
+    SheetSpec(
+        sheet="Florestal (Energia Elétrica)",
+        module="forestry_energy",
+        inputs=[
+            "Ano",
+            "Unidade Florestal",
+            "Fonte de Energia",
+            *[f"Consumo - {month}" for month in MONTHS],
+            "Unidade de medida",
+            "Rastreabilidade",
+        ],
+        column_aliases={f"Consumo - {month[:3]}": f"Consumo - {month}" for month in MONTHS},
+    ),
+    SheetSpec(
+        sheet="Carbonização",
+        module="carbonization",
+        inputs=[
+            "Unidade Florestal",
+            "Rendimento Gravimétrico (%)",
+            "Produção de Carvão Vegetal",
+            "Unidade",
+            "Classificação",
+            "Observação",
+            "Rastreabilidade",
+        ],
+    ),
+    SheetSpec(
+        sheet="Transporte",
+        module="transport",
+        inputs=[
+            "Unidade Operacional",
+            "Insumo",
+            "Fornecedor",
+            "Tipo de transporte",
+            "Combustível (Nomenclatura Inv. GEE)",
+            "Distância (km)",
+            "Tipo de veículo",
+            "Carga transportada (t)",
+            "Combustível (Nomenclatura Pegada de Carbono)",
+            "Rastreabilidade",
+        ],
+        # a carga é por tonelada de produto, então as emissões também
+        column_aliases={"Carga transporada (ton)/ton FeSiMg": "Carga transportada (t)"},
+        basis="ton FeSiMg",
+    ),
+    SheetSpec(
+        sheet="Industrial",
+        module="industrial",
+        inputs=[
+            "Entrada/Saída",
+            "Classificação",
+            "Nome RIMA",
+            "Etapa Industrial",
+            "Nome no Estudo (Ecoinvent)",
+            "Quantidade",
+            "Unidade",
+            "Tipo Dado / Confiabilidade do Dado",
+            "Observação",
+        ],
+        # quantidades por tonelada de produto
+        basis="ton FeSiMg",
+    ),
+    SheetSpec(
+        sheet="Mineração de Quartzo Rima",
+        module="quartz_mining",
+        inputs=[
+            "Entrada/Saída",
+            "Item",
+            "Processo",
+            "Quantidade",
+            "Unidade",
+            "Nome no estudo",
+            "Observação",
+        ],
+    ),
+]
+
+
+@dataclass
+class InventoryResult:
+    """Resultado do cálculo de um inventário completo."""
+
+    # nome da aba -> DataFrame processado pelo módulo
+    results: dict = field(default_factory=dict)
+    # nome da aba -> resumo de uma linha do módulo ("Resultados")
+    summaries: dict = field(default_factory=dict)
+    # nome da aba -> fatores não encontrados
+    missing_factors: dict = field(default_factory=dict)
+    # nome da aba -> mensagem de erro
+    errors: dict = field(default_factory=dict)
+    # nome da aba -> tempo de cálculo (s)
+    timings: dict = field(default_factory=dict)
+    # livro de emissões de todas as abas (ver processing.ledger)
+    ledger: pd.DataFrame = field(default_factory=empty_ledger)
+    consolidated: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+
+def latest_grid_year() -> int:
+    """Ano mais recente da tabela de fatores do grid."""
+    return int(get_repository().frame(GRID_FACTORS_PATH)["year"].max())
+
+
+def prepare_sheet(spec: SheetSpec, df: pd.DataFrame, year: int) -> pd.DataFrame:
+    """
+    Converte uma aba do inventário na entrada do módulo: renomeia as colunas
+    com nomes alternativos, mantém só as colunas de entrada e descarta linhas
+    vazias. Colunas de entrada ausentes ficam vazias; linhas sem "Ano"
+    recebem `year`.
+    """
+    df = df.rename(columns=spec.column_aliases)
+    df = df.reindex(columns=spec.inputs).dropna(how="all").reset_index(drop=True)
+
+    if "Ano" in spec.inputs:
+        df["Ano"] = df["Ano"].fillna(year)
+
+    return df
+
+
+def run_sheet(spec: SheetSpec, df: pd.DataFrame) -> tuple[pd.DataFrame, object, float]:
+    started = time.perf_counter()
+    processed, instance = run_module(spec.module, df)
+    return processed, instance, time.perf_counter() - started
+
+
+def run_inventory(
+    source=INVENTORY_PATH,
+    year: int | None = None,
+    max_workers: int | None = None,
+    sheets: list[SheetSpec] | None = None,
+    progress=None,
+) -> InventoryResult:
+    """
+    Calcula um inventário completo em uma única chamada.
+
+    A planilha é aberta uma vez e apenas as abas conhecidas são lidas. Os
+    fatores são carregados uma vez no processo (ver FactorRepository) e cada
+    aba é calculada pelo seu módulo em paralelo, em um pool de threads que
+    compartilha esses fatores. Abas ausentes são ignoradas; erros de uma aba
+    não interrompem as demais.
+
+    :param source: Caminho ou arquivo da planilha de inventário.
+    :param year: Ano dos fatores do grid para abas sem a coluna "Ano"
+        (padrão: o ano mais recente da tabela de fatores).
+    :param max_workers: Número de threads (padrão: uma por aba).
+    :param sheets: Abas a calcular (padrão: INVENTORY_SHEETS).
+    :param progress: Função chamada a cada aba concluída com a fração
+        concluída e uma mensagem (ver processing.jobs).
+    :return: Resultados por aba, o livro de emissões e a visão consolidada.
+    """
+    sheets = sheets or INVENTORY_SHEETS
+    year = year or latest_grid_year()
+    result = InventoryResult()
+    ledgers = []
+
+    if progress is not None:
+        progress(0.0, "Lendo a planilha")
+    with pd.ExcelFile(source) as workbook:
+        available = [spec for spec in sheets if spec.sheet in workbook.sheet_names]
+        inputs = {
+            spec.sheet: prepare_sheet(spec, workbook.parse(spec.sheet), year)
+            for spec in available
+        }
+
+    # carrega as tabelas de fatores de cada módulo antes de abrir o pool
+    for spec in available:
+        get_module(spec.module).load()(inputs[spec.sheet].head(0))
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(available), 1)) as executor:
+        futures = {
+            spec.sheet: executor.submit(run_sheet, spec, inputs[spec.sheet])
+            for spec in available
+        }
+
+        for done, spec in enumerate(available, start=1):
+            try:
+                processed, instance, seconds = futures[spec.sheet].result()
+            except Exception as e:
+                result.errors[spec.sheet] = f"{type(e).__name__}: {e}"
+                continue
+            finally:
+                if progress is not None:
+                    progress(done / len(available), f"{spec.sheet} calculada")
+
+            result.results[spec.sheet] = processed
+            result.summaries[spec.sheet] = summarize(spec.module, processed)
+            result.missing_factors[spec.sheet] = list(instance.missing_factors)
+            result.timings[spec.sheet] = seconds
+            ledgers.append(build_ledger(spec.module, processed, spec.basis))
+
+    result.ledger = concat_ledgers(ledgers)
+    result.consolidated = consolidated_view(result.ledger)
+
+    return result
+
+
+def test_inventory():
+    file = upload_file("inventory")
+    if file is None:
+        return
+
+    inventory = cached_result(
+        "inventory", file, lambda upload, progress: run_inventory(upload, progress=progress)
+    )
+
+    for sheet, error in inventory.errors.items():
+        st.error(f"{sheet}: {error}")
+
+    st.title("Resultados Consolidados")
+    st.dataframe(inventory.consolidated, hide_index=True, use_container_width=True)
+
+    scope_totals = totals(inventory.ledger, ["Escopo"])
+    st.subheader("Totais por escopo")
+    st.dataframe(scope_totals, hide_index=True, use_container_width=True)
+
+    show_export(
+        "inventario",
+        {
+            "Resultados Consolidados": inventory.consolidated,
+            "Totais por escopo": scope_totals,
+            **inventory.results,
+        },
+    )
+
+    show_uncertainty(inventory, result_key("inventory"))
+
+    for sheet, processed in inventory.results.items():
+        with st.expander(f"{sheet} · {len(processed)} linhas · {inventory.timings[sheet]:.3f}s"):
+            if inventory.missing_factors[sheet]:
+                st.warning(
+                    "Fatores não encontrados: "
+                    + ", ".join(str(name) for name in inventory.missing_factors[sheet])
+                )
+            st.dataframe(inventory.summaries[sheet], hide_index=True, use_container_width=True)
+            st.dataframe(processed, hide_index=True)
+
+
+def show_uncertainty(inventory: InventoryResult, inventory_key):
+    """
+    Análise de incerteza (Monte Carlo) do inventário: percentis por módulo e
+    consolidados (ver processing.uncertainty).
+
+    O relatório fica na sessão junto da chave do inventário e das opções da
+    simulação, e só é exibido enquanto ambas forem as mesmas.
+
+    :param inventory: Inventário calculado.
+    :param inventory_key: Chave do cache do inventário (ver processing.ui.result_key).
+    """
+    modules = {spec.sheet: spec.module for spec in INVENTORY_SHEETS}
+
+    with st.expander("Incerteza (Monte Carlo)"):
+        quantity_column, factor_column, blend_column = st.columns(3)
+        with quantity_column:
+            quantity_kind = st.selectbox("Quantidades", DISTRIBUTIONS, key="uncertainty_quantity")
+            quantity_spread = st.number_input(
+                "Dispersão das quantidades",
+                min_value=0.0,
+                value=0.05,
+                key="uncertainty_quantity_spread",
+            )
+        with factor_column:
+            factor_kind = st.selectbox(
+                "Fatores", DISTRIBUTIONS, index=1, key="uncertainty_factor"
+            )
+            factor_spread = st.number_input(
+                "Dispersão dos fatores", min_value=0.0, value=1.2, key="uncertainty_factor_spread"
+            )
+        with blend_column:
+            blend_kind = st.selectbox(
+                BLEND_FRACTION, DISTRIBUTIONS, index=2, key="uncertainty_blend"
+            )
+            blend_spread = st.number_input(
+                f"Dispersão da {BLEND_FRACTION.lower()}",
+                min_value=0.0,
+                value=0.1,
+                key="uncertainty_blend_spread",
+            )
+        iterations = st.number_input(
+            "Iterações", min_value=100, value=10_000, step=1000, key="uncertainty_iterations"
+        )
+
+        options = (
+            quantity_kind,
+            quantity_spread,
+            factor_kind,
+            factor_spread,
+            blend_kind,
+            blend_spread,
+            int(iterations),
+        )
+
+        if st.button("Executar simulação", key="uncertainty_run"):
+            try:
+                settings = UncertaintySettings(
+                    quantity=Distribution(quantity_kind, quantity_spread),
+                    factor=Distribution(factor_kind, factor_spread),
+                    parameters={BLEND_FRACTION: Distribution(blend_kind, blend_spread)},
+                )
+            except ValueError as e:
+                st.error(str(e))
+                return
+
+            with st.spinner("Simulando..."):
+                report = run_uncertainty(
+                    {modules[sheet]: processed for sheet, processed in inventory.results.items()},
+                    settings,
+                    int(iterations),
+                )
+            st.session_state["inventory_uncertainty"] = (inventory_key, options, report)
+
+        report_key, report_options, report = st.session_state.get(
+            "inventory_uncertainty", (None, None, None)
+        )
+        if report is not None and (report_key, report_options) == (inventory_key, options):
+            st.dataframe(report, hide_index=True, use_container_width=True)
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Cálculos simultâneos de todas as sessões; os demais esperam na fila
+JOB_WORKERS = max((os.cpu_count() or 1) - 1, 1)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Interrompe um cálculo cancelado pelo usuário (ver `Job.report`)."""
+
+
+class Job:
+    """
+    Cálculo em segundo plano: andamento informado pelo próprio cálculo e
+    cancelamento entre blocos.
+
+    O cálculo recebe `report` como função de andamento (ver
+    processing.streaming.run_in_chunks); depois de `cancel`, a próxima
+    chamada de `report` lança JobCancelled e o cálculo para.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.progress = 0.0
+        self.message = "Na fila"
+        self.started = time.perf_counter()
+        self.cancelled = threading.Event()
+        self.future: Future | None = None
+
+    def report(self, fraction: float, message: str | None = None):
+        """
+        Registra o andamento do cálculo.
+
+        :param fraction: Fração concluída (0 a 1).
+        :param message: Descrição da etapa atual.
+        :raises JobCancelled: O job foi cancelado.
+        """
+        if self.cancelled.is_set():
+            raise JobCancelled(self.name)
+
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def cancel(self):
+        """Cancela o job: sai da fila ou para no próximo bloco."""
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def result(self, timeout: float | None = None):
+        """
+        Resultado do cálculo, esperando até `timeout` segundos.
+
+        :raises concurrent.futures.TimeoutError: Ainda em andamento.
+        :raises JobCancelled: O job foi cancelado.
+        """
+        if self.cancelled.is_set():
+            raise JobCancelled(self.name)
+        return self.future.result(timeout)
+
+
+def get_job_executor() -> ThreadPoolExecutor:
+    """
+    Obtém o pool de threads dos jobs, compartilhado por todas as sessões do
+    servidor (as threads compartilham também as tabelas de fatores já
+    carregadas, ver utils.factor_repository).
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(JOB_WORKERS, thread_name_prefix="lca-job")
+
+    return _executor
+
+
+def submit_job(name: str, function, *args) -> Job:
+    """
+    Executa `function(*args, progress=job.report)` em segundo plano.
+
+    :param name: Identificação do job (ex.: o nome do módulo).
+    :param function: Cálculo; deve aceitar o argumento `progress`.
+    :return: Job em andamento.
+    """
+    job = Job(name)
+
+    def run():
+        job.report(0.0, "Calculando")
+        return function(*args, progress=job.report)
+
+    job.future = get_job_executor().submit(run)
+    return job
@@ -0,0 +1,300 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from processing.registry import MODULES, MONTHS, get_module
+
+FOSSIL = "Emissões Fósseis"
+BIOGENIC = "Emissões Biogênicas"
+REMOVAL = "Remoções Biogênicas"
+LUC = "Emissões LUC"
+CH4 = "CH4"
+N2O = "N2O"
+
+CATEGORIES = [FOSSIL, BIOGENIC, REMOVAL, LUC, CH4, N2O]
+
+# Categorias em tCO2e que compõem o balanço consolidado
+CONSOLIDATED_CATEGORIES = [FOSSIL, BIOGENIC, REMOVAL, LUC]
+
+SCOPES = ["Escopo 1", "Escopo 2", "Escopo 3"]
+
+LEDGER_COLUMNS = ["Módulo", "Linha", "Etapa", "Escopo", "Categoria", "Unidade", "Valor"]
+
+
+@dataclass(frozen=True)
+class LedgerSource:
+    """Colunas do resultado de um módulo que formam uma categoria do livro."""
+
+    # colunas somadas para obter o valor de cada linha
+    columns: tuple
+    category: str
+    # None: escopo definido linha a linha (ver ROW_SCOPES)
+    scope: str | None = None
+    unit: str = "tCO2e"
+
+
+def _industrial_scopes(df: pd.DataFrame, name_column: str) -> np.ndarray:
+    """
+    Escopo de cada item: energia comprada no escopo 2, resíduos e combustão
+    própria no escopo 1 e os demais insumos (produção a montante) no escopo 3.
+    """
+    classification = df.get("Classificação", pd.Series(index=df.index, dtype=object))
+    names = df[name_column].astype(str)
+    return np.select(
+        [
+            names.str.startswith("Combustão").to_numpy(),
+            (classification == "Resíduo").to_numpy(),
+            (classification == "Energia").to_numpy()
+            | names.str.startswith("Energia").to_numpy(),
+        ],
+        ["Escopo 1", "Escopo 1", "Escopo 2"],
+        "Escopo 3",
+    )
+
+
+ROW_SCOPES = {
+    "industrial": lambda df: _industrial_scopes(df, "Nome no Estudo (Ecoinvent)"),
+    "quartz_mining": lambda df: _industrial_scopes(df, "Nome no estudo"),
+}
+
+# Coluna que define a etapa de cada linha; módulos sem ela usam o próprio rótulo
+STAGE_COLUMNS = {
+    "industrial": "Etapa Industrial",
+    "quartz_mining": "Processo",
+}
+
+LEDGER_SOURCES = {
+    "forestry_fuels": [
+        LedgerSource(("Emissões Fósseis Combustão (tCO2e)",), FOSSIL, "Escopo 1"),
+        LedgerSource(("Emissões Biogênicas Combustão (tCO2e)",), BIOGENIC, "Escopo 1"),
+        LedgerSource(("Emissões CO2 Fósseis - Produção (tCO2)",), FOSSIL, "Escopo 3"),
+        LedgerSource(("Emissões CO2 Biogênico - Produção (tCO2)",), BIOGENIC, "Escopo 3"),
+        LedgerSource(("Emissões CO2 LUC - Produção (tCO2)",), LUC, "Escopo 3"),
+        LedgerSource(("Emissões CH4 (kgCH4)",), CH4, "Escopo 1", "kgCH4"),
+        LedgerSource(("Emissões N2O (kgN2O)",), N2O, "Escopo 1", "kgN2O"),
+    ],
+    "forestry_fertilizers": [
+        LedgerSource(("Emissões Uso tCO2e",), FOSSIL, "Escopo 1"),
+        LedgerSource(("Emissões Fósseis Produção tCO2e",), FOSSIL, "Escopo 3"),
+        LedgerSource(("Emissões Biogênicas Produção tCO2e",), BIOGENIC, "Escopo 3"),
+        LedgerSource(("Emissões LUC Produção tCO2e",), LUC, "Escopo 3"),
+        LedgerSource(("Emissões kgN2O",), N2O, "Escopo 1", "kgN2O"),
+    ],
+    "forestry_energy": [
+        LedgerSource(("Emissões totais (tCO2e)",), FOSSIL, "Escopo 2"),
+        LedgerSource(
+            tuple(f"Emissões Biogênicas tCO2e - {month}" for month in MONTHS),
+            BIOGENIC,
+            "Escopo 2",
+        ),
+    ],
+    "carbonization": [
+        LedgerSource(("Emissões Biogênicas Totais (tCO2e)",), BIOGENIC, "Escopo 1"),
+        # apesar do nome, a coluna está em kg de CH4 (ver Carbonization.process)
+        LedgerSource(("Emissões de CH4 (tCO2e)",), CH4, "Escopo 1", "kgCH4"),
+    ],
+    # transporte a montante: uso e produção do combustível no escopo 3
+    "transport": [
+        LedgerSource(("Emissões de uso - fóssil (tCO2e)",), FOSSIL, "Escopo 3"),
+        LedgerSource(("Emissões de uso - biogênico (tCO2e)",), BIOGENIC, "Escopo 3"),
+        LedgerSource(("Emissões fósseis de produção (tCO2e)",), FOSSIL, "Escopo 3"),
+        LedgerSource(("Emissões biogênicas de produção (tCO2e)",), BIOGENIC, "Escopo 3"),
+        LedgerSource(("Emissões LUC de produção (tCO2e)",), LUC, "Escopo 3"),
+        LedgerSource(("Emissões CH4 (kgCH4)",), CH4, "Escopo 3", "kgCH4"),
+        LedgerSource(("Emissões N2O (kgN2O)",), N2O, "Escopo 3", "kgN2O"),
+    ],
+    "industrial": [
+        LedgerSource(("Emissões Fósseis (tCO2e)",), FOSSIL),
+        LedgerSource(("Emissões Biogênicas (tCO2e)",), BIOGENIC),
+        LedgerSource(("Remoções biogênicas (tCO2e)",), REMOVAL),
+        LedgerSource(("Emissões LUC (tCO2e)",), LUC),
+    ],
+    "quartz_mining": [
+        LedgerSource(("Emissões Fósseis (tCO2e)",), FOSSIL),
+        LedgerSource(("Emissões Biogênicas (tCO2e)",), BIOGENIC),
+        LedgerSource(("Remoções biogênicas (tCO2e)",), REMOVAL),
+        LedgerSource(("Emissões LUC (tCO2e)",), LUC),
+    ],
+}
+
+
+def _categorical(values, categories=None) -> pd.Categorical:
+    return pd.Categorical(values, categories=categories)
+
+
+def empty_ledger() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Módulo": _categorical([], list(MODULES)),
+            "Linha": np.array([], dtype=np.int64),
+            "Etapa": _categorical([]),
+            "Escopo": _categorical([], SCOPES),
+            "Categoria": _categorical([], CATEGORIES),
+            "Unidade": _categorical([]),
+            "Valor": np.array([], dtype=float),
+        }
+    )
+
+
+def build_ledger(key: str, processed: pd.DataFrame, basis: str | None = None) -> pd.DataFrame:
+    """
+    Converte o resultado largo de um módulo no livro de emissões em formato
+    longo: uma linha por item de origem e categoria (fóssil, biogênica,
+    remoção, LUC, CH4, N2O), com colunas categóricas e valores float.
+    Valores nulos ou zero são omitidos.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param processed: DataFrame retornado pelo módulo.
+    :param basis: Referência dos valores quando as entradas não são
+        absolutas (ex.: "ton FeSiMg" leva "tCO2e" a "tCO2e/ton FeSiMg").
+        Unidades de LEDGER_SOURCES que já têm referência não mudam.
+    :return: DataFrame com as colunas de LEDGER_COLUMNS.
+    """
+    spec = get_module(key)
+    sources = LEDGER_SOURCES[key]
+    rows = len(processed)
+
+    units = [
+        source.unit if basis is None or "/" in source.unit else f"{source.unit}/{basis}"
+        for source in sources
+    ]
+
+    if key in STAGE_COLUMNS:
+        stages = processed[STAGE_COLUMNS[key]].fillna(spec.label).astype(str).to_numpy()
+    else:
+        stages = np.full(rows, spec.label, dtype=object)
+
+    row_scopes = ROW_SCOPES[key](processed) if key in ROW_SCOPES else None
+
+    values = np.concatenate(
+        [
+            processed[list(source.columns)]
+            .apply(pd.to_numeric, errors="coerce")
+            .sum(axis=1, min_count=1)
+            .to_numpy(dtype=float)
+            for source in sources
+        ]
+    )
+    scopes = np.concatenate(
+        [
+            np.full(rows, source.scope, dtype=object)
+            if source.scope is not None
+            else row_scopes
+            for source in sources
+        ]
+    )
+    keep = ~np.isnan(values) & (values != 0)
+
+    ledger = pd.DataFrame(
+        {
+            "Módulo": _categorical(np.full(keep.sum(), key, dtype=object), list(MODULES)),
+            "Linha": np.tile(processed.index.to_numpy(dtype=np.int64), len(sources))[keep],
+            "Etapa": _categorical(np.tile(stages, len(sources))[keep]),
+            "Escopo": _categorical(scopes[keep], SCOPES),
+            "Categoria": _categorical(
+                np.repeat([source.category for source in sources], rows)[keep], CATEGORIES
+            ),
+            "Unidade": _categorical(
+                np.repeat(units, rows)[keep]
+            ),
+            "Valor": values[keep],
+        }
+    )
+
+    return ledger
+
+
+def concat_ledgers(ledgers: list[pd.DataFrame]) -> pd.DataFrame:
+    """Junta livros de vários módulos mantendo as colunas categóricas."""
+    if not ledgers:
+        return empty_ledger()
+
+    ledger = pd.concat(ledgers, ignore_index=True)
+    for column in ["Etapa", "Unidade"]:
+        ledger[column] = ledger[column].astype("category")
+    return ledger
+
+
+def aggregate(ledger: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    """
+    Soma os valores do livro agrupados pelas colunas `by` (sempre separando
+    as unidades), em uma única redução agrupada.
+
+    :param ledger: Livro de emissões (ver `build_ledger`).
+    :param by: Colunas de agrupamento (ex.: ["Módulo"], ["Escopo", "Categoria"]).
+    :return: DataFrame longo com as colunas `by`, "Unidade" e "Valor".
+    """
+    keys = list(dict.fromkeys([*by, "Unidade"]))
+    return (
+        ledger.groupby(keys, observed=True, sort=False)["Valor"].sum().reset_index()
+    )
+
+
+def totals(ledger: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    """
+    Totais com uma coluna por categoria, agrupados por `by` e pela unidade.
+
+    :param ledger: Livro de emissões.
+    :param by: Colunas de agrupamento (ex.: ["Escopo"]).
+    :return: DataFrame largo com as colunas `by`, categorias presentes e "Unidade".
+    """
+    return widen(aggregate(ledger, [*by, "Categoria"]), by)
+
+
+def widen(grouped: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    """
+    Converte totais longos (ver `aggregate`, agrupados por `by` e
+    "Categoria") em uma coluna por categoria.
+    """
+    wide = grouped.pivot_table(
+        index=[*by, "Unidade"],
+        columns="Categoria",
+        values="Valor",
+        aggfunc="sum",
+        observed=True,
+        sort=False,
+    )
+    categories = [category for category in CATEGORIES if category in wide.columns]
+    wide = wide.reindex(columns=categories).fillna(0)
+    wide.columns = categories
+    wide = wide.reset_index()
+    return wide[[*by, *categories, "Unidade"]]
+
+
+def consolidated_view(ledger: pd.DataFrame) -> pd.DataFrame:
+    """
+    Visão "Resultados Consolidados": emissões fósseis, biogênicas, remoções
+    biogênicas e LUC por etapa, com o balanço e um total por unidade (abas
+    por tonelada de produto não somam com valores absolutos).
+
+    :param ledger: Livro de emissões.
+    :return: DataFrame com as colunas Etapa, categorias, Balanço e Unidade.
+    """
+    ledger = ledger[ledger["Categoria"].isin(CONSOLIDATED_CATEGORIES)]
+    grouped = aggregate(ledger, ["Etapa", "Categoria"])
+
+    by_stage = grouped.pivot_table(
+        index=["Etapa", "Unidade"],
+        columns="Categoria",
+        values="Valor",
+        aggfunc="sum",
+        observed=True,
+        sort=False,
+    )
+    by_stage = by_stage.reindex(columns=CONSOLIDATED_CATEGORIES).fillna(0)
+    by_stage.columns = list(by_stage.columns)
+    by_stage = by_stage.reset_index()
+    by_stage["Etapa"] = by_stage["Etapa"].astype(str)
+    by_stage["Unidade"] = by_stage["Unidade"].astype(str)
+
+    unit_totals = (
+        by_stage.groupby("Unidade", sort=False)[CONSOLIDATED_CATEGORIES]
+        .sum()
+        .reset_index()
+        .assign(Etapa="Total")
+    )
+    consolidated = pd.concat([by_stage, unit_totals], ignore_index=True)
+    consolidated["Balanço"] = consolidated[CONSOLIDATED_CATEGORIES].sum(axis=1)
+
+    return consolidated[["Etapa", *CONSOLIDATED_CATEGORIES, "Balanço", "Unidade"]]
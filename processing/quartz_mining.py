@@ -1,80 +1,88 @@
 import pandas as pd
 import streamlit as st
 
-from utils.emission_factors import get_emission_factor
+from utils.emission_factors import get_emission_factors
+from utils.profiling import stage
+from processing.diagnostics import (
+    DiagnosticsMixin,
+    empty_diagnostics,
+    empty_missing_rows,
+    missing_rows,
+)
+from processing.ui import run_cached, show_results, upload_file
 
+# Unidade das quantidades sem unidade informada
+INPUT_UNIT = "t"
 
-class QuartzMining:
+
+class QuartzMining(DiagnosticsMixin):
     def __init__(self, df: pd.DataFrame):
         self.df = df
+        self.diagnostics = empty_diagnostics()
+        self.missing_factors = []
+        self.missing_rows = empty_missing_rows()
 
     def process(self):
         self.df["Quantidade"] = self.df["Quantidade"].fillna(0)
         self.df["Nome no estudo"] = self.df["Nome no estudo"].fillna("-")
 
-        self.df["Fonte do Fator de Emissão"] = self.df["Nome no estudo"].apply(
-            lambda x: (
-                get_emission_factor(x, "source")
-                if get_emission_factor(x, "source")
-                else "Não encontrado"
+        with stage("Fatores de emissão"):
+            names = self.df["Nome no estudo"]
+            factors = get_emission_factors(
+                names,
+                [
+                    "source",
+                    "fossil_emission_factor",
+                    "biogenic_emission_factor",
+                    "biogenic_removal_factor",
+                    "luc_emission_factor",
+                    "unit",
+                ],
+                defaults={
+                    "source": "Não encontrado",
+                    "fossil_emission_factor": 0,
+                    "biogenic_emission_factor": 0,
+                    "biogenic_removal_factor": 0,
+                    "luc_emission_factor": 0,
+                    "unit": "Não encontrado",
+                },
             )
-        )
-
-        self.df["Fator de Emissão Fóssil"] = self.df["Nome no estudo"].apply(
-            lambda x: (
-                get_emission_factor(x, "fossil_emission_factor")
-                if get_emission_factor(x, "fossil_emission_factor")
-                else 0
+            self.missing_factors = [
+                name for name in factors.attrs["missing"] if name != "-"
+            ]
+            self.missing_rows = missing_rows(names, names.isin(self.missing_factors))
+
+            self.df["Fonte do Fator de Emissão"] = factors["source"]
+            self.df["Fator de Emissão Fóssil"] = factors["fossil_emission_factor"]
+            self.df["Fator de Emissão Biogênico"] = factors["biogenic_emission_factor"]
+            self.df["Fator de Remoção Biogênica"] = factors["biogenic_removal_factor"]
+            self.df["Fator de Emissão LUC"] = factors["luc_emission_factor"]
+            self.df["Unidade - Fator"] = factors["unit"]
+
+        with stage("Unidades"):
+            self.df["Quantidade - Unidade do Fator"] = self.convert_quantities(
+                "Nome no estudo", INPUT_UNIT, ~names.isin(factors.attrs["missing"])
             )
-        )
 
-        self.df["Fator de Emissão Biogênico"] = self.df["Nome no estudo"].apply(
-            lambda x: (
-                get_emission_factor(x, "biogenic_emission_factor")
-                if get_emission_factor(x, "biogenic_emission_factor")
-                else 0
-            )
-        )
+        with stage("Emissões"):
+            # fatores em kgCO2e por unidade, emissões em tCO2e
+            quantity = self.df["Quantidade - Unidade do Fator"] / 1000
 
-        self.df["Fator de Remoção Biogênica"] = self.df["Nome no estudo"].apply(
-            lambda x: (
-                get_emission_factor(x, "biogenic_removal_factor")
-                if get_emission_factor(x, "biogenic_removal_factor")
-                else 0
+            self.df["Emissões Fósseis (tCO2e)"] = (
+                quantity * self.df["Fator de Emissão Fóssil"]
             )
-        )
 
-        self.df["Fator de Emissão LUC"] = self.df["Nome no estudo"].apply(
-            lambda x: (
-                get_emission_factor(x, "luc_emission_factor")
-                if get_emission_factor(x, "luc_emission_factor")
-                else 0
+            self.df["Emissões Biogênicas (tCO2e)"] = (
+                quantity * self.df["Fator de Emissão Biogênico"]
             )
-        )
 
-        self.df["Unidade - Fator"] = self.df["Nome no estudo"].apply(
-            lambda x: (
-                get_emission_factor(x, "unit")
-                if get_emission_factor(x, "unit")
-                else "Não encontrado"
+            self.df["Remoções biogênicas (tCO2e)"] = (
+                quantity * self.df["Fator de Remoção Biogênica"]
             )
-        )
-
-        self.df["Emissões Fósseis (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Emissão Fóssil"]
-        )
-
-        self.df["Emissões Biogênicas (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Emissão Biogênico"]
-        )
 
-        self.df["Remoções biogênicas (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Remoção Biogênica"]
-        )
-
-        self.df["Emissões LUC (tCO2e)"] = (
-            self.df["Quantidade"] * self.df["Fator de Emissão LUC"]
-        )
+            self.df["Emissões LUC (tCO2e)"] = (
+                quantity * self.df["Fator de Emissão LUC"]
+            )
 
         return self.df
 
@@ -87,18 +95,18 @@ def test_quartz_mining():
         else:
             return [""] * len(row)
 
-    file = st.file_uploader(
-        "Escolha um arquivo",
-        type=["xlsx"],
-        key="quartz_mining"
-    )
+    file = upload_file("quartz_mining")
     if file is None:
         return
 
-    quartz_mining = QuartzMining(
-        pd.read_excel(file)
-    ).process()
+    quartz_mining, instance = run_cached("quartz_mining", file)
 
     st.dataframe(
         quartz_mining.style.apply(highlight_empty_factor, axis=1), hide_index=True
     )
+
+    if not instance.diagnostics.empty:
+        st.warning("Algumas linhas não puderam ser calculadas completamente.")
+        st.dataframe(instance.diagnostics, hide_index=True)
+
+    show_results("quartz_mining", quartz_mining)
@@ -0,0 +1,246 @@
+import importlib
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from utils.profiling import Profiler, stage
+
+MONTHS = [
+    "Janeiro",
+    "Fevereiro",
+    "Março",
+    "Abril",
+    "Maio",
+    "Junho",
+    "Julho",
+    "Agosto",
+    "Setembro",
+    "Outubro",
+    "Novembro",
+    "Dezembro",
+]
+
+
+@dataclass(frozen=True)
+class ModuleSpec:
+    """Descrição de um módulo de cálculo (classe, método e resumo)."""
+
+    key: str
+    label: str
+    module: str
+    class_name: str
+    method: str
+    # função que desenha a página do módulo na interface Streamlit
+    page: str
+    # coluna do resumo -> colunas do resultado somadas para obtê-la
+    summary: dict = field(default_factory=dict)
+
+    def load(self):
+        """Importa a classe do módulo sob demanda."""
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+    def load_page(self):
+        """Importa a função da página do módulo sob demanda."""
+        return getattr(importlib.import_module(self.module), self.page)
+
+
+MODULES = {
+    spec.key: spec
+    for spec in [
+        ModuleSpec(
+            key="forestry_fuels",
+            label="Florestal (Combustíveis)",
+            module="processing.forestry.fuels",
+            class_name="ForestryFuels",
+            method="preparation",
+            page="test_forestry_fuels",
+            summary={
+                column: [column]
+                for column in [
+                    "Emissões CO2 (kgCO2)",
+                    "Emissões CO2 - biogênico (kgCO2)",
+                    "Emissões CH4 (kgCH4)",
+                    "Emissões N2O (kgN2O)",
+                    "Emissões Fósseis Combustão (tCO2e)",
+                    "Emissões Biogênicas Combustão (tCO2e)",
+                    "Emissões CO2 LUC - Produção (tCO2)",
+                    "Emissões Fósseis Totais (tCO2e)",
+                    "Emissões Biogênicas Totais (tCO2e)",
+                ]
+            },
+        ),
+        ModuleSpec(
+            key="forestry_fertilizers",
+            label="Florestal (Fertilizantes)",
+            module="processing.forestry.fertilizers",
+            class_name="ForestryFertilizers",
+            method="process",
+            page="test_forestry_fertilizers",
+            summary={
+                column: [column]
+                for column in [
+                    "Emissões totais tCO2e",
+                    "Emissões Fósseis Produção tCO2e",
+                    "Emissões Biogênicas Produção tCO2e",
+                    "Emissões LUC Produção tCO2e",
+                    "Emissões Uso tCO2e",
+                    "Emissões kgCO2",
+                    "Emissões kgN2O",
+                ]
+            },
+        ),
+        ModuleSpec(
+            key="forestry_energy",
+            label="Florestal (Energia)",
+            module="processing.forestry.energy",
+            class_name="ForestryEnergy",
+            method="process",
+            page="test_forestry_energy",
+            summary={
+                "Consumo": [f"Consumo - {month}" for month in MONTHS],
+                "Emissões totais (tCO2e)": ["Emissões totais (tCO2e)"],
+            },
+        ),
+        ModuleSpec(
+            key="carbonization",
+            label="Carbonização",
+            module="processing.carbonization",
+            class_name="Carbonization",
+            method="process",
+            page="test_carbonization",
+            summary={
+                "Madeira": ["Madeira"],
+                "Emissões totais tCO2e": ["Emissões Biogênicas Totais (tCO2e)"],
+                "Emissões de CH4 (tCO2e)": ["Emissões de CH4 (tCO2e)"],
+                "Emissões CO2 - biogênico (kgCO2)": ["Emissões CO2 - biogênico (kgCO2)"],
+            },
+        ),
+        ModuleSpec(
+            key="industrial",
+            label="Industrial",
+            module="processing.industrial",
+            class_name="Industrial",
+            method="process",
+            page="test_industrial",
+            summary={
+                column: [column]
+                for column in [
+                    "Emissões Fósseis (tCO2e)",
+                    "Emissões Biogênicas (tCO2e)",
+                    "Remoções biogênicas (tCO2e)",
+                    "Emissões LUC (tCO2e)",
+                ]
+            },
+        ),
+        ModuleSpec(
+            key="transport",
+            label="Transporte",
+            module="processing.transport",
+            class_name="Transport",
+            method="process",
+            page="test_transport",
+            summary={
+                column: [column]
+                for column in [
+                    "t.km",
+                    "Consumo (litros)",
+                    "Emissões CO2 (kgCO2)",
+                    "Emissões CH4 (kgCH4)",
+                    "Emissões N2O (kgN2O)",
+                    "Emissões de uso - fóssil (tCO2e)",
+                    "Emissões de uso - biogênico (tCO2e)",
+                    "Emissões LUC de produção (tCO2e)",
+                    "Emissões fósseis totais (tCO2e)",
+                    "Emissões Biogênicas totais (tCO2e)",
+                ]
+            },
+        ),
+        ModuleSpec(
+            key="quartz_mining",
+            label="Mineração de Quartzo",
+            module="processing.quartz_mining",
+            class_name="QuartzMining",
+            method="process",
+            page="test_quartz_mining",
+            summary={
+                column: [column]
+                for column in [
+                    "Emissões Fósseis (tCO2e)",
+                    "Emissões Biogênicas (tCO2e)",
+                    "Remoções biogênicas (tCO2e)",
+                    "Emissões LUC (tCO2e)",
+                ]
+            },
+        ),
+    ]
+}
+
+
+def get_module(key: str) -> ModuleSpec:
+    """
+    Obtém a especificação de um módulo pelo nome.
+
+    :param key: Nome do módulo (ex.: "forestry_fuels").
+    :return: Especificação do módulo.
+    """
+    try:
+        return MODULES[key]
+    except KeyError:
+        raise KeyError(
+            f"Módulo desconhecido: {key}. Opções: {', '.join(MODULES)}"
+        ) from None
+
+
+def run_module(key: str, df: pd.DataFrame):
+    """
+    Executa o cálculo de um módulo sobre um DataFrame de entrada.
+
+    :param key: Nome do módulo.
+    :param df: Dados de entrada (a planilha enviada).
+    :return: Tupla (DataFrame processado, instância da classe do módulo).
+    """
+    spec = get_module(key)
+    with stage("Carga dos fatores"):
+        instance = spec.load()(df)
+    with stage(spec.method):
+        processed = getattr(instance, spec.method)()
+    return processed, instance
+
+
+def profile_module(key: str, source, use_cprofile: bool = False, sheet_name=0):
+    """
+    Executa um módulo medindo o tempo e as buscas de fatores de cada etapa.
+
+    :param key: Nome do módulo.
+    :param source: Dados de entrada (DataFrame) ou planilha (caminho ou
+        arquivo), cuja leitura também é medida.
+    :param use_cprofile: Inclui as funções mais custosas segundo o cProfile.
+    :param sheet_name: Aba da planilha, quando `source` não é um DataFrame.
+    :return: Tupla (DataFrame processado, instância, relatório de desempenho).
+    """
+    with Profiler(key, use_cprofile) as profiler:
+        if isinstance(source, pd.DataFrame):
+            df = source
+        else:
+            with stage("Leitura da planilha"):
+                df = pd.read_excel(source, sheet_name=sheet_name)
+        processed, instance = run_module(key, df)
+    profiler.rows = len(df)
+    return processed, instance, profiler.report()
+
+
+def summarize(key: str, processed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta o resumo de uma linha ("Resultados") de um módulo processado.
+
+    :param key: Nome do módulo.
+    :param processed: DataFrame retornado pelo módulo.
+    :return: DataFrame de uma linha com os totais do módulo.
+    """
+    spec = get_module(key)
+    return pd.DataFrame(
+        {
+            name: [processed[columns].sum(axis=1).sum()]
+            for name, columns in spec.summary.items()
+        }
+    )
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from processing.ledger import BIOGENIC, CATEGORIES, FOSSIL, LEDGER_SOURCES, LUC
+from utils.gwp import GwpScenario, gwp_matrix
+
+
+@dataclass(frozen=True)
+class ScenarioTerm:
+    """
+    Parcela de uma categoria do livro de emissões (ver processing.ledger)
+    em tCO2e: colunas que não dependem do GWP mais as massas de gases (kg)
+    convertidas pelo GWP de cada cenário.
+    """
+
+    category: str
+    # colunas já em tCO2e, somadas sem conversão
+    fixed: tuple = ()
+    # fórmula química -> coluna com a massa emitida (kg)
+    gases: dict = field(default_factory=dict)
+
+
+# Módulos cujos resultados dependem do GWP; os demais usam fatores já em
+# CO2e e têm os mesmos valores em todos os cenários (ver `scenario_terms`)
+SCENARIO_TERMS = {
+    "forestry_fuels": [
+        ScenarioTerm(
+            FOSSIL,
+            fixed=("Emissões CO2 Fósseis - Produção (tCO2)",),
+            gases={
+                "CO2": "Emissões CO2 (kgCO2)",
+                "CH4": "Emissões CH4 (kgCH4)",
+                "N2O": "Emissões N2O (kgN2O)",
+            },
+        ),
+        ScenarioTerm(BIOGENIC, fixed=("Emissões Biogênicas Totais (tCO2e)",)),
+        ScenarioTerm(LUC, fixed=("Emissões CO2 LUC - Produção (tCO2)",)),
+    ],
+    "forestry_fertilizers": [
+        ScenarioTerm(
+            FOSSIL,
+            fixed=("Emissões Fósseis Produção tCO2e",),
+            gases={"CO2": "Emissões kgCO2", "N2O": "Emissões kgN2O"},
+        ),
+        ScenarioTerm(BIOGENIC, fixed=("Emissões Biogênicas Produção tCO2e",)),
+        ScenarioTerm(LUC, fixed=("Emissões LUC Produção tCO2e",)),
+    ],
+    "transport": [
+        ScenarioTerm(
+            FOSSIL,
+            fixed=("Emissões fósseis de produção (tCO2e)",),
+            gases={
+                "CO2": "Emissões CO2 (kgCO2)",
+                "CH4": "Emissões CH4 (kgCH4)",
+                "N2O": "Emissões N2O (kgN2O)",
+            },
+        ),
+        ScenarioTerm(BIOGENIC, fixed=("Emissões Biogênicas totais (tCO2e)",)),
+        ScenarioTerm(LUC, fixed=("Emissões LUC de produção (tCO2e)",)),
+    ],
+    "carbonization": [
+        ScenarioTerm(
+            BIOGENIC,
+            gases={
+                "CO2": "Emissões CO2 - biogênico (kgCO2)",
+                # apesar do nome, a coluna está em kg de CH4
+                "CH4": "Emissões de CH4 (tCO2e)",
+            },
+        ),
+    ],
+}
+
+
+def scenario_terms(key: str) -> list[ScenarioTerm]:
+    """
+    Parcelas de um módulo. Módulos sem GWP próprio usam as colunas em CO2e
+    do livro de emissões, iguais em todos os cenários.
+    """
+    if key in SCENARIO_TERMS:
+        return SCENARIO_TERMS[key]
+
+    return [
+        ScenarioTerm(source.category, fixed=source.columns)
+        for source in LEDGER_SOURCES[key]
+        if source.unit.startswith("tCO2e")
+    ]
+
+
+def evaluate_scenarios(
+    key: str, processed: pd.DataFrame, scenarios: list[GwpScenario]
+) -> dict:
+    """
+    Calcula as emissões de cada linha em todos os cenários de uma só vez.
+
+    As massas dos gases não mudam entre cenários: para cada categoria, a
+    matriz linhas x gases é multiplicada pela matriz gases x cenários de
+    GWPs, então avaliar vários cenários custa praticamente o mesmo que um.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param processed: DataFrame retornado pelo módulo.
+    :param scenarios: Cenários de GWP.
+    :return: Categoria -> array linhas x cenários (tCO2e).
+    """
+    terms = scenario_terms(key)
+    gases = list(dict.fromkeys(gas for term in terms for gas in term.gases))
+    # massas em kg, resultados em t
+    weights = gwp_matrix(scenarios, gases) / 1000
+    rows = len(processed)
+
+    result = {}
+    for term in terms:
+        values = np.zeros((rows, len(scenarios)))
+        if term.fixed:
+            values += processed[list(term.fixed)].sum(axis=1).to_numpy(dtype=float)[:, None]
+        if term.gases:
+            masses = processed[list(term.gases.values())].to_numpy(dtype=float)
+            values += masses @ weights[[gases.index(gas) for gas in term.gases]]
+
+        result[term.category] = result.get(term.category, 0) + values
+
+    return result
+
+
+def compare_scenarios(
+    key: str, processed: pd.DataFrame, scenarios: list[GwpScenario]
+) -> pd.DataFrame:
+    """
+    Tabela de comparação de cenários: totais de cada categoria e o balanço
+    por cenário.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param processed: DataFrame retornado pelo módulo.
+    :param scenarios: Cenários de GWP.
+    :return: DataFrame com uma linha por cenário.
+    """
+    evaluated = evaluate_scenarios(key, processed, scenarios)
+    categories = [category for category in CATEGORIES if category in evaluated]
+
+    comparison = pd.DataFrame(
+        {category: np.nansum(evaluated[category], axis=0) for category in categories}
+    )
+    comparison.insert(0, "Cenário", [scenario.name for scenario in scenarios])
+    comparison["Balanço"] = comparison[categories].sum(axis=1)
+
+    return comparison
@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from processing.registry import MODULES, run_module, summarize
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Linhas serializadas por vez nas respostas (JSON ou record batches Arrow)
+RESPONSE_CHUNK_ROWS = 10_000
+
+# Opções de DataFrame.to_json das respostas (precisão total dos floats)
+JSON_OPTIONS = {"orient": "records", "force_ascii": False, "double_precision": 15}
+
+# Requisições aguardando cálculo por processo; as demais esperam a vez
+PENDING_PER_WORKER = 4
+
+
+@dataclass
+class ModuleResult:
+    """Resultado de um módulo calculado pelo serviço."""
+
+    key: str
+    processed: pd.DataFrame
+    summary: pd.DataFrame
+    missing_factors: list = field(default_factory=list)
+
+
+def warm_up():
+    """
+    Carrega as tabelas de fatores de todos os módulos, calculando as
+    primeiras linhas das planilhas de exemplo (data/lca/mock). Executado uma
+    vez em cada processo, para que as requisições encontrem os fatores já em
+    memória (ver utils.factor_repository).
+    """
+    for key in MODULES:
+        path = f"data/lca/mock/{key}.xlsx"
+        if not os.path.exists(path):
+            continue
+        # o aquecimento é só uma otimização: uma planilha de exemplo
+        # inválida não deve impedir o serviço de subir
+        with contextlib.suppress(Exception), contextlib.redirect_stdout(io.StringIO()):
+            run_module(key, pd.read_excel(path, nrows=5))
+
+
+def compute(key: str, df: pd.DataFrame) -> ModuleResult:
+    """
+    Calcula um módulo (executado nos processos do pool).
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param df: Dados de entrada.
+    :return: Resultado detalhado, resumo e fatores ausentes.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        processed, instance = run_module(key, df)
+    return ModuleResult(
+        key=key,
+        processed=processed,
+        summary=summarize(key, processed),
+        missing_factors=[str(name) for name in instance.missing_factors],
+    )
+
+
+def read_payload(body: bytes, content_type: str) -> pd.DataFrame:
+    """
+    Converte o corpo de uma requisição em DataFrame.
+
+    Aceita um stream IPC do Arrow (`ARROW_STREAM`) ou JSON: uma lista de
+    registros (`[{"coluna": valor, ...}, ...]`) ou o formato "split" do
+    pandas (`{"columns": [...], "data": [[...], ...]}`).
+
+    :raises ValueError: Corpo em formato não reconhecido.
+    """
+    if content_type.startswith(ARROW_STREAM):
+        import pyarrow as pa
+
+        return pa.ipc.open_stream(body).read_pandas()
+
+    return frame_from_json(json.loads(body))
+
+
+def frame_from_json(payload) -> pd.DataFrame:
+    """Converte uma entrada JSON já decodificada (ver `read_payload`)."""
+    if isinstance(payload, list):
+        return pd.DataFrame.from_records(payload)
+    if isinstance(payload, dict) and "data" in payload:
+        return pd.DataFrame(payload["data"], columns=payload.get("columns"))
+
+    raise ValueError(
+        'Entrada deve ser uma lista de registros ou {"columns": [...], "data": [...]}'
+    )
+
+
+def _json(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def json_chunks(result: ModuleResult, chunk_rows: int = RESPONSE_CHUNK_ROWS):
+    """
+    Serializa um resultado em JSON aos poucos: os metadados e então as
+    linhas detalhadas em blocos de `chunk_rows`, sem montar a resposta
+    inteira em memória.
+
+    :return: Gerador de pedaços de texto que, concatenados, formam
+        `{"Módulo", "Linhas", "Fatores não encontrados", "Resumo", "Resultados"}`.
+    """
+    processed = result.processed
+    summary = (
+        result.summary.to_json(**JSON_OPTIONS)[1:-1]
+        if not result.summary.empty
+        else "{}"
+    )
+    yield (
+        f'{{"Módulo": {_json(result.key)}, "Linhas": {len(processed)}, '
+        f'"Fatores não encontrados": {_json(result.missing_factors)}, '
+        f'"Resumo": {summary}, "Resultados": ['
+    )
+    for start in range(0, len(processed), chunk_rows):
+        rows = processed.iloc[start : start + chunk_rows].to_json(
+            date_format="iso", **JSON_OPTIONS
+        )
+        yield ("," if start else "") + rows[1:-1]
+    yield "]}"
+
+
+def arrow_chunks(result: ModuleResult, chunk_rows: int = RESPONSE_CHUNK_ROWS):
+    """
+    Serializa as linhas detalhadas como um stream IPC do Arrow, um record
+    batch por bloco. O resumo e os fatores ausentes vão nos metadados do
+    schema (chaves "resumo" e "fatores_nao_encontrados", em JSON).
+
+    :return: Gerador de pedaços binários do stream.
+    """
+    import pyarrow as pa
+
+    processed = result.processed
+    schema = pa.Schema.from_pandas(processed, preserve_index=False).with_metadata(
+        {
+            "resumo": result.summary.to_json(**JSON_OPTIONS),
+            "fatores_nao_encontrados": _json(result.missing_factors),
+        }
+    )
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for start in range(0, max(len(processed), 1), chunk_rows):
+            chunk = processed.iloc[start : start + chunk_rows]
+            writer.write_batch(
+                pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+class CalculationService:
+    """
+    Pool de processos que calcula os módulos para o serviço HTTP.
+
+    Cada processo carrega as tabelas de fatores uma única vez ao iniciar
+    (ver `warm_up`) e as mantém entre requisições. O número de processos
+    limita os cálculos simultâneos; um semáforo limita as requisições
+    aguardando, para que picos não acumulem entradas em memória.
+    """
+
+    def __init__(self, workers: int = os.cpu_count() or 1):
+        """
+        :param workers: Número de processos. Com 0, calcula em uma thread
+            do próprio processo do servidor (útil em testes).
+        """
+        self.workers = workers
+        self.executor = None
+        self.slots = None
+
+    def start(self):
+        if self.executor is not None:
+            return
+
+        if self.workers > 0:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=warm_up)
+        else:
+            self.executor = ThreadPoolExecutor(1, initializer=warm_up)
+        self.slots = asyncio.Semaphore(max(self.workers, 1) * PENDING_PER_WORKER)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def run(self, key: str, df: pd.DataFrame) -> ModuleResult:
+        """Calcula um módulo no pool, sem bloquear o laço de eventos."""
+        self.start()
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, compute, key, df)
+
+
+def create_app(workers: int = os.cpu_count() or 1):
+    """
+    Cria a aplicação ASGI (Starlette) do serviço de cálculo.
+
+    Rotas:
+
+    - `GET /modules`: módulos disponíveis.
+    - `POST /modules/{módulo}`: calcula um módulo. Entrada em JSON ou Arrow
+      (ver `read_payload`); resposta em Arrow se `Accept` pedir
+      `ARROW_STREAM`, senão em JSON (ver `json_chunks`).
+    - `POST /batch`: calcula vários módulos de uma vez, em paralelo. Entrada
+      `{"módulo": entrada JSON, ...}`; resposta `{"módulo": resultado, ...}`.
+
+    :param workers: Número de processos de cálculo (ver CalculationService).
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+
+    service = CalculationService(workers)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        service.start()
+        # aquece os processos antes da primeira requisição
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(service.executor, os.getpid)
+                for _ in range(max(workers, 1))
+            ]
+        )
+        yield
+        service.shutdown()
+
+    def error(status: int, message: str):
+        return JSONResponse({"Erro": message}, status_code=status)
+
+    async def list_modules(request):
+        return JSONResponse(
+            [{"Módulo": spec.key, "Nome": spec.label} for spec in MODULES.values()]
+        )
+
+    async def run_one(request):
+        key = request.path_params["key"]
+        if key not in MODULES:
+            return error(404, f"Módulo desconhecido: {key}")
+
+        try:
+            df = read_payload(
+                await request.body(), request.headers.get("content-type", "")
+            )
+        except ValueError as e:
+            return error(400, str(e))
+
+        try:
+            result = await service.run(key, df)
+        except Exception as e:
+            return error(500, f"{type(e).__name__}: {e}")
+
+        if ARROW_STREAM in request.headers.get("accept", ""):
+            return StreamingResponse(arrow_chunks(result), media_type=ARROW_STREAM)
+        return StreamingResponse(json_chunks(result), media_type="application/json")
+
+    async def run_batch(request):
+        try:
+            payload = json.loads(await request.body())
+            if not isinstance(payload, dict):
+                raise ValueError('Entrada deve ser {"módulo": entrada, ...}')
+            unknown = [key for key in payload if key not in MODULES]
+            if unknown:
+                return error(404, f"Módulo desconhecido: {', '.join(unknown)}")
+            frames = {key: frame_from_json(entry) for key, entry in payload.items()}
+        except ValueError as e:
+            return error(400, str(e))
+
+        tasks = {
+            key: asyncio.ensure_future(service.run(key, df)) for key, df in frames.items()
+        }
+
+        async def chunks():
+            yield "{"
+            for position, (key, task) in enumerate(tasks.items()):
+                yield ("," if position else "") + f"{_json(key)}: "
+                try:
+                    result = await task
+                except Exception as e:
+                    yield _json({"Erro": f"{type(e).__name__}: {e}"})
+                    continue
+                for chunk in json_chunks(result):
+                    yield chunk
+            yield "}"
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    app = Starlette(
+        routes=[
+            Route("/modules", list_modules, methods=["GET"]),
+            Route("/modules/{key}", run_one, methods=["POST"]),
+            Route("/batch", run_batch, methods=["POST"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.service = service
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lca-service",
+        description="Serviço HTTP local de cálculo dos módulos (JSON/Arrow).",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço (padrão: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Porta (padrão: 8000).")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processos de cálculo (padrão: número de CPUs; 0 calcula no servidor).",
+    )
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    uvicorn.run(create_app(args.workers), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
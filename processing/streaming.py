@@ -0,0 +1,353 @@
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import openpyxl
+import pandas as pd
+
+from processing.registry import run_module, summarize
+from utils.profiling import stage
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+CSV_BUFFER_SIZE = 1 << 20
+
+# Linhas por aba do Excel (a última linha da planilha fica de fora: cabeçalho)
+XLSX_MAX_ROWS = 1_048_575
+
+# Caracteres não permitidos em nomes de abas do Excel
+XLSX_INVALID_SHEET_CHARS = str.maketrans({char: " " for char in "[]:*?/\\"})
+
+
+def iter_excel_chunks(
+    source, chunk_size: int = DEFAULT_CHUNK_SIZE, sheet_name: str | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Lê uma planilha em blocos de linhas com o iterador read-only do openpyxl,
+    sem carregar a planilha inteira em memória.
+
+    A primeira linha é o cabeçalho (colunas sem nome viram "Unnamed: <i>",
+    como no `pd.read_excel`). Linhas totalmente vazias são ignoradas. O índice
+    de cada bloco continua a numeração do bloco anterior.
+
+    :param source: Caminho ou arquivo (ex.: upload do Streamlit).
+    :param chunk_size: Número de linhas por bloco.
+    :param sheet_name: Aba da planilha (padrão: a primeira).
+    :return: Iterador de DataFrames.
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+
+        header = next(rows, None)
+        if header is None:
+            return
+
+        columns = [
+            name if name is not None else f"Unnamed: {position}"
+            for position, name in enumerate(header)
+        ]
+
+        start = 0
+        buffer = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+
+            buffer.append(row[: len(columns)])
+
+            if len(buffer) == chunk_size:
+                yield _chunk_frame(buffer, columns, start)
+                start += len(buffer)
+                buffer = []
+
+        if buffer:
+            yield _chunk_frame(buffer, columns, start)
+    finally:
+        workbook.close()
+
+
+def _chunk_frame(rows: list, columns: list, start: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows, columns=columns, index=pd.RangeIndex(start, start + len(rows))
+    ).infer_objects()
+
+
+class CsvSink:
+    """
+    Destino de linhas detalhadas que grava cada bloco em um CSV (UTF-8) com o
+    escritor de CSV do pyarrow, bem mais rápido que `DataFrame.to_csv`. O
+    arquivo é aberto uma única vez, com um buffer de CSV_BUFFER_SIZE bytes.
+    """
+
+    def __init__(self, target, buffer_size: int = CSV_BUFFER_SIZE):
+        """
+        :param target: Caminho do arquivo ou objeto binário aberto.
+        :param buffer_size: Tamanho do buffer de gravação (bytes).
+        """
+        import pyarrow  # noqa: F401
+
+        self.owned = not hasattr(target, "write")
+        self.file = open(target, "wb", buffering=buffer_size) if self.owned else target
+        self.header_written = False
+
+    def write(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        # cada bloco tem seu próprio schema: colunas vazias em um bloco e
+        # preenchidas em outro não precisam ter o mesmo tipo
+        pa_csv.write_csv(
+            pa.Table.from_pandas(df, preserve_index=False),
+            self.file,
+            pa_csv.WriteOptions(
+                include_header=not self.header_written, quoting_style="needed"
+            ),
+        )
+        self.header_written = True
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+def parquet_schema(df: pd.DataFrame):
+    """
+    Schema Parquet de um bloco de linhas. Colunas de texto sem nenhum valor
+    no bloco (tipo nulo no Arrow) são declaradas como texto, para que os
+    blocos seguintes possam preenchê-las.
+    """
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for position, column in enumerate(schema):
+        if pa.types.is_null(column.type) and df[column.name].dtype == object:
+            schema = schema.set(position, column.with_type(pa.string()))
+
+    return schema
+
+
+class ParquetSink:
+    """
+    Destino de linhas detalhadas que grava cada bloco como um row group de
+    um arquivo Parquet (requer pyarrow).
+    """
+
+    def __init__(self, target, schema=None):
+        """
+        :param target: Caminho do arquivo ou objeto binário aberto.
+        :param schema: Schema do arquivo (padrão: o do primeiro bloco, ver
+            `parquet_schema`). Informe-o quando o primeiro bloco não
+            representa os demais.
+        """
+        import pyarrow  # noqa: F401
+
+        self.target = target
+        self.writer = None
+        self.schema = schema
+
+    def write(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            if self.schema is None:
+                self.schema = parquet_schema(df)
+            self.writer = pq.ParquetWriter(self.target, self.schema)
+
+        self.writer.write_table(
+            pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class XlsxSink:
+    """
+    Destino de linhas detalhadas em um XLSX gravado no modo write-only do
+    openpyxl: cada bloco é escrito linha a linha e descartado, sem manter a
+    planilha em memória. Linhas além do limite do Excel continuam em abas
+    "<nome> (2)", "<nome> (3)"...
+
+    O modo write-only grava bem menos linhas por segundo que CsvSink e
+    ParquetSink; para resultados grandes, prefira esses formatos.
+    """
+
+    def __init__(self, target, sheet_name: str = "Resultados"):
+        """
+        :param target: Caminho do arquivo ou objeto binário aberto.
+        :param sheet_name: Aba das linhas detalhadas.
+        """
+        self.target = target
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.start_sheet(sheet_name)
+
+    def start_sheet(self, sheet_name: str):
+        """Faz os próximos blocos irem para uma nova tabela, na aba `sheet_name`."""
+        self.sheet_name = sheet_name
+        self.sheet = None
+        self.sheets = 0
+        self.sheet_rows = 0
+        self.columns = None
+
+    def _new_sheet(self, name: str, columns):
+        title = str(name).translate(XLSX_INVALID_SHEET_CHARS)[:31]
+        sheet = self.workbook.create_sheet(title)
+        sheet.append([str(column) for column in columns])
+        return sheet
+
+    @staticmethod
+    def _append(sheet, df: pd.DataFrame):
+        # células vazias no lugar de NaN/NaT, que o XLSX não representa
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+
+    def write(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = list(df.columns)
+
+        start = 0
+        while start < len(df) or self.sheet is None:
+            if self.sheet is None or self.sheet_rows == XLSX_MAX_ROWS:
+                self.sheets += 1
+                suffix = f" ({self.sheets})" if self.sheets > 1 else ""
+                self.sheet = self._new_sheet(
+                    f"{self.sheet_name[: 31 - len(suffix)]}{suffix}", self.columns
+                )
+                self.sheet_rows = 0
+
+            stop = min(len(df), start + XLSX_MAX_ROWS - self.sheet_rows)
+            self._append(self.sheet, df.iloc[start:stop])
+            self.sheet_rows += stop - start
+            start = stop
+
+    def close(self):
+        if not self.workbook.worksheets:
+            self.workbook.create_sheet(self.sheet_name)
+        self.workbook.save(self.target)
+
+
+SINKS = {"csv": CsvSink, "parquet": ParquetSink, "xlsx": XlsxSink}
+
+
+def run_in_chunks(
+    key: str, df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None
+):
+    """
+    Executa um módulo sobre um DataFrame já carregado, bloco a bloco,
+    informando o andamento a cada bloco. Os blocos mantêm o índice de `df`
+    e os resultados são concatenados na mesma ordem (os módulos calculam
+    cada linha de forma independente).
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param df: Dados de entrada.
+    :param chunk_size: Número de linhas por bloco.
+    :param progress: Função chamada após cada bloco com a fração concluída e
+        uma mensagem; pode lançar exceção para interromper o cálculo (ver
+        processing.jobs).
+    :return: Tupla (DataFrame processado, instância do último bloco com
+        `df`, `missing_factors`, `missing_rows` e `diagnostics` da planilha
+        inteira).
+    """
+    if len(df) <= chunk_size:
+        processed, instance = run_module(key, df)
+        if progress is not None:
+            progress(1.0, f"{len(df)} de {len(df)} linhas calculadas")
+        return processed, instance
+
+    parts, diagnostics, rows, missing = [], [], [], {}
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start : start + chunk_size].copy()
+        processed, instance = run_module(key, chunk)
+        parts.append(processed)
+        missing.update(dict.fromkeys(instance.missing_factors))
+        if getattr(instance, "diagnostics", None) is not None:
+            diagnostics.append(instance.diagnostics)
+        if getattr(instance, "missing_rows", None) is not None:
+            rows.append(instance.missing_rows)
+
+        if progress is not None:
+            done = min(start + chunk_size, len(df))
+            progress(done / len(df), f"{done} de {len(df)} linhas calculadas")
+
+    instance.df = pd.concat(parts)
+    instance.missing_factors = list(missing)
+    if diagnostics:
+        instance.diagnostics = pd.concat(diagnostics, ignore_index=True)
+    if rows:
+        instance.missing_rows = pd.concat(rows, ignore_index=True)
+
+    return instance.df, instance
+
+
+@dataclass
+class StreamResult:
+    """Totais acumulados de uma execução em blocos."""
+
+    summary: pd.DataFrame
+    rows: int = 0
+    chunks: int = 0
+    missing_factors: list = field(default_factory=list)
+
+
+def stream_module(
+    key: str,
+    source,
+    sink=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sheet_name: str | None = None,
+) -> StreamResult:
+    """
+    Executa um módulo bloco a bloco, com memória limitada ao tamanho do bloco.
+
+    Cada bloco é calculado pelo módulo, enviado ao `sink` (se informado) e
+    descartado; os totais do resumo ("Resultados") são acumulados em somas
+    parciais.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param source: Caminho ou arquivo da planilha de entrada.
+    :param sink: Destino das linhas detalhadas (CsvSink, ParquetSink...).
+    :param chunk_size: Número de linhas por bloco.
+    :param sheet_name: Aba da planilha (padrão: a primeira).
+    :return: Totais acumulados.
+    """
+    result = StreamResult(summary=pd.DataFrame())
+    missing = {}
+
+    chunks = iter_excel_chunks(source, chunk_size, sheet_name)
+
+    try:
+        while True:
+            with stage("Leitura da planilha"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+
+            processed, instance = run_module(key, chunk)
+
+            totals = summarize(key, processed)
+            result.summary = (
+                totals
+                if result.summary.empty
+                else result.summary.add(totals, fill_value=0)
+            )
+            result.rows += len(processed)
+            result.chunks += 1
+            missing.update(dict.fromkeys(instance.missing_factors))
+
+            if sink is not None:
+                with stage("Gravação"):
+                    sink.write(processed)
+    finally:
+        if sink is not None:
+            sink.close()
+
+    result.missing_factors = list(missing)
+
+    return result
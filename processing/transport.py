@@ -0,0 +1,373 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from processing.diagnostics import empty_missing_rows, missing_rows
+from processing.forestry.fuels import BLEND_COMPONENTS
+from utils.emission_factors import get_emission_factors
+from utils.factor_repository import get_repository
+from utils.gwp import get_gwp
+from utils.names import normalize_name, normalize_names
+from utils.profiling import count_lookups, timed
+from processing.ui import run_cached, show_results, upload_file
+
+MOBILE_COMBUSTION_PATH = "data/lca/mobile_combustion.xlsx"
+MARITIME_FACTORS_PATH = "data/lca/maritime_factors.xlsx"
+
+# Modo cujas viagens sem consumo de combustível usam os fatores por t.km
+RAILWAY_MODE = normalize_name("Ferroviário")
+RAILWAY_DEFAULT = "Média nacional"
+
+# Colunas da tabela de parâmetros por combustível -> colunas de resultado
+FUEL_OUTPUTS = {
+    "co2": "Emissões CO2 (kgCO2)",
+    "co2_biogenic": "Emissões CO2 - biogênico (kgCO2)",
+    "ch4": "Emissões CH4 (kgCH4)",
+    "n2o": "Emissões N2O (kgN2O)",
+    "kg": "Consumo (kg)",
+}
+
+# Colunas da aba railway (kg por t.km) -> colunas de resultado
+RAILWAY_OUTPUTS = {
+    "kgco2_tku": "Emissões CO2 (kgCO2)",
+    "kgch4_tku": "Emissões CH4 (kgCH4)",
+    "kgn2o_tku": "Emissões N2O (kgN2O)",
+}
+
+_fuel_parameters_cache = {}
+_vehicle_factors_cache = {}
+
+
+def get_fuel_parameters() -> pd.DataFrame:
+    """
+    Obtém os parâmetros de combustão por litro de cada combustível da aba
+    road de mobile_combustion.xlsx, já com a mistura comercial (ver
+    processing.forestry.fuels.BLEND_COMPONENTS): o CO2 do combustível é
+    fóssil ou biogênico conforme `renewable_fossil` e o do componente
+    renovável é biogênico; CH4, N2O e densidade são ponderados pela fração.
+
+    A tabela é calculada de uma vez para todos os combustíveis, uma vez por
+    versão das planilhas de fatores.
+
+    :return: DataFrame indexado pelo combustível (nome normalizado, ver
+        utils.names.normalize_name) com as colunas de FUEL_OUTPUTS (kg/litro).
+    """
+    road = get_repository().table(
+        MOBILE_COMBUSTION_PATH, sheet_name="road", key_column="fuel_transportation"
+    )
+    densities = get_repository().table("data/lca/densities.xlsx", key_column="fuel")
+
+    cached = _fuel_parameters_cache.get("parameters")
+    if cached is not None and cached[0] is road and cached[1] is densities:
+        return cached[2]
+
+    fuels = road.frame["fuel_transportation"]
+    blend_components = {
+        normalize_name(fuel): blend for fuel, blend in BLEND_COMPONENTS.items()
+    }
+    blends = [blend_components.get(name, (None, 0.0)) for name in normalize_names(fuels)]
+    fraction = np.array([blend_fraction for _, blend_fraction in blends])
+
+    # componente renovável de cada combustível (o próprio combustível se não há mistura)
+    components = road.positions(
+        [component if component else fuel for fuel, (component, _) in zip(fuels, blends)]
+    )
+    components = np.where(components >= 0, components, np.arange(len(fuels)))
+
+    def per_litre(column: str) -> tuple[np.ndarray, np.ndarray]:
+        # GJ/m3 * t/GJ = t/m3 = kg/litro
+        values = road.column("energy_content_gj_m3") * road.column(column)
+        return values, values[components]
+
+    renewable = road.frame["renewable_fossil"].eq("R").to_numpy()
+    co2, component_co2 = per_litre("co2_tco2_gj")
+    ch4, component_ch4 = per_litre("ch4_tch4_gj")
+    n2o, component_n2o = per_litre("n2o_tn2o_gj")
+
+    density_positions = densities.positions(fuels)
+    density = np.where(
+        density_positions >= 0,
+        densities.take("density", np.maximum(density_positions, 0)).astype(float),
+        np.nan,
+    )
+    component_density = density[components]
+
+    parameters = pd.DataFrame(
+        {
+            "fraction": fraction,
+            "co2": np.where(renewable, 0.0, (1 - fraction) * co2),
+            "co2_biogenic": np.where(renewable, (1 - fraction) * co2, 0.0)
+            + fraction * component_co2,
+            "ch4": (1 - fraction) * ch4 + fraction * component_ch4,
+            "n2o": (1 - fraction) * n2o + fraction * component_n2o,
+            "kg": ((1 - fraction) * density + fraction * component_density) / 1000,
+        },
+        index=normalize_names(fuels),
+    ).astype(float)
+    parameters = parameters[~parameters.index.duplicated()]
+
+    _fuel_parameters_cache["parameters"] = (road, densities, parameters)
+
+    return parameters
+
+
+def get_vehicle_factors() -> pd.Series:
+    """
+    Obtém o fator de consumo (litro/t.km) de cada tipo de veículo: caminhões
+    da aba vehicle_type de mobile_combustion.xlsx e navios e trens de
+    maritime_factors.xlsx (a aba vehicle_type prevalece para nomes repetidos).
+
+    :return: Série indexada pelo tipo de veículo (nome normalizado).
+    """
+    trucks = get_repository().table(
+        MOBILE_COMBUSTION_PATH, sheet_name="vehicle_type", key_column="truck_type"
+    )
+    maritime = get_repository().table(MARITIME_FACTORS_PATH, key_column="truck_type")
+
+    cached = _vehicle_factors_cache.get("factors")
+    if cached is not None and cached[0] is trucks and cached[1] is maritime:
+        return cached[2]
+
+    factors = pd.concat(
+        [
+            pd.Series(
+                trucks.column("consumption_factor_liter_tkm"),
+                index=trucks.frame["truck_type"],
+            ),
+            pd.Series(
+                maritime.column("consumption_factor"), index=maritime.frame["truck_type"]
+            ),
+        ]
+    ).astype(float)
+    factors.index = normalize_names(factors.index)
+    factors = factors[factors.index.notna() & ~factors.index.duplicated()]
+
+    _vehicle_factors_cache["factors"] = (trucks, maritime, factors)
+
+    return factors
+
+
+def _lookup(positions, names: pd.Series) -> np.ndarray:
+    """
+    Busca cada nome distinto uma única vez e expande o resultado para todas
+    as linhas.
+
+    :param positions: Função que recebe os nomes distintos e retorna suas
+        posições na tabela (-1 se não encontrado).
+    :param names: Nome de cada linha.
+    :return: Posição de cada linha na tabela (-1 se não encontrado).
+    """
+    codes, uniques = pd.factorize(names, use_na_sentinel=False)
+    count_lookups(len(uniques))
+    return np.asarray(positions(uniques), dtype=np.int64)[codes]
+
+
+def _indexer(table: pd.DataFrame | pd.Series):
+    """Busca por nome em uma tabela indexada por nomes normalizados."""
+    return lambda names: table.index.get_indexer(normalize_names(names))
+
+
+def _missing(names: pd.Series, mask: np.ndarray) -> list:
+    """Nomes distintos (não vazios) das linhas em `mask`."""
+    return [name for name in pd.unique(names[mask]) if pd.notna(name)]
+
+
+class Transport:
+    """
+    Emissões de transporte por trecho (viagem ou remessa): modo, tipo de
+    veículo, combustível, distância e carga, ou o combustível consumido.
+
+    Todas as colunas são calculadas de uma vez para todos os trechos: os
+    fatores de cada combustível e veículo distintos são buscados uma única
+    vez e aplicados com indexação de arrays.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Inicializa a classe Transport com um DataFrame.
+
+        :param df: DataFrame com um trecho por linha.
+        """
+        self.df = df
+        self.fuel_parameters = get_fuel_parameters()
+        self.vehicle_factors = get_vehicle_factors()
+        self.railway_factors = get_repository().table(
+            MOBILE_COMBUSTION_PATH, sheet_name="railway", key_column="railway"
+        )
+        self.missing_factors = []
+        self.missing_rows = empty_missing_rows()
+
+    def numeric(self, column: str) -> np.ndarray:
+        """Coluna numérica (NaN se ausente ou não numérica)."""
+        if column not in self.df:
+            return np.full(len(self.df), np.nan)
+        return pd.to_numeric(self.df[column], errors="coerce").to_numpy(dtype=float)
+
+    @timed
+    def calculate_consumption(self, tkm: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Consumo de combustível (litros) de cada trecho: o valor informado em
+        "Consumo" ou t.km * fator de consumo do tipo de veículo.
+
+        :param tkm: t.km de cada trecho.
+        :return: Tupla (fator de consumo litro/t.km, consumo em litros).
+        """
+        vehicles = self.df["Tipo de veículo"]
+        positions = _lookup(_indexer(self.vehicle_factors), vehicles)
+        factor = np.where(
+            positions >= 0, self.vehicle_factors.to_numpy()[np.maximum(positions, 0)], np.nan
+        )
+
+        informed = self.numeric("Consumo")
+        consumption = np.where(np.isnan(informed), tkm * factor, informed)
+
+        # veículos sem fator só faltam quando o consumo não foi informado e o
+        # trecho não é ferroviário (ver calculate_railway_emissions)
+        needed = np.isnan(informed) & ~self.is_railway
+        self.missing_factors += _missing(vehicles, needed & (positions < 0))
+        self.missing_rows = missing_rows(vehicles, needed & (positions < 0), self.missing_rows)
+
+        return factor, consumption
+
+    @timed
+    def calculate_fuel_emissions(self, consumption: np.ndarray) -> pd.DataFrame:
+        """
+        Calcula CO2 fóssil e biogênico, CH4, N2O (kg) e consumo em kg pelo
+        combustível consumido.
+
+        :param consumption: Consumo de cada trecho (litros).
+        :return: DataFrame com as colunas de FUEL_OUTPUTS.
+        """
+        fuels = self.df["Combustível (Nomenclatura Inv. GEE)"]
+        positions = _lookup(_indexer(self.fuel_parameters), fuels)
+
+        burned = ~np.isnan(consumption) & (consumption != 0)
+        self.missing_factors += _missing(fuels, burned & (positions < 0))
+        self.missing_rows = missing_rows(fuels, burned & (positions < 0), self.missing_rows)
+
+        matrix = np.vstack(
+            [self.fuel_parameters[list(FUEL_OUTPUTS)].to_numpy(), np.zeros(len(FUEL_OUTPUTS))]
+        )
+        per_litre = matrix[np.where(positions >= 0, positions, len(matrix) - 1)]
+        values = per_litre * np.nan_to_num(consumption)[:, None]
+
+        return pd.DataFrame(values, columns=list(FUEL_OUTPUTS.values()), index=self.df.index)
+
+    @timed
+    def calculate_railway_emissions(self, tkm: np.ndarray, consumption: np.ndarray):
+        """
+        Trechos ferroviários sem consumo de combustível usam os fatores por
+        t.km da aba railway (do tipo de veículo ou, se não houver, da média
+        nacional).
+
+        :return: Tupla (máscara dos trechos, matriz trechos x RAILWAY_OUTPUTS em kg).
+        """
+        rows = self.is_railway & np.isnan(consumption)
+        positions = _lookup(self.railway_factors.positions, self.df["Tipo de veículo"].where(rows))
+        default = self.railway_factors.position(RAILWAY_DEFAULT)
+        positions = np.where(positions >= 0, positions, -1 if default is None else default)
+
+        factors = np.column_stack(
+            [self.railway_factors.column(column) for column in RAILWAY_OUTPUTS]
+        )
+        factors = np.vstack([factors, np.zeros(len(RAILWAY_OUTPUTS))])
+        values = factors[np.where(positions >= 0, positions, len(factors) - 1)]
+
+        return rows, values * np.nan_to_num(tkm)[:, None]
+
+    @timed
+    def calculate_production_emissions(self) -> pd.DataFrame:
+        """
+        Calcula as emissões de produção do combustível (fóssil, biogênica e
+        LUC) em tCO2e a partir do consumo em kg e dos fatores da Nomenclatura
+        Pegada de Carbono.
+        """
+        names = self.df["Combustível (Nomenclatura Pegada de Carbono)"]
+        factors = get_emission_factors(
+            names,
+            ["fossil_emission_factor", "biogenic_emission_factor", "luc_emission_factor"],
+            defaults={
+                "fossil_emission_factor": 0,
+                "biogenic_emission_factor": 0,
+                "luc_emission_factor": 0,
+            },
+        )
+        self.missing_factors += factors.attrs["missing"]
+        self.missing_rows = missing_rows(
+            names, names.isin(factors.attrs["missing"]), self.missing_rows
+        )
+        consumption_kg = self.df["Consumo (kg)"]
+
+        return pd.DataFrame(
+            {
+                "Emissões fósseis de produção (tCO2e)": consumption_kg
+                * factors["fossil_emission_factor"]
+                / 1000,
+                "Emissões biogênicas de produção (tCO2e)": consumption_kg
+                * factors["biogenic_emission_factor"]
+                / 1000,
+                "Emissões LUC de produção (tCO2e)": consumption_kg
+                * factors["luc_emission_factor"]
+                / 1000,
+            },
+            index=self.df.index,
+        )
+
+    def process(self) -> pd.DataFrame:
+        self.missing_factors = []
+        self.missing_rows = empty_missing_rows()
+        self.is_railway = normalize_names(self.df["Tipo de transporte"]) == RAILWAY_MODE
+
+        tkm = self.numeric("Distância (km)") * self.numeric("Carga transportada (t)")
+        self.df["t.km"] = tkm
+
+        factor, consumption = self.calculate_consumption(tkm)
+        self.df["Fator de consumo (litro/t.km)"] = factor
+        self.df["Consumo (litros)"] = consumption
+
+        emissions = self.calculate_fuel_emissions(consumption)
+        railway, railway_emissions = self.calculate_railway_emissions(tkm, consumption)
+        for position, column in enumerate(RAILWAY_OUTPUTS.values()):
+            emissions[column] = np.where(
+                railway, railway_emissions[:, position], emissions[column]
+            )
+        for column in emissions.columns:
+            self.df[column] = emissions[column]
+
+        self.df["Emissões de uso - fóssil (tCO2e)"] = (
+            self.df["Emissões CO2 (kgCO2)"]
+            + self.df["Emissões CH4 (kgCH4)"] * get_gwp("CH4")
+            + self.df["Emissões N2O (kgN2O)"] * get_gwp("N2O")
+        ) / 1000
+        self.df["Emissões de uso - biogênico (tCO2e)"] = (
+            self.df["Emissões CO2 - biogênico (kgCO2)"] / 1000
+        )
+
+        production = self.calculate_production_emissions()
+        for column in production.columns:
+            self.df[column] = production[column]
+
+        self.df["Emissões fósseis totais (tCO2e)"] = (
+            self.df["Emissões de uso - fóssil (tCO2e)"]
+            + self.df["Emissões fósseis de produção (tCO2e)"]
+        )
+        self.df["Emissões Biogênicas totais (tCO2e)"] = (
+            self.df["Emissões de uso - biogênico (tCO2e)"]
+            + self.df["Emissões biogênicas de produção (tCO2e)"]
+        )
+
+        self.missing_factors = list(dict.fromkeys(self.missing_factors))
+
+        return self.df
+
+
+def test_transport():
+    file = upload_file("transport")
+    if file is None:
+        return
+
+    processed, _ = run_cached("transport", file)
+
+    st.dataframe(processed, hide_index=True)
+
+    show_results("transport", processed)
@@ -0,0 +1,401 @@
+import io
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from processing.export import (
+    EXPORT_FORMATS,
+    EXPORT_ROOT,
+    MIME_TYPES,
+    export_download,
+    export_to_directory,
+    resolve_export_directory,
+)
+from processing.incremental import changes_since, profile_update, shared_result
+from processing.jobs import JobCancelled, submit_job
+from processing.ledger import build_ledger, totals, widen
+from processing.registry import summarize
+from processing.scenarios import SCENARIO_TERMS, compare_scenarios
+from utils.gwp import ASSESSMENTS, GwpScenario, assessment_scenarios, parse_overrides
+from utils.profiling import stages_frame
+from utils.result_cache import (
+    content_hash,
+    estimate_size,
+    factor_set_version,
+    get_result_cache,
+    read_only,
+)
+
+# Tempo que a página espera pelo cálculo antes de exibir a barra de progresso
+INLINE_WAIT = 0.5
+
+# Intervalo de atualização da barra de progresso (segundos)
+PROGRESS_INTERVAL = 0.5
+
+
+def upload_file(key: str):
+    """
+    Campo de upload de planilha cujo arquivo sobrevive à troca de módulo.
+
+    O Streamlit descarta o estado dos widgets que não são exibidos em uma
+    execução; como só o módulo ativo é executado, o conteúdo enviado é
+    guardado na sessão e só muda quando o usuário envia ou remove o arquivo.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :return: Arquivo em memória (BytesIO com `name`) ou None.
+    """
+    stored_key = f"{key}_upload"
+
+    def store():
+        file = st.session_state[key]
+        st.session_state[stored_key] = (
+            None if file is None else (file.name, file.getvalue())
+        )
+
+    st.file_uploader("Escolha um arquivo", type=["xlsx"], key=key, on_change=store)
+
+    stored = st.session_state.get(stored_key)
+    if stored is None:
+        return None
+
+    name, data = stored
+    if st.session_state.get(key) is None:
+        st.caption(f"Arquivo carregado: {name}")
+
+    file = io.BytesIO(data)
+    file.name = name
+    return file
+
+
+def cached_result(key: str, file, compute, *variant, shared=None, from_shared=None):
+    """
+    Obtém o resultado de `compute(file)` reaproveitando cálculos anteriores
+    do mesmo conteúdo com o mesmo conjunto de fatores.
+
+    A chave do cache é (key, hash do conteúdo, versão das planilhas de
+    fatores, *variant), então reexecuções do Streamlit e novos envios do
+    mesmo arquivo não recalculam nada. O último resultado de cada `key`
+    também fica na sessão, para que voltar a uma página não dependa do cache
+    compartilhado. Exibe o estado do cache abaixo do upload.
+
+    Cálculos novos rodam em segundo plano (ver `run_job`). As sessões
+    compartilham os arrays do resultado, sem cópias, então cada uma recebe
+    DataFrames próprios e somente leitura (ver
+    utils.result_cache.read_only): alterar valores no lugar lança
+    ValueError; para modificar, use uma cópia (`df.copy()`).
+
+    :param key: Identificação da página (ex.: o nome do módulo).
+    :param file: Arquivo enviado (ver `upload_file`).
+    :param compute: Função que calcula o resultado a partir do arquivo,
+        `compute(file, progress)` (ver processing.jobs).
+    :param variant: Opções que alteram o resultado (entram na chave).
+    :param shared: Converte o resultado calculado no valor guardado no cache
+        compartilhado, sem o que só vale para esta sessão.
+    :param from_shared: Converte um valor do cache compartilhado no
+        resultado desta sessão.
+    :return: Resultado de `compute`, somente leitura.
+    """
+    cache = get_result_cache()
+    cache_key = (key, content_hash(file.getvalue()), factor_set_version(), *variant)
+
+    last_key, last_result = st.session_state.get(f"{key}_result", (None, None))
+    hit = last_key == cache_key
+    if hit:
+        cached = last_result
+    else:
+        cached = cache.get(cache_key)
+        hit = cached is not None
+
+        if not hit:
+            computed = run_job(key, cache_key, compute, file)
+            cached, stored = read_only(computed), read_only(computed)
+            cache.put(
+                cache_key,
+                stored if shared is None else shared(stored),
+                estimate_size(computed),
+            )
+        else:
+            # DataFrames próprios da sessão sobre os mesmos arrays: colunas
+            # novas não aparecem nas outras sessões
+            cached = read_only(cached)
+            if from_shared is not None:
+                cached = from_shared(cached)
+
+        st.session_state[f"{key}_result"] = (cache_key, cached)
+
+    show_cache_status(hit)
+
+    return cached
+
+
+def result_key(key: str):
+    """Chave do cache do último resultado de `key` nesta sessão (ver `cached_result`)."""
+    return st.session_state.get(f"{key}_result", (None, None))[0]
+
+
+def run_job(key: str, cache_key, compute, file):
+    """
+    Executa `compute(file, progress)` como job em segundo plano (ver
+    processing.jobs), guardado na sessão junto da chave do resultado.
+
+    O job sobrevive às reexecuções da página: interações enquanto ele roda
+    só redesenham o progresso. Um envio diferente cancela o job anterior.
+    Cálculos curtos terminam dentro de INLINE_WAIT e aparecem na mesma
+    execução; nos demais, a página exibe a barra de progresso e para
+    (`st.stop`) até o job terminar.
+
+    Fora de uma sessão do Streamlit (ex.: testes), calcula diretamente.
+
+    :return: Resultado de `compute`.
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return compute(file, None)
+
+    job_key = f"{key}_job"
+    job, job_cache_key = st.session_state.get(job_key, (None, None))
+    if job is not None and job_cache_key != cache_key:
+        job.cancel()
+        job = None
+
+    if job is None:
+        job = submit_job(key, compute, file)
+        st.session_state[job_key] = (job, cache_key)
+
+    try:
+        result = job.result(timeout=INLINE_WAIT)
+    except FutureTimeoutError:
+        show_job_progress(key)
+        st.stop()
+    except JobCancelled:
+        st.info("Cálculo cancelado.")
+        if st.button("Calcular novamente", key=f"{key}_job_restart"):
+            del st.session_state[job_key]
+            st.rerun()
+        st.stop()
+    except Exception:
+        del st.session_state[job_key]
+        raise
+
+    del st.session_state[job_key]
+    return result
+
+
+@st.fragment(run_every=PROGRESS_INTERVAL)
+def show_job_progress(key: str):
+    """
+    Barra de progresso do job da página, atualizada sem reexecutar a página
+    inteira; quando o job termina, reexecuta a página para exibir o
+    resultado.
+    """
+    job, _ = st.session_state.get(f"{key}_job", (None, None))
+    if job is None or job.done or job.cancelled.is_set():
+        st.rerun(scope="app")
+
+    st.progress(job.progress, text=f"{job.message} · {job.elapsed:.0f}s")
+    if st.button("Cancelar", key=f"{key}_job_cancel"):
+        job.cancel()
+        st.rerun(scope="app")
+
+
+def run_cached(key: str, file, sheet_name=0):
+    """
+    Executa um módulo sobre um arquivo enviado, reaproveitando o resultado
+    quando possível (ver `cached_result`), e exibe o painel "Desempenho" da
+    execução que calculou o resultado.
+
+    Quando o arquivo muda, só as linhas inseridas, alteradas ou removidas em
+    relação ao último resultado da sessão são recalculadas (ver
+    processing.incremental) e as linhas alteradas são listadas. O cache
+    compartilhado guarda o resultado sem as linhas alteradas, que são
+    obtidas para cada sessão em relação ao seu próprio envio anterior.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param file: Arquivo enviado (ver `upload_file`).
+    :param sheet_name: Aba da planilha de entrada.
+    :return: Tupla (DataFrame processado, instância da classe do módulo).
+    """
+    use_cprofile = st.session_state.get(f"{key}_cprofile", False)
+    previous = last_module_result(key)
+
+    result, report = cached_result(
+        key,
+        file,
+        lambda upload, progress: profile_update(
+            key, upload, previous, use_cprofile, sheet_name, progress
+        ),
+        use_cprofile,
+        shared=lambda value: (shared_result(value[0]), value[1]),
+        from_shared=lambda value: (changes_since(value[0], previous), value[1]),
+    )
+    show_changes(result)
+    show_performance(key, report)
+
+    return result.processed, result.instance
+
+
+def last_module_result(key: str):
+    """Último resultado de um módulo na sessão (ver `run_cached`), ou None."""
+    _, last_result = st.session_state.get(f"{key}_result", (None, None))
+    return last_result[0] if last_result is not None else None
+
+
+def show_changes(result):
+    """Lista as linhas alteradas em relação ao envio anterior, se houver."""
+    if result.changes.empty:
+        return
+
+    with st.expander(
+        f"{len(result.changes)} linhas alteradas desde o envio anterior · "
+        f"{result.recomputed} de {len(result.processed)} linhas recalculadas"
+    ):
+        st.dataframe(result.changes, hide_index=True, use_container_width=True)
+
+
+def show_cache_status(hit: bool):
+    """Exibe se o resultado veio do cache e os contadores do cache."""
+    cache = get_result_cache()
+    status = "resultado reaproveitado do cache" if hit else "resultado calculado"
+    st.caption(
+        f"{status.capitalize()} · cache: {len(cache)} entradas, "
+        f"{cache.size_bytes / 1024 / 1024:.1f} MB, "
+        f"{cache.stats.hits} acertos, {cache.stats.misses} falhas, "
+        f"{cache.stats.evictions} descartes"
+    )
+
+
+def show_performance(key: str, report: dict):
+    """
+    Painel "Desempenho": tempo e buscas de fatores de cada etapa da execução
+    que calculou o resultado e, se ativado, as funções mais custosas.
+    """
+    with st.expander("Desempenho"):
+        st.caption(
+            f"{report['rows']} linhas em {report['seconds']:.3f}s · "
+            f"{report['lookups']} buscas de fatores"
+        )
+        st.dataframe(stages_frame(report), hide_index=True, use_container_width=True)
+
+        st.toggle(
+            "Executar com cProfile",
+            key=f"{key}_cprofile",
+            help="Recalcula o módulo sob o cProfile e lista as funções mais custosas.",
+        )
+        if report["cprofile"]:
+            st.dataframe(pd.DataFrame(report["cprofile"]), hide_index=True)
+
+
+def show_results(key: str, processed: pd.DataFrame):
+    """
+    Seção "Resultados" de um módulo: o resumo de uma linha (ver
+    processing.registry.summarize) e os totais por escopo e categoria, obtidos
+    do livro de emissões (ver processing.ledger).
+
+    Se `processed` é o último resultado da sessão, usa os totais já
+    calculados (e corrigidos a cada novo envio, ver processing.incremental).
+    """
+    result = last_module_result(key)
+
+    if result is not None and result.processed is processed:
+        summary, scope_totals = result.summary, widen(result.scope_totals, ["Escopo"])
+    else:
+        summary = summarize(key, processed)
+        scope_totals = totals(build_ledger(key, processed), ["Escopo"])
+
+    st.title("Resultados")
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+
+    st.subheader("Totais por escopo")
+    st.dataframe(scope_totals, hide_index=True, use_container_width=True)
+
+    show_export(
+        key,
+        {"Resultados": processed, "Resumo": summary, "Totais por escopo": scope_totals},
+    )
+
+    if key in SCENARIO_TERMS:
+        show_scenarios(key, processed)
+
+
+def show_export(key: str, tables: dict):
+    """
+    Seção "Exportar": grava as tabelas em XLSX (uma aba por tabela) ou em
+    CSV/Parquet (um arquivo por tabela) com os escritores em blocos de
+    processing.export, para download ou em um diretório do servidor dentro
+    de EXPORT_ROOT.
+
+    O arquivo de download só é gerado quando o botão é clicado.
+
+    :param key: Identificação da página (nome do arquivo baixado).
+    :param tables: Nome -> DataFrame, na ordem de gravação.
+    """
+    with st.expander("Exportar"):
+        output_format = st.selectbox(
+            "Formato",
+            list(EXPORT_FORMATS),
+            format_func=EXPORT_FORMATS.get,
+            key=f"{key}_export_format",
+            help="Para resultados grandes, CSV e Parquet são bem mais rápidos que XLSX.",
+        )
+        extension = "xlsx" if output_format == "xlsx" else "zip"
+
+        st.download_button(
+            "Baixar",
+            data=lambda: export_download(tables, output_format)[0],
+            file_name=f"{key}.{extension}",
+            mime=MIME_TYPES[extension],
+            key=f"{key}_export_download",
+            on_click="ignore",
+        )
+
+        directory = st.text_input(
+            "Diretório no servidor",
+            key=f"{key}_export_directory",
+            help=f"Relativo a {EXPORT_ROOT} (variável de ambiente LCA_EXPORT_ROOT).",
+        )
+        if st.button("Gravar no diretório", key=f"{key}_export_write", disabled=not directory):
+            try:
+                path = resolve_export_directory(directory)
+            except ValueError as error:
+                st.error(str(error))
+            else:
+                paths = export_to_directory(tables, path, output_format)
+                st.success(f"{len(paths)} arquivos gravados em {path}")
+
+
+def show_scenarios(key: str, processed: pd.DataFrame):
+    """
+    Comparação das emissões do módulo com os GWPs de vários relatórios do
+    IPCC e, opcionalmente, um cenário com GWPs informados pelo usuário
+    (ver processing.scenarios).
+    """
+    with st.expander("Cenários de GWP"):
+        assessments = st.multiselect(
+            "Relatórios do IPCC",
+            ASSESSMENTS,
+            default=ASSESSMENTS,
+            format_func=str.upper,
+            key=f"{key}_gwp_assessments",
+        )
+        text = st.text_input(
+            "GWPs personalizados (sobre o AR6)",
+            placeholder="CH4=28, N2O=265",
+            key=f"{key}_gwp_overrides",
+        )
+
+        scenarios = assessment_scenarios(assessments) if assessments else []
+        try:
+            overrides = parse_overrides(text)
+        except ValueError as error:
+            st.error(str(error))
+            overrides = {}
+        if overrides:
+            scenarios.append(GwpScenario("Personalizado", overrides=overrides))
+
+        if scenarios:
+            st.dataframe(
+                compare_scenarios(key, processed, scenarios),
+                hide_index=True,
+                use_container_width=True,
+            )
@@ -0,0 +1,520 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from processing.carbonization import get_carbonization_parameters
+from processing.forestry.fuels import BLEND_COMPONENTS
+from processing.ledger import (
+    BIOGENIC,
+    CATEGORIES,
+    CH4,
+    CONSOLIDATED_CATEGORIES,
+    FOSSIL,
+    LEDGER_SOURCES,
+    LUC,
+    N2O,
+)
+from processing.registry import get_module
+from utils.gwp import get_gwp
+from utils.names import normalize_name, normalize_names
+
+NORMAL = "normal"
+LOGNORMAL = "lognormal"
+TRIANGULAR = "triangular"
+UNIFORM = "uniform"
+
+DISTRIBUTIONS = [NORMAL, LOGNORMAL, TRIANGULAR, UNIFORM]
+
+# Parâmetros incertos dos módulos
+EMISSION_FACTOR = "Fator de emissão"
+PRODUCTION_FACTOR = "Fator de produção (Ecoinvent)"
+BLEND_FRACTION = "Fração de mistura"
+N2O_FACTOR = "Fator de emissão N2O"
+CH4_SLOPE = "Coeficiente angular CH4"
+CH4_INTERCEPT = "Coeficiente linear CH4"
+
+PERCENTILES = (2.5, 50, 97.5)
+
+# Elementos (amostras x linhas) sorteados de cada vez, para limitar a memória
+CHUNK_ELEMENTS = 1 << 22
+
+# A partir deste número de amostras x linhas, as amostras são divididas
+# entre processos
+PARALLEL_ELEMENTS = 1 << 26
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """
+    Distribuição de um multiplicador aplicado ao valor nominal (mediana ou
+    moda em 1).
+
+    `spread` depende do tipo: desvio padrão relativo (normal), desvio padrão
+    geométrico (lognormal, >= 1) ou meia largura relativa do intervalo
+    (triangular e uniforme; ex.: 0.1 para +-10%).
+    """
+
+    kind: str = NORMAL
+    spread: float = 0.0
+
+    def __post_init__(self):
+        if self.kind not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Distribuição desconhecida: {self.kind}. Opções: {', '.join(DISTRIBUTIONS)}"
+            )
+        if self.spread < 0 or (self.kind == LOGNORMAL and 0 < self.spread < 1):
+            raise ValueError(f"Dispersão inválida para {self.kind}: {self.spread}")
+
+    def sample(self, rng: np.random.Generator, shape) -> np.ndarray:
+        """Sorteia multiplicadores (valores negativos são truncados em 0)."""
+        if self.spread == 0 or (self.kind == LOGNORMAL and self.spread == 1):
+            return np.ones(shape)
+        if self.kind == NORMAL:
+            return np.maximum(rng.normal(1.0, self.spread, shape), 0.0)
+        if self.kind == LOGNORMAL:
+            return np.exp(rng.normal(0.0, np.log(self.spread), shape))
+        low, high = max(1.0 - self.spread, 0.0), 1.0 + self.spread
+        if self.kind == TRIANGULAR:
+            return rng.triangular(low, 1.0, high, shape)
+        return rng.uniform(low, high, shape)
+
+
+@dataclass(frozen=True)
+class UncertaintySettings:
+    """Distribuições das quantidades de entrada e dos parâmetros dos módulos."""
+
+    # incerteza da quantidade de cada linha (sorteada linha a linha)
+    quantity: Distribution = field(default_factory=Distribution)
+    # parâmetros sem distribuição própria em `parameters`
+    factor: Distribution = field(default_factory=Distribution)
+    # nome do parâmetro (ex.: BLEND_FRACTION) -> distribuição
+    parameters: dict = field(default_factory=dict)
+
+    def distribution(self, parameter: str) -> Distribution:
+        return self.parameters.get(parameter, self.factor)
+
+
+@dataclass(frozen=True)
+class Term:
+    """
+    Parcela de uma categoria de um módulo, linear em cada parâmetro:
+
+        valor(amostra) = soma das linhas de
+            valor nominal * quantidade * produto de (1 + participação * (m - 1))
+
+    onde m é o multiplicador sorteado do parâmetro para a chave da linha.
+    """
+
+    category: str
+    unit: str
+    # valor nominal de cada linha
+    values: np.ndarray
+    # (parâmetro, chave do fator de cada linha ou None para um único valor,
+    #  participação do parâmetro em cada linha ou None para 1)
+    factors: tuple = ()
+
+
+@dataclass(frozen=True)
+class ModuleModel:
+    """Parcelas de um módulo, com as chaves dos fatores já codificadas."""
+
+    key: str
+    rows: int
+    # (categoria, unidade, valores, ((parâmetro, códigos ou None, participação), ...))
+    terms: tuple
+    # parâmetro -> número de chaves distintas
+    sizes: dict
+
+
+def _column(processed: pd.DataFrame, column: str) -> np.ndarray:
+    return pd.to_numeric(processed[column], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+def _ledger_terms(
+    key: str, processed: pd.DataFrame, parameter: str, factor_column: str
+) -> list[Term]:
+    """Uma parcela por fonte do livro de emissões, com o fator da coluna indicada."""
+    keys = processed[factor_column].to_numpy(dtype=object)
+    return [
+        Term(
+            source.category,
+            source.unit,
+            sum(_column(processed, column) for column in source.columns),
+            ((parameter, keys, None),),
+        )
+        for source in LEDGER_SOURCES[key]
+    ]
+
+
+def _fuels_terms(processed: pd.DataFrame) -> list[Term]:
+    fuels = processed["Combustível (Nomenclatura Inv. GEE)"].to_numpy(dtype=object)
+    products = processed["Combustível (Nomenclatura Pegada de Carbono)"].to_numpy(dtype=object)
+    fractions = {
+        normalize_name(fuel): fraction for fuel, (_, fraction) in BLEND_COMPONENTS.items()
+    }
+    fraction = np.array([fractions.get(name, 0.0) for name in normalize_names(fuels)])
+
+    combustion = (EMISSION_FACTOR, fuels, None)
+    production = (PRODUCTION_FACTOR, products, None)
+    # a fração renovável da mistura desloca CO2 da parcela fóssil para a biogênica
+    fossil_blend = (BLEND_FRACTION, fuels, -fraction / (1 - fraction))
+    biogenic_blend = (BLEND_FRACTION, fuels, None)
+
+    co2 = _column(processed, "Emissões CO2 (kgCO2)") / 1000
+    fossil_combustion = _column(processed, "Emissões Fósseis Combustão (tCO2e)")
+
+    return [
+        Term(FOSSIL, "tCO2e", co2, (combustion, fossil_blend)),
+        Term(FOSSIL, "tCO2e", fossil_combustion - co2, (combustion,)),
+        Term(
+            BIOGENIC,
+            "tCO2e",
+            _column(processed, "Emissões Biogênicas Combustão (tCO2e)"),
+            (combustion, biogenic_blend),
+        ),
+        Term(
+            FOSSIL,
+            "tCO2e",
+            _column(processed, "Emissões CO2 Fósseis - Produção (tCO2)"),
+            (production,),
+        ),
+        Term(
+            BIOGENIC,
+            "tCO2e",
+            _column(processed, "Emissões CO2 Biogênico - Produção (tCO2)"),
+            (production,),
+        ),
+        Term(
+            LUC,
+            "tCO2e",
+            _column(processed, "Emissões CO2 LUC - Produção (tCO2)"),
+            (production,),
+        ),
+        Term(CH4, "kgCH4", _column(processed, "Emissões CH4 (kgCH4)"), (combustion,)),
+        Term(N2O, "kgN2O", _column(processed, "Emissões N2O (kgN2O)"), (combustion,)),
+    ]
+
+
+def _fertilizers_terms(processed: pd.DataFrame) -> list[Term]:
+    limestone = processed["Calcário Calcítico ou Dolomítico"].to_numpy(dtype=object)
+    names = processed["Nome no Estudo"].to_numpy(dtype=object)
+    n2o = _column(processed, "Emissões kgN2O")
+
+    production = (PRODUCTION_FACTOR, names, None)
+    n2o_factor = (N2O_FACTOR, None, None)
+
+    return [
+        Term(
+            FOSSIL,
+            "tCO2e",
+            _column(processed, "Emissões kgCO2") / 1000,
+            ((EMISSION_FACTOR, limestone, None),),
+        ),
+        Term(FOSSIL, "tCO2e", n2o * get_gwp("N2O") / 1000, (n2o_factor,)),
+        Term(
+            FOSSIL,
+            "tCO2e",
+            _column(processed, "Emissões Fósseis Produção tCO2e"),
+            (production,),
+        ),
+        Term(
+            BIOGENIC,
+            "tCO2e",
+            _column(processed, "Emissões Biogênicas Produção tCO2e"),
+            (production,),
+        ),
+        Term(LUC, "tCO2e", _column(processed, "Emissões LUC Produção tCO2e"), (production,)),
+        Term(N2O, "kgN2O", n2o, (n2o_factor,)),
+    ]
+
+
+def _carbonization_terms(processed: pd.DataFrame) -> list[Term]:
+    parameters = get_carbonization_parameters()
+    # CH4 = (a * rendimento + b) * produção: parcela de cada coeficiente
+    slope = parameters["ch4_slope"] * _column(processed, "Rendimento Gravimétrico (%)")
+    total = slope + parameters["ch4_intercept"]
+    slope_share = np.divide(slope, total, out=np.zeros_like(total), where=total != 0)
+
+    terms = []
+    for source in LEDGER_SOURCES["carbonization"]:
+        values = _column(processed, source.columns[0])
+        terms += [
+            Term(source.category, source.unit, values * slope_share, ((CH4_SLOPE, None, None),)),
+            Term(
+                source.category,
+                source.unit,
+                values * (1 - slope_share),
+                ((CH4_INTERCEPT, None, None),),
+            ),
+        ]
+    return terms
+
+
+# Módulo -> parcelas a partir do DataFrame processado
+MODULE_TERMS = {
+    "forestry_fuels": _fuels_terms,
+    "forestry_fertilizers": _fertilizers_terms,
+    "forestry_energy": lambda df: _ledger_terms(
+        "forestry_energy", df, EMISSION_FACTOR, "Fonte de Energia"
+    ),
+    "carbonization": _carbonization_terms,
+    "transport": lambda df: _ledger_terms(
+        "transport", df, EMISSION_FACTOR, "Combustível (Nomenclatura Inv. GEE)"
+    ),
+    "industrial": lambda df: _ledger_terms(
+        "industrial", df, PRODUCTION_FACTOR, "Nome no Estudo (Ecoinvent)"
+    ),
+    "quartz_mining": lambda df: _ledger_terms(
+        "quartz_mining", df, PRODUCTION_FACTOR, "Nome no estudo"
+    ),
+}
+
+
+def build_model(key: str, processed: pd.DataFrame) -> ModuleModel:
+    """
+    Decompõe o resultado de um módulo em parcelas lineares nos parâmetros
+    (ver `Term`), codificando as chaves dos fatores de cada parâmetro.
+
+    :param key: Nome do módulo (ver processing.registry).
+    :param processed: DataFrame retornado pelo módulo.
+    :return: Modelo do módulo, pronto para ser enviado a outros processos.
+    """
+    get_module(key)
+    terms = MODULE_TERMS[key](processed.reset_index(drop=True))
+
+    # códigos consistentes entre as parcelas que compartilham um parâmetro
+    keys = {}
+    for term in terms:
+        for parameter, values, _ in term.factors:
+            if values is not None:
+                keys.setdefault(parameter, []).append(values)
+    codes = {}
+    sizes = {}
+    for parameter, values in keys.items():
+        codes[parameter], uniques = pd.factorize(
+            pd.Series(np.concatenate(values), dtype=object), use_na_sentinel=False
+        )
+        sizes[parameter] = len(uniques)
+
+    offsets = dict.fromkeys(codes, 0)
+    encoded = []
+    for term in terms:
+        factors = []
+        for parameter, values, share in term.factors:
+            if values is None:
+                sizes.setdefault(parameter, 1)
+                factors.append((parameter, None, share))
+                continue
+            start = offsets[parameter]
+            offsets[parameter] += len(values)
+            factors.append((parameter, codes[parameter][start : start + len(values)], share))
+        encoded.append((term.category, term.unit, term.values, tuple(factors)))
+
+    return ModuleModel(key, len(processed), tuple(encoded), sizes)
+
+
+def _simulate_module(
+    model: ModuleModel, settings: UncertaintySettings, rng: np.random.Generator, samples: int
+) -> dict:
+    """Soma de cada (categoria, unidade) do módulo em `samples` amostras."""
+    draws = {
+        parameter: settings.distribution(parameter).sample(rng, (samples, size))
+        for parameter, size in model.sizes.items()
+    }
+    quantity = (
+        settings.quantity.sample(rng, (samples, model.rows))
+        if settings.quantity.spread
+        else None
+    )
+
+    totals = {}
+    for category, unit, values, factors in model.terms:
+        weights = quantity
+        for parameter, codes, share in factors:
+            multiplier = draws[parameter][:, codes] if codes is not None else draws[parameter]
+            if share is not None:
+                multiplier = np.maximum(1 + share * (multiplier - 1), 0.0)
+            weights = multiplier if weights is None else weights * multiplier
+
+        if weights is None:
+            result = np.full(samples, values.sum())
+        elif weights.shape[1] == 1:
+            result = weights[:, 0] * values.sum()
+        else:
+            result = weights @ values
+
+        totals[category, unit] = totals.get((category, unit), 0) + result
+
+    return totals
+
+
+def _simulate(
+    models: list[ModuleModel],
+    settings: UncertaintySettings,
+    iterations: int,
+    seed: np.random.SeedSequence,
+) -> dict:
+    """
+    Sorteia `iterations` amostras de todos os módulos, em blocos de
+    amostras que cabem em CHUNK_ELEMENTS. Executado nos processos do pool.
+
+    :return: (módulo, categoria, unidade) -> array com as amostras.
+    """
+    rng = np.random.default_rng(seed)
+    largest = max([model.rows for model in models] + [1])
+    chunk = max(1, CHUNK_ELEMENTS // largest)
+
+    blocks = {}
+    for start in range(0, iterations, chunk):
+        samples = min(chunk, iterations - start)
+        for model in models:
+            for (category, unit), values in _simulate_module(
+                model, settings, rng, samples
+            ).items():
+                blocks.setdefault((model.key, category, unit), []).append(values)
+
+    return {name: np.concatenate(values) for name, values in blocks.items()}
+
+
+def simulate(
+    models: list[ModuleModel],
+    settings: UncertaintySettings,
+    iterations: int = 10_000,
+    seed: int | None = None,
+    workers: int | None = None,
+) -> dict:
+    """
+    Simulação de Monte Carlo dos modelos dos módulos.
+
+    As amostras são sorteadas em lote: cada parâmetro vira uma matriz
+    amostras x chaves e cada parcela, um produto matriz-vetor sobre as
+    linhas. Com muitas amostras x linhas, as amostras são divididas entre
+    `workers` processos, cada um com sua semente derivada de `seed` (o
+    resultado é reprodutível para a mesma semente e o mesmo número de
+    processos).
+
+    :param models: Modelos dos módulos (ver `build_model`).
+    :param settings: Distribuições das quantidades e dos parâmetros.
+    :param iterations: Número de amostras.
+    :param seed: Semente do gerador (None: aleatória).
+    :param workers: Número de processos (padrão: número de CPUs).
+    :return: (módulo, categoria, unidade) -> array com as amostras.
+    """
+    workers = workers or os.cpu_count() or 1
+    elements = iterations * sum(model.rows for model in models)
+    shards = min(workers, iterations) if elements >= PARALLEL_ELEMENTS else 1
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    sizes = [iterations // shards + (shard < iterations % shards) for shard in range(shards)]
+
+    if shards == 1:
+        return _simulate(models, settings, iterations, seeds[0])
+
+    with ProcessPoolExecutor(max_workers=shards) as executor:
+        parts = list(
+            executor.map(
+                _simulate,
+                [models] * shards,
+                [settings] * shards,
+                sizes,
+                seeds,
+            )
+        )
+
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def _describe(samples: np.ndarray, percentiles) -> dict:
+    values = np.percentile(samples, percentiles)
+    return {
+        "Média": samples.mean(),
+        "Desvio padrão": samples.std(ddof=1) if len(samples) > 1 else 0.0,
+        **{f"P{percentile:g}": value for percentile, value in zip(percentiles, values)},
+    }
+
+
+def uncertainty_report(
+    models: list[ModuleModel], samples: dict, percentiles=PERCENTILES
+) -> pd.DataFrame:
+    """
+    Percentis das amostras por módulo e categoria e do consolidado (módulo
+    "Total", por unidade, com o balanço das categorias consolidadas).
+
+    :param models: Modelos simulados (para os valores nominais).
+    :param samples: Resultado de `simulate`.
+    :param percentiles: Percentis a calcular.
+    :return: DataFrame com uma linha por módulo, categoria e unidade.
+    """
+    nominal = {}
+    for model in models:
+        for category, unit, values, _ in model.terms:
+            name = (model.key, category, unit)
+            nominal[name] = nominal.get(name, 0.0) + values.sum()
+
+    consolidated = {}
+    for (_, category, unit), values in samples.items():
+        consolidated.setdefault((category, unit), []).append(values)
+        if category in CONSOLIDATED_CATEGORIES:
+            consolidated.setdefault(("Balanço", unit), []).append(values)
+
+    consolidated_nominal = {}
+    for (_, category, unit), value in nominal.items():
+        keys = [(category, unit)]
+        if category in CONSOLIDATED_CATEGORIES:
+            keys.append(("Balanço", unit))
+        for name in keys:
+            consolidated_nominal[name] = consolidated_nominal.get(name, 0.0) + value
+
+    units = list(dict.fromkeys(unit for _, unit in consolidated))
+    categories = [*CATEGORIES, "Balanço"]
+
+    def order(item):
+        category, unit = item[0]
+        return units.index(unit), categories.index(category)
+
+    rows = [
+        {
+            "Módulo": key,
+            "Categoria": category,
+            "Unidade": unit,
+            "Nominal": nominal[key, category, unit],
+            **_describe(values, percentiles),
+        }
+        for (key, category, unit), values in samples.items()
+    ]
+    rows += [
+        {
+            "Módulo": "Total",
+            "Categoria": category,
+            "Unidade": unit,
+            "Nominal": consolidated_nominal[category, unit],
+            **_describe(np.sum(values, axis=0), percentiles),
+        }
+        for (category, unit), values in sorted(consolidated.items(), key=order)
+    ]
+
+    return pd.DataFrame(rows)
+
+
+def run_uncertainty(
+    results: dict,
+    settings: UncertaintySettings,
+    iterations: int = 10_000,
+    seed: int | None = None,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Análise de incerteza dos resultados de um ou mais módulos.
+
+    :param results: Nome do módulo -> DataFrame processado.
+    :param settings: Distribuições das quantidades e dos parâmetros.
+    :param iterations: Número de amostras.
+    :param seed: Semente do gerador.
+    :param workers: Número de processos (ver `simulate`).
+    :return: Percentis por módulo e consolidados (ver `uncertainty_report`).
+    """
+    models = [build_model(key, processed) for key, processed in results.items()]
+    samples = simulate(models, settings, iterations, seed, workers)
+    return uncertainty_report(models, samples)
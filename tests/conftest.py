@@ -0,0 +1,19 @@
+import pytest
+
+import utils.factor_repository as factor_repository
+
+
+@pytest.fixture(autouse=True)
+def isolated_factor_repository(request, tmp_path, monkeypatch):
+    """
+    Testes que simulam as planilhas (`mock_excel_data`) usam um repositório de
+    fatores próprio, para que os dados simulados não contaminem o cache
+    compilado compartilhado.
+    """
+    if "mock_excel_data" not in request.fixturenames:
+        yield factor_repository.get_repository()
+        return
+
+    repository = factor_repository.FactorRepository(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(factor_repository, "_repository", repository)
+    yield repository
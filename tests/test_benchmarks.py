@@ -0,0 +1,44 @@
+import json
+
+import pandas as pd
+
+from benchmarks import run
+from benchmarks.generators import generate
+from utils.emission_factors import get_emission_factors_table
+
+
+def test_generate_is_seeded_and_uses_factor_names():
+    first = generate("industrial", 500, seed=1)
+    second = generate("industrial", 500, seed=1)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert len(first) == 500
+
+    table = get_emission_factors_table()
+    positions = table.positions(first["Nome no Estudo (Ecoinvent)"])
+    assert (positions >= 0).mean() > 0.5
+
+
+def test_find_regressions_against_history_median():
+    history = [
+        {"module": "industrial", "rows": 1000, "rows_per_second": speed, "peak_rss_mb": 100}
+        for speed in [900, 1000, 1100]
+    ]
+    result = {"module": "industrial", "rows": 1000, "rows_per_second": 700, "peak_rss_mb": 130}
+
+    assert len(run.find_regressions(result, history, threshold=0.2)) == 2
+    assert run.find_regressions(result, history, threshold=0.5) == []
+    assert run.find_regressions({**result, "rows": 10}, history, threshold=0.2) == []
+
+
+def test_main_records_history(tmp_path):
+    history = tmp_path / "history.json"
+
+    code = run.main(
+        ["-m", "carbonization", "-s", "1k", "--inline", "--history", str(history)]
+    )
+
+    entries = json.loads(history.read_text(encoding="utf-8"))
+    assert code == run.EXIT_OK
+    assert entries[0]["module"] == "carbonization"
+    assert set(entries[0]["stages"]) == {"Aquecimento", "Geração", "Cálculo", "Resumo"}
@@ -0,0 +1,44 @@
+import pytest
+import pandas as pd
+
+from processing.carbonization import Carbonization, get_carbonization_parameters
+
+
+def test_parameters_are_resolved_by_name():
+    parameters = get_carbonization_parameters()
+
+    assert parameters["ch4_slope"] == pytest.approx(-460.682242)
+    assert parameters["ch4_intercept"] == pytest.approx(194.970939)
+    assert parameters["gwp_ch4"] == 27.9
+
+
+def test_rows_without_yield_produce_no_wood_or_emissions():
+    df = pd.DataFrame(
+        {
+            "Rendimento Gravimétrico (%)": [0.32, None, 0],
+            "Produção de Carvão Vegetal": [1000.0, 50.0, None],
+        }
+    )
+
+    result = Carbonization(df).process()
+
+    assert result.loc[0, "Madeira"] == pytest.approx(1000 / 0.32)
+    assert result.loc[0, "Emissões de CH4 (tCO2e)"] == pytest.approx(
+        (-460.682242 * 0.32 + 194.970939) * 1000
+    )
+    assert result.loc[1:, "Madeira"].tolist() == [0, 0]
+    assert result.loc[1:, "Emissões Biogênicas Totais (tCO2e)"].tolist() == [0, 0]
+    assert result["Produção de Carvão Vegetal"].notna().all()
+
+
+def test_zero_yield_with_production_produces_no_wood_or_emissions():
+    df = pd.DataFrame(
+        {"Rendimento Gravimétrico (%)": [0.0], "Produção de Carvão Vegetal": [100.0]}
+    )
+
+    result = Carbonization(df).process()
+
+    assert result.loc[0, "Madeira"] == 0
+    assert result.loc[0, "Emissões de CH4 (tCO2e)"] == 0
+    assert result.loc[0, "Emissões CO2 - biogênico (kgCO2)"] == 0
+    assert result.loc[0, "Emissões Biogênicas Totais (tCO2e)"] == 0
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from cli import EXIT_FAILED, EXIT_MISSING_FACTORS, EXIT_OK, build_tasks, main
+
+
+def test_build_tasks_pairs_modules_with_inputs():
+    tasks = build_tasks(
+        ["carbonization", "industrial=data/lca/mock/industrial.xlsx"],
+        ["data/lca/mock/carbonization.xlsx"],
+    )
+
+    assert tasks == [
+        ("carbonization", "data/lca/mock/carbonization.xlsx"),
+        ("industrial", "data/lca/mock/industrial.xlsx"),
+    ]
+
+
+def test_main_writes_results_and_summary(tmp_path):
+    exit_code = main(
+        [
+            "-m",
+            "carbonization=data/lca/mock/carbonization.xlsx",
+            "-w",
+            "1",
+            "-o",
+            str(tmp_path),
+        ]
+    )
+
+    summary = pd.read_csv(tmp_path / "resumo.csv")
+
+    assert exit_code == EXIT_OK
+    assert summary["Status"].tolist() == ["ok"]
+    assert summary["Linhas"].tolist() == [5]
+    assert (tmp_path / "carbonization").is_dir()
+
+
+def test_main_exit_codes_for_missing_factors_and_errors(tmp_path):
+    assert (
+        main(["-m", "industrial=data/lca/mock/industrial.xlsx", "-w", "1", "-o", str(tmp_path)])
+        == EXIT_MISSING_FACTORS
+    )
+    assert (
+        main(["-m", "carbonization=data/lca/mock/industrial.xlsx", "-w", "1", "-o", str(tmp_path)])
+        == EXIT_FAILED
+    )
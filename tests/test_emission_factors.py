@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+from utils.factor_repository import FactorRepository
+
+
+@pytest.fixture
+def factors_xlsx(tmp_path):
+    path = tmp_path / "emission_factors.xlsx"
+    pd.DataFrame(
+        {
+            "name": ["Energia Eólica", "Óleo Diesel", "óleo diesel"],
+            "fossil_emission_factor": [0.126, 2.6, 9.9],
+            "unit": ["kgCO2e/kWh", "kgCO2e/L", "kgCO2e/L"],
+        }
+    ).to_excel(path, index=False)
+    return str(path)
+
+
+def test_table_lookup_is_case_insensitive_and_keeps_first(tmp_path, factors_xlsx):
+    repository = FactorRepository(cache_dir=str(tmp_path / "cache"))
+    table = repository.table(factors_xlsx, key_column="name")
+
+    assert table.get("energia eólica", "fossil_emission_factor") == 0.126
+    assert table.get("óleo diesel", "fossil_emission_factor") == 2.6
+    assert table.get("inexistente", "unit", "Não encontrado") == "Não encontrado"
+
+
+def test_compiled_table_is_reused_without_parsing(tmp_path, factors_xlsx):
+    cache_dir = str(tmp_path / "cache")
+    FactorRepository(cache_dir=cache_dir).table(factors_xlsx, key_column="name")
+
+    with patch("pandas.read_excel", side_effect=AssertionError("parsed again")):
+        table = FactorRepository(cache_dir=cache_dir).table(
+            factors_xlsx, key_column="name"
+        )
+
+    assert table.get("óleo diesel", "unit") == "kgCO2e/L"
+
+
+def test_compiled_table_is_invalidated_when_source_changes(
+    tmp_path, factors_xlsx, monkeypatch
+):
+    monkeypatch.setattr("utils.factor_repository.CHECK_INTERVAL", 0)
+    repository = FactorRepository(cache_dir=str(tmp_path / "cache"))
+    repository.table(factors_xlsx, key_column="name")
+
+    pd.DataFrame(
+        {"name": ["Energia Eólica"], "fossil_emission_factor": [0.5], "unit": ["x"]}
+    ).to_excel(factors_xlsx, index=False)
+
+    table = repository.table(factors_xlsx, key_column="name")
+
+    assert table.get("energia eólica", "fossil_emission_factor") == 0.5
+    assert table.position("óleo diesel") is None
+
+
+def test_get_emission_factor_missing_name_returns_none():
+    from utils.emission_factors import get_emission_factor
+
+    assert get_emission_factor("fator inexistente", "fossil_emission_factor") is None
+    assert get_emission_factor("Energia Eólica", "fossil_emission_factor") == 0.126
+
+
+def test_get_emission_factors_looks_up_each_name_once_and_aligns():
+    from utils.emission_factors import get_emission_factors
+
+    names = pd.Series(
+        ["Energia Eólica", "inexistente", "energia eólica", "Energia Eólica"],
+        index=[10, 11, 12, 13],
+    )
+
+    factors = get_emission_factors(
+        names,
+        ["source", "fossil_emission_factor", "unit"],
+        defaults={"source": "Não encontrado"},
+    )
+
+    assert list(factors.index) == [10, 11, 12, 13]
+    assert list(factors["source"]) == ["IPCC", "Não encontrado", "IPCC", "IPCC"]
+    assert factors["fossil_emission_factor"].tolist()[::2] == [0.126, 0.126]
+    assert pd.isna(factors.loc[11, "fossil_emission_factor"])
+    assert pd.isna(factors.loc[11, "unit"])
+
+
+def test_get_emission_factors_defaults_replace_missing_values():
+    from utils.emission_factors import get_emission_factors
+
+    factors = get_emission_factors(
+        pd.Series(["-", "Energia Eólica"]),
+        ["fossil_emission_factor", "biogenic_emission_factor"],
+        defaults={"fossil_emission_factor": 0, "biogenic_emission_factor": 0},
+    )
+
+    assert factors["fossil_emission_factor"].tolist() == [0, 0.126]
+    assert factors["biogenic_emission_factor"].tolist() == [0, 0]
+
+
+def test_names_are_folded_before_lookup(tmp_path, factors_xlsx):
+    from utils.names import normalize_name
+
+    table = FactorRepository(cache_dir=str(tmp_path / "cache")).table(
+        factors_xlsx, key_column="name"
+    )
+
+    assert normalize_name("  Óleo\tDIESEL ") == "oleo diesel"
+    assert normalize_name("Óleo  Diesel (S-10)") == "oleo diesel s 10"
+    assert normalize_name("<30kW") != normalize_name(">30kW")
+    assert table.get("ENERGIA EOLICA", "fossil_emission_factor") == 0.126
+    assert table.positions(["energia-eólica", "oleo diesel", None]).tolist() == [0, 1, -1]
+
+
+def test_compiled_table_is_memory_mapped_columns(tmp_path, factors_xlsx):
+    cache_dir = str(tmp_path / "cache")
+    FactorRepository(cache_dir=cache_dir).table(factors_xlsx, key_column="name")
+    table = FactorRepository(cache_dir=cache_dir).table(factors_xlsx, key_column="name")
+
+    assert isinstance(table.columns["fossil_emission_factor"], np.memmap)
+    assert isinstance(table.columns["unit"].codes, np.memmap)
+    assert isinstance(table.keys, np.memmap)
+    assert table.take("unit", [1, 0]).tolist() == ["kgCO2e/L", "kgCO2e/kWh"]
+    assert table.frame["name"].tolist() == ["Energia Eólica", "Óleo Diesel", "óleo diesel"]
@@ -0,0 +1,58 @@
+import io
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing import streaming
+from processing.export import export_download, export_to_directory, resolve_export_directory
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Nome": [f"item {i}" for i in range(rows)],
+            "Emissões (tCO2e)": np.arange(rows) / 4,
+            "Fator": [np.nan if i % 3 == 0 else 1.5 for i in range(rows)],
+        }
+    )
+
+
+def test_xlsx_export_splits_sheets_over_row_limit(monkeypatch):
+    monkeypatch.setattr(streaming, "XLSX_MAX_ROWS", 4)
+    detail, summary = frame(10), frame(1)
+
+    buffer, extension, _ = export_download({"Resultados": detail, "Resumo": summary}, "xlsx")
+    sheets = pd.read_excel(buffer, sheet_name=None)
+
+    assert extension == "xlsx"
+    assert list(sheets) == ["Resultados", "Resultados (2)", "Resultados (3)", "Resumo"]
+    exported = pd.concat([sheets[name] for name in list(sheets)[:3]], ignore_index=True)
+    pd.testing.assert_frame_equal(exported, detail)
+
+
+def test_csv_and_parquet_exports_round_trip(tmp_path):
+    tables = {"Resultados": frame(25), "Totais por escopo": frame(2)}
+
+    buffer, extension, _ = export_download(tables, "parquet")
+    with zipfile.ZipFile(buffer) as archive:
+        assert archive.namelist() == ["resultados.parquet", "totais_por_escopo.parquet"]
+        restored = pd.read_parquet(io.BytesIO(archive.read("resultados.parquet")))
+    assert extension == "zip"
+    pd.testing.assert_frame_equal(restored, tables["Resultados"])
+
+    paths = export_to_directory(tables, str(tmp_path), "csv")
+    pd.testing.assert_frame_equal(pd.read_csv(paths[0]), tables["Resultados"])
+
+
+def test_export_directory_stays_inside_root(tmp_path):
+    root = str(tmp_path / "exportacoes")
+    os.makedirs(root)
+    os.symlink(tmp_path, os.path.join(root, "fora"))
+
+    assert resolve_export_directory("lote/1", root) == os.path.join(root, "lote", "1")
+    for directory in ["../x", str(tmp_path), "/etc", "fora/x"]:
+        with pytest.raises(ValueError):
+            resolve_export_directory(directory, root)
@@ -2,7 +2,13 @@ import pytest
 import pandas as pd
 import numpy as np
 from unittest.mock import patch, mock_open
-from main import ForestryFuels, ForestryFertilizers
+from processing.forestry.fuels import ForestryFuels
+from processing.forestry.fertilizers import (
+    FERTILIZER_PARAMETERS,
+    ForestryFertilizers,
+    get_fertilizer_parameters,
+)
+from processing.forestry.energy import ForestryEnergy
 
 
 @pytest.fixture
@@ -60,7 +66,22 @@ def mock_excel_data():
                 "n2o_tn2o_gj": [0.0006, 0.0008],
             }
         ),
-        "data/lca/gwp_kyoto.xlsx": pd.DataFrame({"ar6": [1, 27.9, 273]}),
+        "data/lca/stationary_combustion.xlsx": pd.DataFrame(
+            {"fuel": ["Acetileno"], "kgco2_kg": [3.384615]}
+        ),
+        "data/lca/factors/fertilizers.xlsx": pd.DataFrame(
+            {
+                "parameter": [key[0] for key in FERTILIZER_PARAMETERS.values()],
+                "unit": [key[1] for key in FERTILIZER_PARAMETERS.values()],
+                "value": [0.021591, 0.44, 0.476667, 1.79, 2.48],
+            }
+        ),
+        "data/lca/gwp_kyoto.xlsx": pd.DataFrame(
+            {
+                "chemical_formula": ["CO2", "CH4", "CH4", "CH4", "N2O"],
+                "ar6": [1, 27.9, 29.8, 27, 273],
+            }
+        ),
     }
 
 
@@ -120,3 +141,110 @@ def test_zero_consumption(sample_fuels_df):
     ff = ForestryFuels(sample_fuels_df)
     emissions = ff.calculate_emissions_co2("gasolina automotiva", 0)
     assert emissions == 0
+
+
+def test_calculate_emissions_matches_blend_formulas(sample_fuels_df):
+    ff = ForestryFuels(sample_fuels_df)
+    fuels = pd.Series(["gasolina automotiva", "óleo diesel", "acetileno", "outro"])
+    result = ff.calculate_emissions(fuels, [100, 200, 10, 50])
+
+    gasoline_co2 = 100 * (1 - 0.27) * 0.0693 * 32.24
+    diesel_biogenic = 200 * 0.1 * 0.0708 * 33.13728
+
+    assert result["Emissões CO2 (kgCO2)"].iloc[0] == pytest.approx(gasoline_co2)
+    assert result["Emissões CO2 - biogênico (kgCO2)"].iloc[1] == pytest.approx(
+        diesel_biogenic
+    )
+    assert result["Consumo (KG)"].iloc[2] == 10
+    assert (result.iloc[3] == 0).all()
+
+
+def test_forestry_energy_monthly_matrix():
+    months = list(ForestryEnergy.MONTH_MAPPER)
+    df = pd.DataFrame(
+        {
+            "Ano": [2023, 2023],
+            "Fonte de Energia": ["Grid", "Energia Eólica"],
+            **{month: [1000.0, 1000.0] for month in months},
+        }
+    )
+
+    result = ForestryEnergy(df).process()
+
+    assert result.loc[0, "Emissões tCO2 - Janeiro"] == pytest.approx(0.029174, rel=1e-4)
+    assert result.loc[0, "Emissões Biogênicas tCO2e - Janeiro"] == 0
+    assert result.loc[1, "Emissões tCO2 - Dezembro"] == pytest.approx(0.126)
+    assert result.loc[1, "Emissões totais (tCO2e)"] == pytest.approx(0.126 * 12)
+
+
+def test_forestry_fertilizers_matches_reference_output():
+    expected = pd.read_excel("data/lca/process/forestry_fertilizers.xlsx")
+    ff = ForestryFertilizers(pd.read_excel("data/lca/mock/forestry_fertilizers.xlsx"))
+    result = ff.process()
+
+    for column in expected.columns[13:]:
+        np.testing.assert_allclose(result[column], expected[column], err_msg=column)
+
+    assert ff.diagnostics.empty
+
+
+def test_forestry_fertilizers_collects_diagnostics(sample_fertilizers_df):
+    sample_fertilizers_df["Calcário Calcítico ou Dolomítico"] = ["Calcítico", "Outro"]
+    ff = ForestryFertilizers(sample_fertilizers_df)
+    result = ff.process()
+
+    assert result["Emissões kgCO2"].iloc[1] == 0
+    assert set(ff.diagnostics["Etapa"]) == {"Emissões kgCO2", "Emissões de produção"}
+    assert ff.diagnostics.loc[ff.diagnostics["Etapa"] == "Emissões kgCO2", "Linha"].tolist() == [1]
+
+
+def test_forestry_energy_uses_each_row_year():
+    months = list(ForestryEnergy.MONTH_MAPPER)
+    df = pd.DataFrame(
+        {
+            "Ano": [2015, 2023, 2030, 2031, 2030],
+            "Fonte de Energia": ["Grid"] * 5,
+            **{month: [1000.0] * 5 for month in months},
+        }
+    )
+
+    energy = ForestryEnergy(df)
+    result = energy.process()
+
+    single_year = ForestryEnergy(df.iloc[[1]].reset_index(drop=True)).process()
+    assert result.loc[1, "Emissões totais (tCO2e)"] == pytest.approx(
+        single_year.loc[0, "Emissões totais (tCO2e)"]
+    )
+    assert result.loc[0, "Emissões tCO2 - Janeiro"] != result.loc[1, "Emissões tCO2 - Janeiro"]
+    assert result["Emissões tCO2 - Janeiro"].iloc[2:].isna().all()
+    assert energy.missing_years == [2030, 2031]
+    assert energy.missing_factors == ["Grid 2030", "Grid 2031"]
+
+
+def test_forestry_energy_rejects_non_integer_years():
+    months = list(ForestryEnergy.MONTH_MAPPER)
+    df = pd.DataFrame(
+        {
+            "Ano": [2023, 2023.7, np.inf],
+            "Fonte de Energia": ["Grid"] * 3,
+            **{month: [1000.0] * 3 for month in months},
+        }
+    )
+
+    energy = ForestryEnergy(df)
+    result = energy.process()
+
+    assert result["Emissões tCO2 - Janeiro"].iloc[0] > 0
+    assert result["Emissões tCO2 - Janeiro"].iloc[1:].isna().all()
+    assert energy.missing_factors == ["Grid 2023.7", "Grid inf"]
+
+
+def test_fertilizer_parameters_are_looked_up_by_label():
+    factors = pd.read_excel("data/lca/factors/fertilizers.xlsx")
+    parameters = get_fertilizer_parameters(factors.iloc[::-1])
+
+    assert parameters == get_fertilizer_parameters(factors)
+    assert parameters["cao_factor"] == 1.79
+    assert parameters["mgo_factor"] == 2.48
+    with pytest.raises(KeyError):
+        get_fertilizer_parameters(factors.drop(index=6))
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+
+from processing import incremental
+from processing import industrial as ind
+from processing.forestry.energy import ForestryEnergy
+from processing.incremental import match_rows, update_result
+from processing.registry import run_module, summarize
+
+
+def read_mock(key):
+    return pd.read_excel(f"data/lca/mock/{key}.xlsx")
+
+
+def test_one_cell_change_recomputes_one_row():
+    df = read_mock("industrial")
+    previous = update_result("industrial", df.copy())
+
+    changed = df.copy()
+    changed.loc[2, "Quantidade"] = 123.0
+    result = update_result("industrial", changed.copy(), previous)
+    expected, _ = run_module("industrial", changed.copy())
+
+    assert result.recomputed == 1
+    assert result.changes.to_dict("list") == {"Linha": [2], "Situação": ["Alterada"]}
+    pd.testing.assert_frame_equal(result.processed, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(
+        result.summary, summarize("industrial", expected), check_dtype=False
+    )
+
+
+def test_inserted_and_removed_rows_patch_totals():
+    df = read_mock("forestry_fertilizers")
+    previous = update_result("forestry_fertilizers", df.copy())
+
+    changed = pd.concat([df.iloc[1:], df.iloc[[0]]], ignore_index=True)
+    changed.loc[len(changed)] = changed.loc[0]
+    changed = changed.drop(index=3).reset_index(drop=True)
+    result = update_result("forestry_fertilizers", changed.copy(), previous)
+    expected, instance = run_module("forestry_fertilizers", changed.copy())
+
+    assert set(result.changes["Situação"]) == {"Inserida", "Removida"}
+    pd.testing.assert_frame_equal(result.processed, expected, check_dtype=False)
+    for column, value in summarize("forestry_fertilizers", expected).iloc[0].items():
+        assert result.summary.loc[0, column] == pytest.approx(value)
+    pd.testing.assert_frame_equal(
+        result.instance.diagnostics, instance.diagnostics, check_dtype=False
+    )
+
+
+def test_match_rows_pairs_duplicates_in_order():
+    previous = pd.util.hash_array(pd.Series(["a", "b", "a"]).to_numpy())
+    current = pd.util.hash_array(pd.Series(["a", "a", "a", "c"]).to_numpy())
+
+    assert match_rows(previous, current).tolist() == [0, 2, -1, -1]
+
+
+def test_factor_change_recomputes_all_rows(monkeypatch):
+    df = read_mock("industrial")
+    get_emission_factors = ind.get_emission_factors
+
+    def doubled(*args, **kwargs):
+        return get_emission_factors(*args, **kwargs) * 2
+
+    monkeypatch.setattr(incremental, "factor_set_version", lambda: "v1")
+    monkeypatch.setattr(ind, "get_emission_factors", doubled)
+    previous = update_result("industrial", df.copy())
+
+    monkeypatch.setattr(incremental, "factor_set_version", lambda: "v2")
+    monkeypatch.setattr(ind, "get_emission_factors", get_emission_factors)
+    result = update_result("industrial", df.copy(), previous)
+    expected, _ = run_module("industrial", df.copy())
+
+    assert not previous.processed.equals(expected)
+    assert result.recomputed == len(df) and result.factor_version == "v2"
+    pd.testing.assert_frame_equal(result.processed, expected, check_dtype=False)
+
+
+def test_missing_factors_of_kept_rows_are_carried_forward():
+    months = list(ForestryEnergy.MONTH_MAPPER)
+    df = pd.DataFrame(
+        {
+            "Ano": [1990] + [2023] * 19,
+            "Fonte de Energia": ["Grid"] * 20,
+            **{month: [1000.0] * 20 for month in months},
+        }
+    )
+    previous = update_result("forestry_energy", df.copy())
+
+    changed = df.copy()
+    changed.loc[5, "Consumo - Janeiro"] = 2000.0
+    result = update_result("forestry_energy", changed.copy(), previous)
+    _, instance = run_module("forestry_energy", changed.copy())
+
+    assert result.recomputed == 1
+    assert instance.missing_factors == ["Grid 1990"]
+    assert result.instance.missing_factors == instance.missing_factors
+    pd.testing.assert_frame_equal(
+        result.instance.missing_rows, instance.missing_rows, check_dtype=False
+    )
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from processing.inventory import INVENTORY_PATH, INVENTORY_SHEETS, prepare_sheet, run_inventory
+
+
+@pytest.fixture(scope="module")
+def inventory():
+    return run_inventory(INVENTORY_PATH)
+
+
+def test_run_inventory_dispatches_every_sheet(inventory):
+    assert inventory.errors == {}
+    assert list(inventory.results) == [spec.sheet for spec in INVENTORY_SHEETS]
+    assert inventory.missing_factors["Industrial"] == ["CO2 Redução"]
+
+
+def test_consolidated_matches_workbook_industrial_stages(inventory):
+    expected = pd.read_excel(INVENTORY_PATH, sheet_name="Resultados Consolidados", nrows=8)
+    expected = expected.set_index("Etapa")
+    consolidated = inventory.consolidated.set_index("Etapa")
+
+    for stage in ["Florestal", "Laboratório", "Metalurgia de Panela", "Tratamento de Água"]:
+        for column in ["Emissões Fósseis", "Emissões Biogênicas", "Remoções Biogênicas"]:
+            assert consolidated.loc[stage, column] == pytest.approx(
+                expected.loc[stage, column], abs=1e-9
+            )
+
+    totals = inventory.consolidated[inventory.consolidated["Etapa"] == "Total"]
+    assert sorted(totals["Unidade"]) == ["tCO2e", "tCO2e/ton FeSiMg"]
+
+
+def test_transport_counts_in_per_ton_total(inventory):
+    expected = pd.read_excel(INVENTORY_PATH, sheet_name="Resultados Consolidados", nrows=8)
+    expected = expected.set_index("Etapa")
+    consolidated = inventory.consolidated
+    per_ton = consolidated[consolidated["Unidade"] == "tCO2e/ton FeSiMg"].set_index("Etapa")
+
+    assert per_ton.loc["Transporte", "Emissões Fósseis"] == pytest.approx(
+        expected.loc["Transporte Upstream", "Emissões Fósseis"], rel=1e-3
+    )
+    stages = per_ton.drop(index="Total")
+    assert per_ton.loc["Total", "Balanço"] == pytest.approx(stages["Balanço"].sum())
+    assert "Transporte" not in set(consolidated.loc[consolidated["Unidade"] == "tCO2e", "Etapa"])
+
+
+def test_energy_sheet_uses_abbreviated_months_and_grid_year(inventory):
+    energy = inventory.results["Florestal (Energia Elétrica)"]
+    expected = pd.read_excel(INVENTORY_PATH, sheet_name="Florestal (Energia Elétrica)")
+
+    assert energy["Consumo - Janeiro"].tolist() == expected["Consumo - Jan"].tolist()
+    assert energy["Emissões totais (tCO2e)"].sum() == pytest.approx(
+        expected["Emissões totais \n(tCO2e)"].sum()
+    )
+
+
+def test_prepare_sheet_keeps_only_inputs():
+    spec = INVENTORY_SHEETS[3]
+    df = pd.DataFrame(
+        {
+            "Rendimento Gravimétrico (%)": [0.3, None],
+            "Produção de Carvão Vegetal": [10.0, None],
+            "Madeira": [33.3, None],
+        }
+    )
+
+    prepared = prepare_sheet(spec, df, 2024)
+
+    assert list(prepared.columns) == spec.inputs
+    assert len(prepared) == 1
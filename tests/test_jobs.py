@@ -0,0 +1,50 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from processing.jobs import JobCancelled, submit_job
+from processing.registry import run_module
+from processing.streaming import run_in_chunks
+
+
+def test_run_in_chunks_matches_single_run_and_reports_progress():
+    df = pd.read_excel("data/lca/mock/forestry_fertilizers.xlsx")
+    expected, _ = run_module("forestry_fertilizers", df.copy())
+    reported = []
+
+    processed, instance = run_in_chunks(
+        "forestry_fertilizers",
+        df.copy(),
+        chunk_size=5,
+        progress=lambda fraction, message: reported.append(fraction),
+    )
+
+    pd.testing.assert_frame_equal(processed, expected)
+    assert instance.df is processed
+    assert reported[-1] == 1.0 and reported == sorted(reported)
+
+
+def test_cancelled_job_stops_at_next_chunk():
+    df = pd.read_excel("data/lca/mock/industrial.xlsx")
+    chunks = []
+    submitted = threading.Event()
+
+    def compute(progress):
+        submitted.wait()
+
+        def report(fraction, message):
+            chunks.append(fraction)
+            if len(chunks) == 2:
+                job.cancel()
+            progress(fraction, message)
+
+        return run_in_chunks("industrial", df, chunk_size=5, progress=report)
+
+    job = submit_job("industrial", compute)
+    submitted.set()
+
+    with pytest.raises(JobCancelled):
+        job.result(timeout=30)
+    job.future.exception(timeout=30)
+    assert len(chunks) == 2
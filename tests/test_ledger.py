@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from processing.ledger import CATEGORIES, LEDGER_COLUMNS, aggregate, build_ledger, totals
+from processing.registry import run_module, summarize
+
+
+@pytest.fixture(scope="module")
+def fuels():
+    processed, _ = run_module("forestry_fuels", pd.read_excel("data/lca/mock/forestry_fuels.xlsx"))
+    return processed
+
+
+def test_ledger_is_typed_long_format(fuels):
+    ledger = build_ledger("forestry_fuels", fuels)
+
+    assert list(ledger.columns) == LEDGER_COLUMNS
+    for column in ["Módulo", "Etapa", "Escopo", "Categoria", "Unidade"]:
+        assert isinstance(ledger[column].dtype, pd.CategoricalDtype)
+    assert list(ledger["Categoria"].cat.categories) == CATEGORIES
+    assert ledger["Valor"].dtype == float
+    assert (ledger["Valor"] != 0).all()
+
+
+def test_ledger_totals_match_module_summary(fuels):
+    ledger = build_ledger("forestry_fuels", fuels)
+    summary = summarize("forestry_fuels", fuels).iloc[0]
+
+    by_category = aggregate(ledger, ["Categoria"]).set_index(["Categoria", "Unidade"])["Valor"]
+    assert by_category["Emissões Fósseis", "tCO2e"] == pytest.approx(
+        summary["Emissões Fósseis Totais (tCO2e)"]
+    )
+    assert by_category["Emissões Biogênicas", "tCO2e"] == pytest.approx(
+        summary["Emissões Biogênicas Totais (tCO2e)"]
+    )
+    assert by_category["CH4", "kgCH4"] == pytest.approx(summary["Emissões CH4 (kgCH4)"])
+
+    by_scope = totals(ledger, ["Escopo"]).set_index(["Escopo", "Unidade"])
+    assert by_scope.loc[("Escopo 1", "tCO2e"), "Emissões Fósseis"] == pytest.approx(
+        summary["Emissões Fósseis Combustão (tCO2e)"]
+    )
+
+
+def test_industrial_rows_are_split_by_scope():
+    industrial = pd.DataFrame(
+        {
+            "Classificação": ["Energia", "Resíduo", "Matéria-Prima", "Matéria-Prima"],
+            "Nome no Estudo (Ecoinvent)": ["Energia", "CO2 Redução", "Combustão de Óleo Diesel", "Quartzo"],
+            "Etapa Industrial": ["Fornos elétricos"] * 4,
+            "Emissões Fósseis (tCO2e)": [1.0, 2.0, 3.0, 4.0],
+            "Emissões Biogênicas (tCO2e)": [0.0] * 4,
+            "Remoções biogênicas (tCO2e)": [0.0] * 4,
+            "Emissões LUC (tCO2e)": [0.0] * 4,
+        }
+    )
+
+    ledger = build_ledger("industrial", industrial)
+
+    assert ledger["Escopo"].astype(str).tolist() == ["Escopo 2", "Escopo 1", "Escopo 1", "Escopo 3"]
+    assert set(ledger["Unidade"]) == {"tCO2e"}
+    assert set(build_ledger("industrial", industrial, "ton FeSiMg")["Unidade"]) == {
+        "tCO2e/ton FeSiMg"
+    }
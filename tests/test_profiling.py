@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+
+from cli import main
+from processing.registry import profile_module
+from utils.factor_repository import get_repository
+from utils.profiling import Profiler, count_lookups, stage, stages_frame, timed
+
+
+@timed
+def lookup_twice():
+    count_lookups(2)
+
+
+def test_profiler_records_nested_stages_and_lookups():
+    with Profiler("teste") as profiler:
+        with stage("externa"):
+            lookup_twice()
+            lookup_twice()
+            count_lookups()
+
+    report = profiler.report()
+    stages = {entry["name"]: entry for entry in report["stages"]}
+
+    assert stages["externa"]["depth"] == 0 and stages["externa"]["lookups"] == 1
+    assert stages["lookup_twice"]["depth"] == 1
+    assert stages["lookup_twice"]["calls"] == 2 and stages["lookup_twice"]["lookups"] == 4
+    assert report["lookups"] == 5
+    assert stages_frame(report)["Etapa"].tolist() == ["externa", "    lookup_twice"]
+
+
+def test_stage_is_noop_without_profiler():
+    with stage("sem profiler") as timing:
+        count_lookups()
+    assert timing is None
+
+
+def test_profile_module_reports_read_and_lookup_stages():
+    _, _, report = profile_module(
+        "industrial", "data/lca/mock/industrial.xlsx", use_cprofile=True
+    )
+    names = [entry["name"] for entry in report["stages"]]
+
+    assert names[:3] == ["Leitura da planilha", "Carga dos fatores", "process"]
+    assert report["rows"] == 43
+    assert report["lookups"] > 0
+    assert report["cprofile"]
+
+
+def test_cli_profile_writes_json_report(tmp_path):
+    main(
+        [
+            "-m",
+            "carbonization=data/lca/mock/carbonization.xlsx",
+            "-w",
+            "1",
+            "-o",
+            str(tmp_path),
+            "--profile",
+        ]
+    )
+
+    profiles = json.loads((tmp_path / "desempenho.json").read_text(encoding="utf-8"))
+    summary = pd.read_csv(tmp_path / "resumo.csv")
+
+    assert profiles[0]["rows"] == 5
+    assert "calculate_emission_ch4" in [entry["name"] for entry in profiles[0]["stages"]]
+    assert "Desempenho" not in summary.columns
+
+
+def test_factor_table_get_counts_lookups():
+    table = get_repository().table("data/lca/stationary_combustion.xlsx", key_column="fuel")
+    name = table.frame["fuel"].iloc[0]
+
+    with Profiler("teste") as profiler:
+        with stage("busca"):
+            table.get(name, "kgco2_kg")
+            table.get("inexistente", "kgco2_kg", 0)
+
+    assert profiler.report()["lookups"] == 2
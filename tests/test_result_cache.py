@@ -0,0 +1,117 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+from processing import ui
+from utils.result_cache import ResultCache, factor_set_version
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (3, 1, 1)
+
+
+def test_result_cache_respects_memory_cap():
+    frame = pd.DataFrame({"x": range(1000)})
+    size = int(frame.memory_usage(deep=True).sum())
+    cache = ResultCache(max_entries=10, max_bytes=size * 2)
+
+    for key in range(3):
+        cache.put(key, (frame, None))
+
+    assert len(cache) == 2
+    assert cache.size_bytes == size * 2
+    assert cache.get(0) is None
+
+
+def test_factor_set_version_changes_with_files(tmp_path):
+    path = tmp_path / "factors.xlsx"
+    path.write_bytes(b"v1")
+    before = factor_set_version([str(tmp_path / "*.xlsx")])
+
+    path.write_bytes(b"v2 longer")
+    os.utime(path, ns=(0, 0))
+
+    assert factor_set_version([str(tmp_path / "*.xlsx")]) != before
+
+
+def test_run_cached_reuses_result_for_same_upload(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(ui, "get_result_cache", lambda: cache)
+
+    with open("data/lca/mock/industrial.xlsx", "rb") as f:
+        content = f.read()
+
+    st.session_state.pop("industrial_result", None)
+    first, _ = ui.run_cached("industrial", io.BytesIO(content))
+    same_session, _ = ui.run_cached("industrial", io.BytesIO(content))
+
+    st.session_state.pop("industrial_result")
+    other_session, _ = ui.run_cached("industrial", io.BytesIO(content))
+
+    assert same_session is first and other_session is not first
+    assert np.shares_memory(
+        other_session["Quantidade"].to_numpy(), first["Quantidade"].to_numpy()
+    )
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_cached_results_are_read_only(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(ui, "get_result_cache", lambda: cache)
+
+    with open("data/lca/mock/industrial.xlsx", "rb") as f:
+        content = f.read()
+
+    st.session_state.pop("industrial_result", None)
+    processed, instance = ui.run_cached("industrial", io.BytesIO(content))
+    expected = processed.copy()
+
+    assert instance.df is processed
+    with pytest.raises(ValueError):
+        processed.loc[0, "Quantidade"] = -1.0
+    processed["Nova coluna"] = 1.0
+
+    st.session_state.pop("industrial_result")
+    other_session, _ = ui.run_cached("industrial", io.BytesIO(content))
+    pd.testing.assert_frame_equal(other_session, expected)
+
+
+def test_shared_cache_keeps_changes_per_session(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(ui, "get_result_cache", lambda: cache)
+
+    df = pd.read_excel("data/lca/mock/industrial.xlsx")
+    changed = df.copy()
+    changed.loc[2, "Quantidade"] = 123.0
+
+    uploads = []
+    for frame in (df, changed):
+        file = io.BytesIO()
+        frame.to_excel(file, index=False)
+        uploads.append(file.getvalue())
+
+    st.session_state.pop("industrial_result", None)
+    ui.run_cached("industrial", io.BytesIO(uploads[0]))
+    ui.run_cached("industrial", io.BytesIO(uploads[1]))
+    first = ui.last_module_result("industrial")
+
+    st.session_state.pop("industrial_result")
+    ui.run_cached("industrial", io.BytesIO(uploads[1]))
+    other = ui.last_module_result("industrial")
+
+    assert first.changes["Linha"].tolist() == [2] and first.recomputed == 1
+    assert other.changes.empty and other.recomputed == 0
+    pd.testing.assert_frame_equal(other.processed, first.processed)
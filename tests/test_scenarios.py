@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from processing.registry import run_module, summarize
+from processing.scenarios import compare_scenarios, evaluate_scenarios
+from utils.gwp import GwpScenario, assessment_scenarios, get_gwp, parse_overrides
+
+
+@pytest.fixture(scope="module")
+def fuels():
+    processed, _ = run_module("forestry_fuels", pd.read_excel("data/lca/mock/forestry_fuels.xlsx"))
+    return processed
+
+
+def test_ar6_scenario_matches_module_results(fuels):
+    comparison = compare_scenarios("forestry_fuels", fuels, assessment_scenarios()).set_index(
+        "Cenário"
+    )
+    summary = summarize("forestry_fuels", fuels).iloc[0]
+
+    assert list(comparison.index) == ["AR4", "AR5", "AR6"]
+    assert comparison.loc["AR6", "Emissões Fósseis"] == pytest.approx(
+        summary["Emissões Fósseis Totais (tCO2e)"]
+    )
+    assert comparison.loc["AR6", "Emissões Biogênicas"] == pytest.approx(
+        summary["Emissões Biogênicas Totais (tCO2e)"]
+    )
+
+
+def test_override_changes_only_the_overridden_gas(fuels):
+    scenarios = [GwpScenario("AR6"), GwpScenario("CH4 x2", overrides={"ch4": 2 * get_gwp("CH4")})]
+
+    fossil = evaluate_scenarios("forestry_fuels", fuels, scenarios)["Emissões Fósseis"]
+
+    assert fossil.shape == (len(fuels), 2)
+    extra = fuels["Emissões CH4 (kgCH4)"].to_numpy() * get_gwp("CH4") / 1000
+    assert fossil[:, 1] - fossil[:, 0] == pytest.approx(extra)
+
+
+def test_parse_overrides():
+    assert parse_overrides("CH4=28; N2O = 265.5") == {"CH4": 28.0, "N2O": 265.5}
+    assert parse_overrides("") == {}
+    with pytest.raises(ValueError):
+        parse_overrides("CH4")
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pandas as pd
+
+from processing.service import create_app
+
+
+def request(app, method: str, path: str, body: bytes = b""):
+    """Executa uma requisição direto na aplicação ASGI."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # o cliente só se desconecta depois de receber a resposta inteira
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "root_path": "",
+    }
+    asyncio.run(app(scope, receive, send))
+
+    status = sent[0]["status"]
+    content = b"".join(message.get("body", b"") for message in sent[1:])
+    return status, json.loads(content)
+
+
+def test_module_endpoint_matches_direct_calculation():
+    app = create_app(workers=0)
+    df = pd.read_excel("data/lca/mock/quartz_mining.xlsx")
+
+    body = df.to_json(orient="split", index=False).encode()
+    status, result = request(app, "POST", "/modules/quartz_mining", body)
+    app.state.service.shutdown()
+
+    assert status == 200
+    assert result["Linhas"] == len(df)
+    assert len(result["Resultados"]) == len(df)
+    assert abs(result["Resumo"]["Emissões Fósseis (tCO2e)"] - 0.01507691) < 1e-6
+
+
+def test_batch_and_errors():
+    app = create_app(workers=0)
+    quartz = pd.read_excel("data/lca/mock/quartz_mining.xlsx").to_json(orient="records")
+    body = json.dumps({"quartz_mining": json.loads(quartz), "industrial": []}).encode()
+
+    status, result = request(app, "POST", "/batch", body)
+    assert status == 200
+    assert result["quartz_mining"]["Linhas"] == 7
+    assert "Erro" in result["industrial"]
+
+    assert request(app, "POST", "/modules/inexistente", b"[]")[0] == 404
+    assert request(app, "POST", "/modules/industrial", b'{"x": 1}')[0] == 400
+    app.state.service.shutdown()
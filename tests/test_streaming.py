@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from processing.registry import run_module, summarize
+from processing.streaming import CsvSink, ParquetSink, iter_excel_chunks, stream_module
+
+
+def test_iter_excel_chunks_keeps_global_index():
+    chunks = list(iter_excel_chunks("data/lca/mock/industrial.xlsx", chunk_size=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 10, 10, 3]
+    assert chunks[-1].index[0] == 40
+    assert "Nome no Estudo (Ecoinvent)" in chunks[0].columns
+
+
+def test_stream_module_matches_full_run(tmp_path):
+    path = "data/lca/mock/forestry_fuels.xlsx"
+    expected, _ = run_module("forestry_fuels", pd.read_excel(path))
+
+    result = stream_module(
+        "forestry_fuels", path, sink=CsvSink(tmp_path / "detail.csv"), chunk_size=7
+    )
+    detail = pd.read_csv(tmp_path / "detail.csv")
+
+    assert result.rows == len(expected) == len(detail)
+    assert result.chunks == 5
+    np.testing.assert_allclose(
+        result.summary.to_numpy(), summarize("forestry_fuels", expected).to_numpy()
+    )
+    np.testing.assert_allclose(
+        detail["Emissões Fósseis Totais (tCO2e)"],
+        expected["Emissões Fósseis Totais (tCO2e)"],
+    )
+
+
+def test_parquet_sink_fills_text_column_empty_in_first_chunk(tmp_path):
+    df = pd.DataFrame(
+        {"Quantidade": [1.0, 2.0, 3.0, 4.0], "Observação": [None, None, "a", None]}
+    )
+
+    sink = ParquetSink(tmp_path / "detail.parquet")
+    sink.write(df.iloc[:2])
+    sink.write(df.iloc[2:])
+    sink.close()
+
+    written = pd.read_parquet(tmp_path / "detail.parquet")
+    assert written["Observação"].tolist() == [None, None, "a", None]
+    assert written["Quantidade"].tolist() == df["Quantidade"].tolist()
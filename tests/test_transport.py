@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing.inventory import INVENTORY_PATH, INVENTORY_SHEETS, prepare_sheet
+from processing.transport import Transport
+
+
+def legs(**columns):
+    base = {
+        "Tipo de transporte": ["Rodoviário"],
+        "Combustível (Nomenclatura Inv. GEE)": ["Óleo Diesel"],
+        "Distância (km)": [100.0],
+        "Tipo de veículo": ["Caminhão - caminhão (média)"],
+        "Carga transportada (t)": [10.0],
+        "Combustível (Nomenclatura Pegada de Carbono)": ["Óleo Diesel (10% Biodiesel)"],
+    }
+    base.update(columns)
+    rows = max(len(values) for values in base.values())
+    return pd.DataFrame({name: values * (rows // len(values)) for name, values in base.items()})
+
+
+def test_transport_matches_reference_workbook():
+    spec = next(spec for spec in INVENTORY_SHEETS if spec.module == "transport")
+    expected = pd.read_excel(INVENTORY_PATH, sheet_name=spec.sheet).dropna(how="all")
+
+    transport = Transport(prepare_sheet(spec, expected.copy(), 2024))
+    result = transport.process()
+
+    for column in [
+        "t.km",
+        "Emissões CO2 (kgCO2)",
+        "Emissões de uso - biogênico (tCO2e)",
+        "Consumo (kg)",
+    ]:
+        np.testing.assert_allclose(result[column], expected[column].astype(float), rtol=1e-4)
+    assert result["Emissões fósseis totais (tCO2e)"].sum() == pytest.approx(
+        expected["Emissões fósseis totais (tCO2e)"].sum(), rel=1e-3
+    )
+    assert transport.missing_factors == []
+
+
+def test_transport_modes_and_informed_consumption():
+    df = legs(
+        **{
+            "Tipo de transporte": ["Rodoviário", "Rodoviário", "Ferroviário", "Rodoviário"],
+            "Combustível (Nomenclatura Inv. GEE)": [
+                "Óleo Diesel",
+                "Álcool Etílico Hidratado",
+                None,
+                "Óleo Diesel",
+            ],
+            "Tipo de veículo": [
+                "Caminhão - caminhão (média)",
+                "Caminhão - caminhão (média)",
+                None,
+                "Bitrem desconhecido",
+            ],
+            "Consumo": [np.nan, 50.0, np.nan, np.nan],
+        }
+    )
+
+    transport = Transport(df)
+    result = transport.process()
+
+    assert result.loc[0, "Consumo (litros)"] == pytest.approx(1000 * 0.038598, rel=1e-4)
+    # combustível renovável informado em litros: CO2 todo biogênico
+    assert result.loc[1, "Consumo (litros)"] == 50
+    assert result.loc[1, "Emissões CO2 (kgCO2)"] == 0
+    assert result.loc[1, "Emissões CO2 - biogênico (kgCO2)"] > 0
+    # ferroviário sem consumo: fatores por t.km da média nacional
+    assert result.loc[2, "Emissões CO2 (kgCO2)"] == pytest.approx(1000 * 0.0102)
+    assert np.isnan(result.loc[3, "Consumo (litros)"])
+    assert transport.missing_factors == ["Bitrem desconhecido"]
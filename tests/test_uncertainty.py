@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import processing.uncertainty as uncertainty
+from processing.ledger import aggregate, build_ledger
+from processing.registry import run_module
+from processing.uncertainty import (
+    BLEND_FRACTION,
+    LOGNORMAL,
+    NORMAL,
+    TRIANGULAR,
+    Distribution,
+    UncertaintySettings,
+    build_model,
+    run_uncertainty,
+    simulate,
+)
+
+MODULES = ["forestry_fuels", "forestry_fertilizers", "carbonization", "industrial"]
+
+
+@pytest.fixture(scope="module")
+def results():
+    return {
+        key: run_module(key, pd.read_excel(f"data/lca/mock/{key}.xlsx"))[0] for key in MODULES
+    }
+
+
+def test_without_uncertainty_samples_equal_module_results(results):
+    report = run_uncertainty(results, UncertaintySettings(), iterations=10, seed=0)
+    modules = report[report["Módulo"] != "Total"].set_index(["Módulo", "Categoria", "Unidade"])
+
+    for key, processed in results.items():
+        ledger = aggregate(build_ledger(key, processed), ["Categoria"])
+        for row in ledger.itertuples():
+            name = (key, row.Categoria, row.Unidade)
+            assert modules.loc[name, "Nominal"] == pytest.approx(row.Valor)
+            assert modules.loc[name, "P2.5"] == pytest.approx(row.Valor)
+            assert modules.loc[name, "P97.5"] == pytest.approx(row.Valor)
+
+
+def test_samples_are_reproducible_across_process_shards(results, monkeypatch):
+    monkeypatch.setattr(uncertainty, "PARALLEL_ELEMENTS", 0)
+    models = [build_model(key, processed) for key, processed in results.items()]
+    settings = UncertaintySettings(
+        quantity=Distribution(NORMAL, 0.05), factor=Distribution(LOGNORMAL, 1.3)
+    )
+
+    first = simulate(models, settings, iterations=501, seed=7, workers=2)
+    second = simulate(models, settings, iterations=501, seed=7, workers=2)
+
+    fossil = first["forestry_fuels", "Emissões Fósseis", "tCO2e"]
+    assert fossil.shape == (501,)
+    np.testing.assert_array_equal(fossil, second["forestry_fuels", "Emissões Fósseis", "tCO2e"])
+    assert np.percentile(fossil, 2.5) < np.percentile(fossil, 97.5)
+
+
+def test_blend_fraction_moves_co2_between_fossil_and_biogenic(results):
+    models = [build_model("forestry_fuels", results["forestry_fuels"])]
+    settings = UncertaintySettings(parameters={BLEND_FRACTION: Distribution(TRIANGULAR, 0.5)})
+
+    samples = simulate(models, settings, iterations=2000, seed=1)
+
+    fossil = samples["forestry_fuels", "Emissões Fósseis", "tCO2e"]
+    biogenic = samples["forestry_fuels", "Emissões Biogênicas", "tCO2e"]
+    assert np.corrcoef(fossil, biogenic)[0, 1] < -0.99
+    with pytest.raises(ValueError):
+        Distribution("beta", 0.1)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from processing.industrial import Industrial
+from processing.quartz_mining import QuartzMining
+from utils.units import convert, parse_factor_basis, parse_unit
+
+
+def test_parse_units_from_sheets():
+    assert parse_unit("m³/t FeSiMg") == "m3"
+    assert parse_unit("ton") == "t"
+    assert parse_unit("MWh/t FeSiMg") == "mwh"
+    assert parse_unit("caixas") is None
+    assert parse_factor_basis("kgCO2e/kWh") == "kwh"
+    assert parse_factor_basis("kg CO2-Eq") == "kg"
+    assert parse_factor_basis("Não encontrado") is None
+
+
+def test_convert_flags_incompatible_rows():
+    converted, incompatible = convert(
+        [2.0, 1.5, 3.0, 4.0, 5.0],
+        ["t", "MWh", "GJ", "L", "L"],
+        ["kg", "kWh", "kg", "kg", "kg"],
+        densities=[np.nan, np.nan, np.nan, 840.0, np.nan],
+    )
+
+    np.testing.assert_allclose(converted[[0, 1, 3]], [2000.0, 1500.0, 3.36])
+    assert incompatible.tolist() == [False, False, True, False, True]
+
+
+def test_industrial_converts_mixed_units():
+    df = pd.DataFrame(
+        {
+            "Nome no Estudo (Ecoinvent)": [
+                "Energia Hidrelétrica",
+                "Combustão de Óleo Diesel",
+                "Quartzo Rima",
+                "Quartzo Rima",
+            ],
+            "Quantidade": [2.0, 1000.0, 1.0, 1.0],
+            "Unidade": ["MWh/t FeSiMg", "L/t FeSiMg", "t/t FeSiMg", "GJ/t FeSiMg"],
+        }
+    )
+    industrial = Industrial(df)
+    result = industrial.process()
+
+    energy, diesel = result["Fator de Emissão Fóssil"].iloc[:2]
+    np.testing.assert_allclose(
+        result["Emissões Fósseis (tCO2e)"].iloc[:2], [2 * energy, diesel]
+    )
+    assert np.isnan(result["Emissões Fósseis (tCO2e)"].iloc[3])
+    assert industrial.diagnostics["Linha"].tolist() == [3]
+
+
+def test_quartz_rows_without_factor_are_not_converted():
+    df = pd.DataFrame(
+        {
+            "Nome no estudo": ["Quartzo Rima", "Insumo sem fator"],
+            "Quantidade": [1.0, 2.0],
+            "Unidade": ["t", "t"],
+        }
+    )
+    quartz = QuartzMining(df)
+    result = quartz.process()
+
+    assert result["Quantidade - Unidade do Fator"].iloc[1] == 2.0
+    assert result["Emissões Fósseis (tCO2e)"].iloc[1] == 0
+    assert quartz.diagnostics[["Linha", "Mensagem"]].values.tolist() == [
+        [1, "Fator de emissão não encontrado"]
+    ]
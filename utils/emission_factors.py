@@ -1,20 +1,79 @@
+import numpy as np
 import pandas as pd
 
+from utils.factor_repository import get_repository
+from utils.profiling import count_lookups
+
+EMISSION_FACTORS_PATH = "data/lca/emission_factors.xlsx"
+
+
+def get_emission_factors_table():
+    """
+    Obtém a tabela de fatores de emissão compilada, indexada por `name`
+    (normalizado, ver utils.names.normalize_name).
+    """
+    return get_repository().table(EMISSION_FACTORS_PATH, key_column="name")
+
 
 def get_emission_factor(factor_name: str, factor_column: str):
     """
     Obtém um fator de emissão com base no nome e tipo.
     """
-    factors = pd.read_excel("data/lca/emission_factors.xlsx")
-
-    factor_name = factor_name.lower()
-    factors["name"] = factors["name"].str.lower()
+    factors = get_emission_factors_table()
 
-    factor = factors[factors["name"] == factor_name]
+    position = factors.position(factor_name)
 
-    if factor.empty and factor_column in factor.columns:
+    if position is None:
         # raise ValueError(f"Fator de emissão não encontrado para {factor_name}")
         print(f"Fator de emissão não encontrado para {factor_name}")
         return None
 
-    return factor[factor_column].values[0]
+    return factors.take(factor_column, [position])[0]
+
+
+def get_emission_factors(
+    names: pd.Series, factor_columns: list[str], defaults: dict | None = None
+) -> pd.DataFrame:
+    """
+    Obtém vários fatores de emissão para uma série de nomes de uma só vez.
+
+    Cada nome distinto é buscado uma única vez e o resultado é expandido para
+    todas as linhas, mantendo o índice de `names`.
+
+    :param names: Série com os nomes no estudo.
+    :param factor_columns: Colunas da tabela de fatores desejadas.
+    :param defaults: Valores usados, por coluna, para nomes não encontrados
+        ou com valor vazio/zero na tabela (mesmo critério de `x if x else ...`).
+    :return: DataFrame alinhado a `names` com uma coluna por fator. Os nomes
+        não encontrados ficam em `attrs["missing"]`.
+    """
+    factors = get_emission_factors_table()
+    defaults = defaults or {}
+
+    codes, uniques = pd.factorize(names, use_na_sentinel=False)
+    count_lookups(len(uniques))
+    positions = factors.positions(uniques)
+    found = positions >= 0
+
+    for name in uniques[~found]:
+        print(f"Fator de emissão não encontrado para {name}")
+
+    result = {}
+    for column in factor_columns:
+        unique_values = pd.Series(
+            factors.take(column, positions[found]), index=np.flatnonzero(found)
+        )
+        unique_values = unique_values.reindex(range(len(uniques)))
+
+        if column in defaults:
+            missing = ~found | ~unique_values.astype(bool)
+            unique_values = unique_values.astype(object)
+            unique_values[missing] = defaults[column]
+            unique_values = unique_values.infer_objects()
+
+        result[column] = unique_values.take(codes).values
+
+    frame = pd.DataFrame(result, index=names.index)
+    frame.attrs["missing"] = [name for name in uniques[~found] if pd.notna(name)]
+
+    return frame
@@ -0,0 +1,444 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from utils.names import normalize_name
+from utils.profiling import count_lookups
+
+CACHE_DIR = os.environ.get("LCA_CACHE_DIR", "data/lca/.cache")
+CACHE_VERSION = 3
+# Intervalo mínimo (s) entre verificações de alteração do .xlsx de origem
+CHECK_INTERVAL = 1.0
+
+
+def _codes_dtype(size: int):
+    """Menor tipo inteiro com sinal que comporta `size` categorias e o -1 (vazio)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _text_array(values) -> np.ndarray:
+    """Array de texto de largura fixa (mapeável) ou, se houver outros tipos, de objetos."""
+    if all(isinstance(value, str) for value in values):
+        return np.array(values, dtype=str) if len(values) else np.array([], dtype="U1")
+    return np.array(values, dtype=object)
+
+
+@dataclass(frozen=True)
+class TextColumn:
+    """Coluna de texto compacta: um código por linha (-1 = vazio) e os valores distintos."""
+
+    codes: np.ndarray
+    categories: np.ndarray
+
+    @classmethod
+    def from_values(cls, values: pd.Series):
+        codes, categories = pd.factorize(values)
+        return cls(
+            codes=codes.astype(_codes_dtype(len(categories))),
+            categories=_text_array(list(categories)),
+        )
+
+    def take(self, positions) -> np.ndarray:
+        """Decodifica as linhas em `positions` (array de objetos, NaN se vazio)."""
+        codes = self.codes[positions]
+        values = np.full(codes.shape, np.nan, dtype=object)
+        present = codes >= 0
+        values[present] = self.categories.take(codes[present]).astype(object)
+        return values
+
+
+@dataclass
+class FactorTable:
+    """
+    Tabela de fatores compilada em colunas, com índice de busca por nome
+    normalizado (ver utils.names.normalize_name): nomes que diferem só por
+    acentos, maiúsculas, espaços ou pontuação resolvem para a mesma linha.
+
+    Colunas numéricas são arrays NumPy e colunas de texto são TextColumn;
+    o índice é um array ordenado de nomes normalizados com a posição de cada
+    um. Quando carregados do cache, todos esses arrays são mapeados do disco
+    somente para leitura e compartilhados entre processos.
+    """
+
+    # nome da coluna -> np.ndarray (numérica) ou TextColumn
+    columns: dict
+    # nomes normalizados em ordem crescente e a linha de cada um
+    keys: np.ndarray
+    key_positions: np.ndarray
+    key_column: str | None = None
+    _arrays: dict = field(default_factory=dict, repr=False, compare=False)
+    _frame: pd.DataFrame | None = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, key_column: str | None = None):
+        """
+        Compila um DataFrame lido da planilha. Se `key_column` for informada,
+        os nomes normalizados dessa coluna formam o índice (vale a primeira
+        ocorrência).
+        """
+        columns = {
+            name: TextColumn.from_values(frame[name])
+            if frame[name].dtype == object
+            else frame[name].to_numpy()
+            for name in frame.columns
+        }
+
+        index = {}
+        if key_column is not None:
+            for position, value in enumerate(frame[key_column].values):
+                name = normalize_name(value)
+                if name is not None and name not in index:
+                    index[name] = position
+
+        keys = sorted(index)
+        return cls(
+            columns=columns,
+            keys=_text_array(keys),
+            key_positions=np.array([index[key] for key in keys], dtype=np.int64),
+            key_column=key_column,
+        )
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """
+        DataFrame com todas as colunas (montado na primeira chamada e
+        compartilhado; não deve ser alterado). Prefira `column`/`get` para
+        buscas, que não copiam os dados mapeados.
+        """
+        if self._frame is None:
+            self._frame = pd.DataFrame({name: self.column(name) for name in self.columns})
+        return self._frame
+
+    def column(self, column: str):
+        """
+        Obtém os valores de uma coluna como array NumPy (memorizado). Colunas
+        numéricas são devolvidas sem cópia; as de texto são decodificadas em
+        um array de objetos.
+
+        :param column: Nome da coluna.
+        :return: Array com os valores da coluna.
+        """
+        values = self._arrays.get(column)
+        if values is None:
+            values = self.columns[column]
+            if isinstance(values, TextColumn):
+                values = values.take(np.arange(len(values.codes)))
+            self._arrays[column] = values
+        return values
+
+    def take(self, column: str, positions) -> np.ndarray:
+        """
+        Obtém os valores de uma coluna nas posições informadas, decodificando
+        só essas linhas.
+
+        :param column: Nome da coluna.
+        :param positions: Posições das linhas.
+        :return: Array com os valores.
+        """
+        return self.columns[column].take(np.asarray(positions, dtype=np.int64))
+
+    def positions(self, names) -> np.ndarray:
+        """
+        Obtém as posições de vários nomes de uma só vez (busca binária no
+        índice ordenado).
+
+        :param names: Sequência de nomes (normalizados aqui).
+        :return: Array com a posição de cada nome (-1 se não encontrado).
+        """
+        normalized = [normalize_name(name) for name in names]
+        result = np.full(len(normalized), -1, dtype=np.int64)
+
+        valid = [i for i, name in enumerate(normalized) if name is not None]
+        if not valid or len(self.keys) == 0:
+            return result
+
+        query = np.array([normalized[i] for i in valid], dtype=str)
+        found = np.searchsorted(self.keys, query).clip(max=len(self.keys) - 1)
+        matched = self.keys[found] == query
+        result[np.array(valid)[matched]] = self.key_positions[found[matched]]
+        return result
+
+    def position(self, name) -> int | None:
+        """
+        Obtém a posição da linha correspondente ao nome (primeira ocorrência).
+
+        :param name: Nome buscado (normalizado aqui).
+        :return: Posição da linha ou None se não encontrado.
+        """
+        count_lookups()
+        position = int(self.positions([name])[0])
+        return None if position < 0 else position
+
+    def get(self, name, column: str, default=None):
+        """
+        Obtém o valor de uma coluna para o nome informado.
+
+        :param name: Nome buscado (normalizado aqui).
+        :param column: Coluna desejada.
+        :param default: Valor retornado quando o nome não existe na tabela.
+        :return: Valor do fator.
+        """
+        count_lookups()
+        position = int(self.positions([name])[0])
+        if position < 0:
+            return default
+        return self.take(column, [position])[0]
+
+
+def _fingerprint(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _save_array(directory: str, name: str, values: np.ndarray):
+    """Grava um array em .npy, ou devolve-o para meta.pkl se não for mapeável."""
+    if values.dtype == object:
+        return values
+    np.save(os.path.join(directory, f"{name}.npy"), values)
+    return None
+
+
+def _load_array(directory: str, name: str, stored):
+    if stored is not None:
+        return stored
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+
+def _write_store(directory: str, table: FactorTable):
+    """
+    Grava uma tabela no formato colunar: um .npy por coluna numérica, por
+    códigos e valores distintos de cada coluna de texto e pelo índice. Os
+    nomes e a ordem das colunas ficam em meta.pkl (com os valores distintos
+    que não são só texto, que não podem ser mapeados).
+    """
+    os.makedirs(directory)
+    columns = []
+    for position, (name, values) in enumerate(table.columns.items()):
+        if isinstance(values, TextColumn):
+            np.save(os.path.join(directory, f"{position}.codes.npy"), values.codes)
+            columns.append(
+                (name, "text", _save_array(directory, f"{position}.categories", values.categories))
+            )
+        else:
+            columns.append((name, "array", _save_array(directory, str(position), values)))
+
+    np.save(os.path.join(directory, "keys.npy"), table.keys)
+    np.save(os.path.join(directory, "key_positions.npy"), table.key_positions)
+
+    with open(os.path.join(directory, "meta.pkl"), "wb") as f:
+        pickle.dump(
+            {"columns": columns, "key_column": table.key_column},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+
+def _open_store(directory: str) -> FactorTable | None:
+    """
+    Abre uma tabela gravada por `_write_store`, mapeando os arrays do disco
+    (somente leitura): processos que abrem a mesma tabela compartilham as
+    mesmas páginas de memória.
+    """
+    try:
+        with open(os.path.join(directory, "meta.pkl"), "rb") as f:
+            meta = pickle.load(f)
+
+        columns = {}
+        for position, (name, kind, stored) in enumerate(meta["columns"]):
+            if kind == "text":
+                columns[name] = TextColumn(
+                    codes=_load_array(directory, f"{position}.codes", None),
+                    categories=_load_array(directory, f"{position}.categories", stored),
+                )
+            else:
+                columns[name] = _load_array(directory, str(position), stored)
+
+        return FactorTable(
+            columns=columns,
+            keys=_load_array(directory, "keys", None),
+            key_positions=_load_array(directory, "key_positions", None),
+            key_column=meta["key_column"],
+        )
+    except (OSError, ValueError, KeyError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+class FactorRepository:
+    """
+    Repositório de tabelas de fatores compartilhado pelo processo.
+
+    Cada planilha é lida uma única vez e compilada em formato colunar no
+    diretório de cache (ver `_write_store`); as colunas são mapeadas do disco
+    somente para leitura, então sessões e processos que usam a mesma tabela
+    compartilham as mesmas páginas de memória. A tabela compilada é
+    invalidada quando o mtime/tamanho do .xlsx muda e o hash do conteúdo
+    também é diferente.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self._tables: dict = {}
+        self._lock = threading.RLock()
+
+    def _cache_path(self, path: str, sheet_name, key_column) -> str:
+        """Prefixo dos arquivos de cache de uma tabela (sem extensão)."""
+        token = f"{os.path.abspath(path)}|{sheet_name}|{key_column}|{CACHE_VERSION}"
+        name = hashlib.sha1(token.encode("utf-8")).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{name}")
+
+    @staticmethod
+    def _store_dir(cache_path: str, file_hash: str) -> str:
+        # o diretório de cada versão do conteúdo nunca é reescrito, então
+        # pode continuar mapeado por outros processos
+        return f"{cache_path}-{file_hash[:16]}"
+
+    def _compile(self, path: str, sheet_name, key_column) -> FactorTable:
+        frame = pd.read_excel(path, sheet_name=sheet_name)
+        return FactorTable.from_frame(frame, key_column)
+
+    def _load_compiled(self, cache_path: str, fingerprint, path: str):
+        try:
+            with open(f"{cache_path}.json", encoding="utf-8") as f:
+                pointer = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if pointer.get("version") != CACHE_VERSION:
+            return None
+
+        if tuple(pointer["fingerprint"]) != fingerprint:
+            # mtime alterado (ex.: checkout do git): só recompila se o conteúdo mudou
+            if pointer["hash"] != _file_hash(path):
+                return None
+
+            pointer["fingerprint"] = fingerprint
+            self._write_pointer(cache_path, pointer)
+
+        return _open_store(self._store_dir(cache_path, pointer["hash"]))
+
+    def _write_pointer(self, cache_path: str, pointer: dict):
+        tmp_path = f"{cache_path}.json.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(pointer, f)
+        os.replace(tmp_path, f"{cache_path}.json")
+
+    def _store(self, cache_path: str, table: FactorTable, fingerprint, file_hash: str):
+        """
+        Grava a tabela compilada e aponta o cache para ela, removendo versões
+        anteriores do mesmo conteúdo.
+
+        :return: A tabela mapeada do disco, ou None se não foi possível gravar.
+        """
+        directory = self._store_dir(cache_path, file_hash)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if _open_store(directory) is None:
+                shutil.rmtree(directory, ignore_errors=True)
+                tmp_dir = f"{directory}.{os.getpid()}.tmp"
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                _write_store(tmp_dir, table)
+                try:
+                    os.rename(tmp_dir, directory)
+                except OSError:
+                    # outro processo gravou o mesmo conteúdo antes
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            self._write_pointer(
+                cache_path,
+                {"version": CACHE_VERSION, "fingerprint": fingerprint, "hash": file_hash},
+            )
+        except OSError as e:
+            print(f"[FactorRepository] Não foi possível gravar o cache {cache_path}: {e}")
+            return None
+
+        for stale in glob.glob(f"{cache_path}-*"):
+            if stale != directory and not stale.endswith(".tmp"):
+                shutil.rmtree(stale, ignore_errors=True)
+
+        return _open_store(directory)
+
+    def table(
+        self,
+        path: str,
+        sheet_name=0,
+        key_column: str | None = None,
+    ) -> FactorTable:
+        """
+        Obtém uma tabela de fatores compilada.
+
+        :param path: Caminho do arquivo .xlsx.
+        :param sheet_name: Aba da planilha.
+        :param key_column: Coluna usada como chave do índice de busca (nomes
+            normalizados, ver utils.names.normalize_name).
+        :return: Tabela compilada.
+        """
+        memory_key = (path, sheet_name, key_column)
+        now = time.monotonic()
+
+        cached = self._tables.get(memory_key)
+        if cached is not None and now - cached[2] < CHECK_INTERVAL:
+            return cached[1]
+
+        fingerprint = _fingerprint(path)
+        if cached is not None and cached[0] == fingerprint:
+            self._tables[memory_key] = (fingerprint, cached[1], now)
+            return cached[1]
+
+        with self._lock:
+            cached = self._tables.get(memory_key)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+
+            cache_path = self._cache_path(path, sheet_name, key_column)
+            table = self._load_compiled(cache_path, fingerprint, path)
+
+            if table is None:
+                compiled = self._compile(path, sheet_name, key_column)
+                table = (
+                    self._store(cache_path, compiled, fingerprint, _file_hash(path))
+                    or compiled
+                )
+
+            self._tables[memory_key] = (fingerprint, table, now)
+            return table
+
+    def frame(self, path: str, sheet_name=0) -> pd.DataFrame:
+        """
+        Obtém o DataFrame de uma planilha de fatores (cópia compartilhada,
+        não deve ser alterada; ver FactorTable.frame).
+        """
+        return self.table(path, sheet_name).frame
+
+    def clear(self):
+        """Descarta as tabelas mantidas em memória."""
+        with self._lock:
+            self._tables.clear()
+
+
+_repository = FactorRepository()
+
+
+def get_repository() -> FactorRepository:
+    """Obtém o repositório de fatores do processo."""
+    return _repository
@@ -0,0 +1,92 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from utils.factor_repository import get_repository
+from utils.names import normalize_name
+
+GWP_PATH = "data/lca/gwp_kyoto.xlsx"
+
+# Relatórios de avaliação do IPCC disponíveis em gwp_kyoto.xlsx
+ASSESSMENTS = ["ar4", "ar5", "ar6"]
+DEFAULT_ASSESSMENT = "ar6"
+
+
+def get_gwp_table():
+    """
+    Obtém a tabela de GWP (GWP_Quioto) compilada, indexada por
+    `chemical_formula`. Para fórmulas repetidas (ex.: CH4) vale a primeira
+    linha da planilha.
+    """
+    return get_repository().table(GWP_PATH, key_column="chemical_formula")
+
+
+def get_gwp(chemical_formula: str, assessment: str = DEFAULT_ASSESSMENT) -> float:
+    """
+    Obtém o potencial de aquecimento global de um gás.
+
+    :param chemical_formula: Fórmula química (ex.: "CH4", "N2O").
+    :param assessment: Relatório de avaliação do IPCC ("ar4", "ar5" ou "ar6").
+    :return: Valor do GWP.
+    """
+    value = get_gwp_table().get(chemical_formula, assessment)
+
+    if value is None:
+        raise KeyError(f"GWP não encontrado para {chemical_formula}")
+
+    return float(value)
+
+
+@dataclass(frozen=True)
+class GwpScenario:
+    """Conjunto de GWPs: os valores de um relatório do IPCC, com substituições por gás."""
+
+    name: str
+    assessment: str = DEFAULT_ASSESSMENT
+    # fórmula química -> GWP usado no lugar do valor do relatório
+    overrides: dict = field(default_factory=dict)
+
+    def gwp(self, chemical_formula: str) -> float:
+        overrides = {normalize_name(gas): value for gas, value in self.overrides.items()}
+        value = overrides.get(normalize_name(chemical_formula))
+        if value is not None:
+            return float(value)
+        return get_gwp(chemical_formula, self.assessment)
+
+
+def assessment_scenarios(assessments: list[str] | None = None) -> list[GwpScenario]:
+    """Um cenário por relatório do IPCC (padrão: todos de ASSESSMENTS)."""
+    return [
+        GwpScenario(assessment.upper(), assessment) for assessment in assessments or ASSESSMENTS
+    ]
+
+
+def parse_overrides(text: str) -> dict:
+    """
+    Lê substituições de GWP no formato "CH4=28, N2O=265".
+
+    :param text: Pares gás=valor separados por vírgula ou ponto e vírgula.
+    :return: Dicionário gás -> GWP.
+    """
+    overrides = {}
+    for item in text.replace(";", ",").split(","):
+        if not item.strip():
+            continue
+        gas, separator, value = item.partition("=")
+        if not separator or not gas.strip():
+            raise ValueError(f"GWP inválido: '{item.strip()}' (use gás=valor)")
+        try:
+            overrides[gas.strip()] = float(value.strip())
+        except ValueError:
+            raise ValueError(f"GWP inválido para {gas.strip()}: '{value.strip()}'") from None
+    return overrides
+
+
+def gwp_matrix(scenarios: list[GwpScenario], gases: list[str]) -> np.ndarray:
+    """
+    Matriz de GWPs (gases x cenários), para converter massas de vários gases
+    em CO2e em todos os cenários com um único produto de matrizes.
+    """
+    return np.array(
+        [[scenario.gwp(gas) for scenario in scenarios] for gas in gases], dtype=float
+    ).reshape(len(gases), len(scenarios))
@@ -0,0 +1,43 @@
+import functools
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def normalize_name(value) -> str | None:
+    """
+    Chave de busca de um nome nas tabelas de fatores: sem acentos, em
+    minúsculas, com a pontuação (vírgulas, hífens, parênteses...) trocada por
+    espaço e espaços repetidos reduzidos a um. Símbolos como "<", ">" e "+"
+    são mantidos, pois distinguem fatores (ex.: "<30kW" e ">30kW").
+
+    Ex.: "Óleo  Diesel (S-10)" -> "oleo diesel s 10".
+
+    :param value: Nome original.
+    :return: Nome normalizado, ou None para valores que não são texto.
+    """
+    if not isinstance(value, str):
+        return None
+
+    decomposed = unicodedata.normalize("NFKD", value)
+    folded = "".join(
+        " " if unicodedata.category(char)[0] == "P" else char
+        for char in decomposed
+        if not unicodedata.combining(char)
+    )
+    return " ".join(folded.casefold().split())
+
+
+def normalize_names(names) -> np.ndarray:
+    """
+    Normaliza uma sequência de nomes (ver `normalize_name`), processando cada
+    nome distinto uma única vez.
+
+    :param names: Série, Index ou array de nomes.
+    :return: Array de objetos com os nomes normalizados (None para não texto).
+    """
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object), use_na_sentinel=False)
+    normalized = np.array([normalize_name(name) for name in uniques], dtype=object)
+    return normalized[codes]
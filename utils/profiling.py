@@ -0,0 +1,162 @@
+import cProfile
+import functools
+import pstats
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Número de funções mais custosas mantidas no relatório do cProfile
+CPROFILE_TOP = 25
+
+_current_profiler = ContextVar("lca_profiler", default=None)
+
+
+@dataclass
+class StageTiming:
+    name: str
+    depth: int
+    seconds: float = 0.0
+    calls: int = 0
+    lookups: int = 0
+
+
+class Profiler:
+    """
+    Mede o tempo de cada etapa nomeada de um cálculo e conta as buscas de
+    fatores feitas em cada etapa, opcionalmente sob o cProfile.
+
+    Enquanto o profiler está ativo (`with Profiler(...)`), as funções
+    `stage`, `timed` e `count_lookups` deste módulo registram nele; fora
+    dele, não fazem nada. O tempo de uma etapa inclui as etapas internas.
+    """
+
+    def __init__(self, label: str = "", use_cprofile: bool = False):
+        """
+        :param label: Identificação da execução no relatório (ex.: o módulo).
+        :param use_cprofile: Executa também o cProfile e inclui as funções
+            mais custosas no relatório.
+        """
+        self.label = label
+        self.stages = {}
+        self.rows = None
+        self.seconds = 0.0
+        self._cprofile = cProfile.Profile() if use_cprofile else None
+        self._stack = []
+        self._token = None
+        self._started = None
+
+    def __enter__(self):
+        self._token = _current_profiler.set(self)
+        self._started = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.seconds += time.perf_counter() - self._started
+        _current_profiler.reset(self._token)
+
+    @contextmanager
+    def stage(self, name: str):
+        timing = self.stages.get(name)
+        if timing is None:
+            timing = self.stages[name] = StageTiming(name, depth=len(self._stack))
+
+        self._stack.append(timing)
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.seconds += time.perf_counter() - started
+            timing.calls += 1
+            self._stack.pop()
+
+    def count_lookups(self, count: int = 1):
+        if self._stack:
+            self._stack[-1].lookups += count
+
+    def top_functions(self, limit: int = CPROFILE_TOP) -> list[dict]:
+        """Funções com maior tempo acumulado segundo o cProfile."""
+        if self._cprofile is None:
+            return []
+
+        stats = pstats.Stats(self._cprofile)
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+
+        return [
+            {
+                "function": f"{path}:{line}({name})",
+                "calls": calls,
+                "total_s": total,
+                "cumulative_s": cumulative,
+            }
+            for (path, line, name), (_, calls, total, cumulative, _) in entries[:limit]
+        ]
+
+    def report(self) -> dict:
+        """Relatório serializável em JSON."""
+        return {
+            "label": self.label,
+            "rows": self.rows,
+            "seconds": self.seconds,
+            "lookups": sum(timing.lookups for timing in self.stages.values()),
+            "stages": [
+                {
+                    "name": timing.name,
+                    "depth": timing.depth,
+                    "seconds": timing.seconds,
+                    "calls": timing.calls,
+                    "lookups": timing.lookups,
+                }
+                for timing in self.stages.values()
+            ],
+            "cprofile": self.top_functions(),
+        }
+
+
+def stages_frame(report: dict) -> pd.DataFrame:
+    """Etapas de um relatório em ordem de execução, para exibição."""
+    stages = report["stages"]
+    return pd.DataFrame(
+        {
+            "Etapa": ["    " * entry["depth"] + entry["name"] for entry in stages],
+            "Tempo (s)": [entry["seconds"] for entry in stages],
+            "Chamadas": [entry["calls"] for entry in stages],
+            "Buscas de fatores": [entry["lookups"] for entry in stages],
+        }
+    )
+
+
+@contextmanager
+def stage(name: str):
+    """Mede uma etapa no profiler ativo (não faz nada sem profiler)."""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        yield None
+        return
+
+    with profiler.stage(name) as timing:
+        yield timing
+
+
+def timed(func):
+    """Decorador que mede cada chamada do método como uma etapa com o seu nome."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with stage(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def count_lookups(count: int = 1):
+    """Registra buscas de fatores na etapa atual do profiler ativo."""
+    profiler = _current_profiler.get()
+    if profiler is not None:
+        profiler.count_lookups(count)
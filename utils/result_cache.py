@@ -0,0 +1,207 @@
+import copy
+import dataclasses
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+MAX_ENTRIES = int(os.environ.get("LCA_RESULT_CACHE_ENTRIES", "32"))
+MAX_BYTES = int(os.environ.get("LCA_RESULT_CACHE_MB", "512")) * 1024 * 1024
+
+FACTOR_PATTERNS = ["data/lca/*.xlsx", "data/lca/factors/*.xlsx"]
+
+
+def content_hash(data: bytes) -> str:
+    """Hash do conteúdo de um arquivo enviado."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def factor_set_version(patterns: list[str] | None = None) -> str:
+    """
+    Versão do conjunto de planilhas de fatores, derivada do mtime e tamanho
+    de cada arquivo. Muda sempre que alguma planilha de fatores é alterada.
+    """
+    digest = hashlib.sha1()
+    for pattern in patterns or FACTOR_PATTERNS:
+        for path in sorted(glob.glob(pattern)):
+            stat = os.stat(path)
+            digest.update(f"{path}|{stat.st_mtime_ns}|{stat.st_size}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def estimate_size(value) -> int:
+    """Estimativa do tamanho em memória de um resultado (bytes)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values())
+    if is_dataclass(value):
+        return estimate_size(vars(value))
+    return 0
+
+
+def read_only(value, memo: dict | None = None):
+    """
+    Versão somente leitura de um resultado, para compartilhar entre sessões
+    sem cópias: DataFrames viram novos DataFrames sobre os mesmos arrays,
+    marcados como não graváveis, de modo que alterações no lugar (ex.:
+    `df.loc[...] = ...`) lançam ValueError em vez de alterar o resultado de
+    outras sessões. Novas colunas ficam só no DataFrame de quem as criou.
+    Colunas com arrays de extensão (ex.: categóricas) são copiadas.
+
+    Percorre tuplas, listas, dicionários, dataclasses e os atributos
+    DataFrame de outros objetos (ex.: a instância da classe do módulo).
+    Um mesmo objeto convertido mais de uma vez resulta na mesma versão.
+
+    :param value: Resultado calculado.
+    :param memo: Versões já obtidas, por id do objeto original.
+    :return: Resultado com DataFrames e arrays somente leitura.
+    """
+    memo = {} if memo is None else memo
+    if id(value) in memo:
+        return memo[id(value)][1]
+
+    if isinstance(value, pd.DataFrame):
+        converted = pd.DataFrame(
+            {
+                position: _read_only_array(value.iloc[:, position])
+                for position in range(value.shape[1])
+            },
+            index=value.index,
+            copy=False,
+        )
+        converted.columns = value.columns
+        converted.attrs = value.attrs
+    elif isinstance(value, np.ndarray):
+        converted = _read_only_array(value)
+    elif isinstance(value, (tuple, list)):
+        converted = type(value)(read_only(item, memo) for item in value)
+    elif isinstance(value, dict):
+        converted = {key: read_only(item, memo) for key, item in value.items()}
+    elif is_dataclass(value) and not isinstance(value, type):
+        converted = dataclasses.replace(
+            value,
+            **{
+                field.name: read_only(getattr(value, field.name), memo)
+                for field in dataclasses.fields(value)
+                if field.init
+            },
+        )
+    elif any(isinstance(item, pd.DataFrame) for item in getattr(value, "__dict__", {}).values()):
+        converted = copy.copy(value)
+        for name, item in vars(value).items():
+            if isinstance(item, pd.DataFrame):
+                setattr(converted, name, read_only(item, memo))
+    else:
+        return value
+
+    # guarda o original para que seu id não seja reutilizado durante a conversão
+    memo[id(value)] = (value, converted)
+    return converted
+
+
+def _read_only_array(values):
+    """Visão não gravável de um array NumPy ou dos valores de uma Series."""
+    if isinstance(values, pd.Series):
+        if not isinstance(values.dtype, np.dtype):
+            # arrays de extensão (ex.: categóricos) não têm visão somente
+            # leitura: são copiados (nos categóricos, só os códigos)
+            return values.array.copy()
+        values = values.to_numpy(copy=False)
+
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class ResultCache:
+    """
+    Cache LRU de resultados calculados, limitado pelo número de entradas e
+    pela memória estimada dos DataFrames armazenados.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key):
+        """
+        Obtém um resultado do cache, marcando-o como usado recentemente.
+
+        :return: Resultado ou None se ausente.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size: int | None = None):
+        """
+        Armazena um resultado, descartando os menos usados recentemente
+        enquanto os limites forem excedidos. Resultados maiores que o limite
+        de memória não são armazenados.
+
+        :param size: Tamanho estimado em bytes (padrão: `estimate_size`).
+            Informe-o para resultados somente leitura (ver `read_only`),
+            cujas colunas de texto o pandas não consegue medir.
+        """
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_result_cache = ResultCache()
+
+
+def get_result_cache() -> ResultCache:
+    """Obtém o cache de resultados do processo (compartilhado entre sessões)."""
+    return _result_cache
@@ -0,0 +1,254 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.factor_repository import get_repository
+from utils.names import normalize_name, normalize_names
+
+CONVERSION_FACTORS_PATH = "data/lca/conversion_factors.xlsx"
+DENSITIES_PATH = "data/lca/densities.xlsx"
+
+MASS = "massa"
+VOLUME = "volume"
+ENERGY = "energia"
+
+# Unidade -> (grandeza, valor na unidade de referência da grandeza: kg, m3, MJ)
+UNITS = {
+    "g": (MASS, 1e-3),
+    "kg": (MASS, 1.0),
+    "t": (MASS, 1000.0),
+    "l": (VOLUME, 1e-3),
+    "m3": (VOLUME, 1.0),
+    "mj": (ENERGY, 1.0),
+    "gj": (ENERGY, 1000.0),
+    "kwh": (ENERGY, 3.6),
+    "mwh": (ENERGY, 3600.0),
+}
+
+# Grafias aceitas nas planilhas (já normalizadas) -> unidade de UNITS
+UNIT_ALIASES = {
+    "ton": "t",
+    "tonelada": "t",
+    "toneladas": "t",
+    "litro": "l",
+    "litros": "l",
+}
+
+# Unidade considerada para fatores sem denominador (ex.: "kg CO2-Eq" das
+# tabelas do ecoinvent, sempre por kg de produto)
+DEFAULT_FACTOR_BASIS = "kg"
+
+# Unidades de fatores sem denominador (já normalizadas, ver utils.names)
+FACTOR_UNITS_WITHOUT_BASIS = {"kg co2 eq"}
+
+# Nomes dos estudos sem densidade própria -> nome nas tabelas de densidade
+DENSITY_ALIASES = {
+    "gasolina": "Gasolina Automotiva",
+}
+
+_registry_cache = {}
+_densities_cache = {}
+
+
+def parse_unit(unit) -> str | None:
+    """
+    Unidade de uma quantidade, ignorando a referência do inventário
+    (ex.: "m³/t FeSiMg" -> "m3", "ton" -> "t").
+
+    :param unit: Unidade como escrita na planilha.
+    :return: Chave de UNITS, ou None para unidades desconhecidas.
+    """
+    if not isinstance(unit, str):
+        return None
+
+    name = normalize_name(unit.split("/")[0])
+    name = UNIT_ALIASES.get(name, name)
+    return name if name in UNITS else None
+
+
+def parse_factor_basis(unit) -> str | None:
+    """
+    Unidade a que um fator de emissão se refere: o denominador
+    (ex.: "kgCO2e/kWh" -> "kwh") ou DEFAULT_FACTOR_BASIS para as unidades
+    de FACTOR_UNITS_WITHOUT_BASIS.
+
+    :param unit: Unidade do fator (coluna `unit` de emission_factors.xlsx).
+    :return: Chave de UNITS, ou None para unidades desconhecidas (ex.: "Não
+        encontrado").
+    """
+    if not isinstance(unit, str):
+        return None
+
+    if "/" not in unit:
+        return DEFAULT_FACTOR_BASIS if normalize_name(unit) in FACTOR_UNITS_WITHOUT_BASIS else None
+
+    return parse_unit(unit.split("/", 1)[1])
+
+
+class UnitRegistry:
+    """
+    Matriz de conversão entre as unidades de UNITS, calculada uma única vez.
+
+    `scale[origem, destino]` é o fator de conversão entre unidades da mesma
+    grandeza. Entre massa e volume o fator depende da densidade da
+    substância (kg/m3): `scale` guarda a parte fixa e `power` o expoente da
+    densidade (1 de volume para massa, -1 de massa para volume). Demais
+    pares são incompatíveis (NaN).
+    """
+
+    def __init__(self, units: dict = UNITS):
+        self.units = list(units)
+        self.codes = {unit: code for code, unit in enumerate(self.units)}
+
+        dimensions = np.array([units[unit][0] for unit in self.units])
+        values = np.array([units[unit][1] for unit in self.units])
+
+        self.scale = values[:, None] / values[None, :]
+        self.power = np.zeros(self.scale.shape, dtype=np.int8)
+        self.power[np.ix_(dimensions == VOLUME, dimensions == MASS)] = 1
+        self.power[np.ix_(dimensions == MASS, dimensions == VOLUME)] = -1
+
+        compatible = (dimensions[:, None] == dimensions[None, :]) | (self.power != 0)
+        self.scale[~compatible] = np.nan
+
+    def encode(self, units, parser=parse_unit) -> np.ndarray:
+        """
+        Códigos das unidades na matriz (-1 para desconhecidas), analisando
+        cada grafia distinta uma única vez.
+
+        :param units: Unidades como escritas nas planilhas.
+        :param parser: Função que obtém a chave de UNITS de uma grafia.
+        """
+        codes, uniques = pd.factorize(pd.Series(units, dtype=object), use_na_sentinel=False)
+        unique_codes = np.array(
+            [self.codes.get(parser(unit), -1) for unit in uniques], dtype=np.int64
+        )
+        return unique_codes[codes] if len(codes) else np.empty(0, dtype=np.int64)
+
+    def convert(
+        self, values, from_units, to_units, densities=None, to_parser=parse_unit
+    ):
+        """
+        Converte uma coluna inteira de uma vez: o fator de cada linha é
+        obtido da matriz pelo par (origem, destino) e aplicado numa única
+        multiplicação.
+
+        :param values: Quantidades.
+        :param from_units: Unidades de origem como escritas nas planilhas
+            (ver `parse_unit`), uma por linha ou uma única para todas.
+        :param to_units: Unidades de destino, idem.
+        :param densities: Densidade (kg/m3) de cada linha, usada apenas nas
+            conversões entre massa e volume.
+        :param to_parser: Leitura das unidades de destino (ex.:
+            `parse_factor_basis` para converter para a base de um fator).
+        :return: Tupla (valores convertidos, máscara das linhas
+            incompatíveis). Linhas incompatíveis ficam com NaN.
+        """
+        values = np.asarray(values, dtype=float)
+        rows = len(values)
+
+        sources = self.encode(np.broadcast_to(np.asarray(from_units, dtype=object), rows))
+        targets = self.encode(
+            np.broadcast_to(np.asarray(to_units, dtype=object), rows), to_parser
+        )
+        known = (sources >= 0) & (targets >= 0)
+        sources, targets = np.where(known, sources, 0), np.where(known, targets, 0)
+
+        factor = np.where(known, self.scale[sources, targets], np.nan)
+        power = self.power[sources, targets]
+        if power.any():
+            density = (
+                np.full(rows, np.nan)
+                if densities is None
+                else np.broadcast_to(np.asarray(densities, dtype=float), rows)
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factor = factor * np.where(power != 0, density, 1.0) ** power
+            factor[(power != 0) & ~(density > 0)] = np.nan
+
+        incompatible = np.isnan(factor)
+        return values * factor, incompatible
+
+
+def get_unit_registry() -> UnitRegistry:
+    """
+    Obtém o registro de unidades (a matriz é calculada uma única vez).
+    """
+    if "registry" not in _registry_cache:
+        _registry_cache["registry"] = UnitRegistry()
+
+    return _registry_cache["registry"]
+
+
+def get_densities() -> pd.Series:
+    """
+    Densidades (kg/m3) por substância: as de conversion_factors.xlsx em
+    kg/m3 e as dos combustíveis de densities.xlsx (que prevalecem para nomes
+    repetidos). Recalculada apenas quando alguma das planilhas muda.
+
+    :return: Série indexada pelo nome normalizado (ver utils.names).
+    """
+    conversion = get_repository().table(CONVERSION_FACTORS_PATH, key_column="compound")
+    fuels = get_repository().table(DENSITIES_PATH, key_column="fuel")
+
+    cached = _densities_cache.get("densities")
+    if cached is not None and cached[0] is conversion and cached[1] is fuels:
+        return cached[2]
+
+    compounds = conversion.frame[
+        conversion.frame["unit"].map(normalize_name).eq("kg m3")
+    ]
+    densities = pd.concat(
+        [
+            pd.Series(
+                fuels.frame["density"].to_numpy(dtype=float),
+                index=normalize_names(fuels.frame["fuel"]),
+            ),
+            pd.Series(
+                compounds["amount"].to_numpy(dtype=float),
+                index=normalize_names(compounds["compound"]),
+            ),
+        ]
+    ).dropna()
+    densities = densities[~densities.index.duplicated()]
+
+    _densities_cache["densities"] = (conversion, fuels, densities)
+
+    return densities
+
+
+def lookup_densities(names) -> np.ndarray:
+    """
+    Densidade (kg/m3) de cada nome. Nomes sem densidade própria são
+    buscados também sem a descrição da mistura entre parênteses
+    (ex.: "Óleo Diesel (10% Biodiesel)" -> "Óleo Diesel") e em
+    DENSITY_ALIASES.
+
+    :param names: Série com os nomes no estudo.
+    :return: Array alinhado a `names` (NaN para nomes sem densidade).
+    """
+    densities = get_densities()
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object), use_na_sentinel=False)
+
+    candidates = []
+    for name in uniques:
+        if not isinstance(name, str):
+            candidates.append(None)
+            continue
+        key = normalize_name(name)
+        if key not in densities.index:
+            key = normalize_name(re.sub(r"\(.*?\)", " ", name))
+        candidates.append(normalize_name(DENSITY_ALIASES.get(key, key)))
+
+    unique_densities = densities.reindex(candidates).to_numpy(dtype=float)
+    return unique_densities[codes] if len(codes) else np.empty(0)
+
+
+def convert(values, from_units, to_units, densities=None, to_parser=parse_unit):
+    """
+    Atalho para `get_unit_registry().convert`.
+    """
+    return get_unit_registry().convert(
+        values, from_units, to_units, densities, to_parser
+    )